@@ -0,0 +1,69 @@
+"""
+Shared FastAPI dependencies for the payment routers.
+"""
+
+from typing import Any, Optional
+
+import jwt
+from fastapi import Depends, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import get_db
+from services.payment_service import PaymentService
+from shared_code.cache import get_cache_service
+from shared_code.core.config import get_service_settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+security = HTTPBearer(auto_error=False)
+
+
+def build_payment_service(state: Any, db: AsyncSession) -> PaymentService:
+    """Create a PaymentService from the per-worker app state."""
+    return PaymentService(
+        db=db,
+        stripe_gateway=state.stripe_gateway,
+        momo_gateway=state.momo_gateway,
+        vnpay_gateway=state.vnpay_gateway,
+        promotion_service=state.promotion_service,
+        cache_service=get_cache_service("payment"),
+    )
+
+
+def get_payment_service(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> PaymentService:
+    """
+    Dependency to create PaymentService instance.
+
+    Gateways and the promotion service are shared per worker via app.state.
+    """
+    return build_payment_service(request.app.state, db)
+
+
+async def get_authenticated_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+) -> Optional[str]:
+    """
+    User ID from a valid bearer token, or None for anonymous requests.
+
+    Unlike the X-User-ID header, the token cannot be forged by the client.
+    """
+    if not credentials:
+        return None
+
+    settings = get_service_settings("payment_service")
+    try:
+        # Expiry is checked by jwt.decode
+        payload = jwt.decode(
+            credentials.credentials,
+            settings.JWT_SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+        )
+    except jwt.InvalidTokenError as e:
+        logger.warning(f"Invalid JWT token: {e}")
+        return None
+
+    return payload.get("sub")
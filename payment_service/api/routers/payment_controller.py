@@ -3,10 +3,13 @@ Payment Controller - Handles HTTP requests for payment endpoints.
 """
 
 import logging
+import uuid
+from decimal import Decimal
 from typing import Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, Query, Depends
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from services.payment_service import (
     PaymentService,
@@ -14,43 +17,73 @@ from services.payment_service import (
     InvalidPaymentMethodException,
     InsufficientFundsException,
 )
-from gateways.stripe import StripeGateway
-from gateways.momo import MoMoGateway
-from gateways.vnpay import VNPayGateway
-from promotions.promotion_service import PromotionService
 from schemas.payment import (
     PaymentIntentRequest,
     PaymentIntentResponse,
     PaymentConfirmationRequest,
+    PaymentMethodType,
     PaymentStatusResponse,
     PaymentMethodResponse,
     RefundRequest,
     RefundResponse,
 )
-from core.database import get_db
+from api.dependencies import (
+    build_payment_service,
+    get_authenticated_user_id,
+    get_payment_service,
+)
+from core.database import AsyncSessionLocal
+from shared_code.cache import get_cache_service
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api/v1/payments", tags=["payments"])
 
+# Maximum in-flight payment confirmations per user
+MAX_CONCURRENT_CONFIRMATIONS = 10
+
+
+def _json_default(value: Any) -> Any:
+    """Encode the Decimal amounts orjson has no native support for."""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
 
-def get_payment_service(db: Session = Depends(get_db)) -> PaymentService:
+
+async def limit_concurrent_confirmations(
+    request: Request,
+    user_id: Optional[str] = Depends(get_authenticated_user_id),
+):
     """
-    Dependency to create PaymentService instance.
+    Dependency capping in-flight payment confirmations per user.
+
+    Keyed on the authenticated user, not a client-supplied header, and falls
+    back to the client IP (or one shared bucket when the transport gives
+    none) for anonymous requests.
     """
-    stripe_gateway = StripeGateway()
-    momo_gateway = MoMoGateway()
-    vnpay_gateway = VNPayGateway()
-    promotion_service = PromotionService()
+    if user_id:
+        subject = f"user:{user_id}"
+    elif request.client:
+        subject = f"ip:{request.client.host}"
+    else:
+        subject = "anonymous"
+
+    cache_service = get_cache_service("payment")
+    key = f"concurrent:{subject}:confirm"
+    request_id = str(uuid.uuid4())
+
+    if not await cache_service.acquire_concurrency_slot(
+        key, request_id, MAX_CONCURRENT_CONFIRMATIONS
+    ):
+        raise HTTPException(
+            status_code=429, detail="Too many concurrent payment confirmations"
+        )
 
-    return PaymentService(
-        db=db,
-        stripe_gateway=stripe_gateway,
-        momo_gateway=momo_gateway,
-        vnpay_gateway=vnpay_gateway,
-        promotion_service=promotion_service,
-    )
+    try:
+        yield
+    finally:
+        await cache_service.release_concurrency_slot(key, request_id)
 
 
 @router.post("/create-intent", response_model=PaymentIntentResponse)
@@ -90,6 +123,7 @@ async def create_payment_intent(
 async def confirm_payment(
     request: PaymentConfirmationRequest,
     payment_service: PaymentService = Depends(get_payment_service),
+    _: None = Depends(limit_concurrent_confirmations),
 ):
     """
     Confirm payment.
@@ -116,7 +150,7 @@ async def confirm_payment(
 @router.get("/{payment_intent_id}", response_model=PaymentStatusResponse)
 async def get_payment_status(
     payment_intent_id: str,
-    payment_method: str = Query(..., description="Payment method used"),
+    payment_method: PaymentMethodType = Query(..., description="Payment method used"),
     payment_service: PaymentService = Depends(get_payment_service),
 ):
     """
@@ -184,7 +218,7 @@ async def get_available_payment_methods():
 async def refund_payment(
     payment_intent_id: str,
     refund_request: RefundRequest,
-    payment_method: str = Query(..., description="Payment method used"),
+    payment_method: PaymentMethodType = Query(..., description="Payment method used"),
     payment_service: PaymentService = Depends(get_payment_service),
 ):
     """
@@ -219,6 +253,9 @@ async def get_payment_history(
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
     skip: int = Query(0, description="Number of records to skip"),
     limit: int = Query(20, description="Maximum records to return"),
+    include_transactions: bool = Query(
+        False, description="Include payment transactions"
+    ),
     payment_service: PaymentService = Depends(get_payment_service),
 ):
     """
@@ -229,6 +266,7 @@ async def get_payment_history(
         user_id: Filter by user ID
         skip: Number of records to skip
         limit: Maximum records to return
+        include_transactions: Include payment transactions
         payment_service: Payment service instance
 
     Returns:
@@ -236,10 +274,56 @@ async def get_payment_history(
     """
     try:
         result = await payment_service.get_payment_history(
-            order_id=order_id, user_id=user_id, skip=skip, limit=limit
+            order_id=order_id,
+            user_id=user_id,
+            skip=skip,
+            limit=limit,
+            include_transactions=include_transactions,
+        )
+        # orjson encodes the raw rows directly; datetimes come out in
+        # ISO 8601 without a per-field isoformat() in Python
+        return Response(
+            content=orjson.dumps(
+                {"payments": result, "total": len(result)}, default=_json_default
+            ),
+            media_type="application/json",
         )
-        return {"payments": result, "total": len(result)}
 
     except Exception as e:
         logger.error(f"Error getting payment history: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/history/stream")
+async def stream_payment_history(
+    request: Request,
+    order_id: Optional[str] = Query(None, description="Filter by order ID"),
+    user_id: Optional[int] = Query(None, description="Filter by user ID"),
+    skip: int = Query(0, description="Number of records to skip"),
+    limit: int = Query(20, description="Maximum records to return"),
+):
+    """
+    Stream payment history as newline-delimited JSON.
+
+    Args:
+        request: Incoming request
+        order_id: Filter by order ID
+        user_id: Filter by user ID
+        skip: Number of records to skip
+        limit: Maximum records to return
+
+    Returns:
+        StreamingResponse: One payment record per line
+    """
+    state = request.app.state
+
+    async def ndjson():
+        # The body outlives the endpoint, so it cannot use the request session
+        async with AsyncSessionLocal() as db:
+            payment_service = build_payment_service(state, db)
+            async for payment in payment_service.stream_payment_history(
+                order_id=order_id, user_id=user_id, skip=skip, limit=limit
+            ):
+                yield orjson.dumps(payment, default=_json_default) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
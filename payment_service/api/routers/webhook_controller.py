@@ -4,43 +4,39 @@ Webhook Controller - Handles payment gateway webhooks
 
 import logging
 from typing import Dict, Any
-from fastapi import APIRouter, HTTPException, Request, Depends, Header
-from sqlalchemy.orm import Session
 
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Header, status
+
+from api.dependencies import build_payment_service
 from services.payment_service import PaymentService, PaymentException
-from gateways.stripe import StripeGateway
-from gateways.momo import MoMoGateway
-from gateways.vnpay import VNPayGateway
-from promotions.promotion_service import PromotionService
-from core.database import get_db
+from services.webhook_dispatcher import WebhookHandler
+from core.database import AsyncSessionLocal
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api/v1/webhooks", tags=["webhooks"])
 
+# No MoMo endpoint yet: MomoGateway.verify_webhook_signature is not
+# implemented, and unsigned deliveries must not reach the webhook workers.
 
-def get_payment_service(db: Session = Depends(get_db)) -> PaymentService:
-    """Dependency to create PaymentService instance."""
-    stripe_gateway = StripeGateway()
-    momo_gateway = MoMoGateway()
-    vnpay_gateway = VNPayGateway()
-    promotion_service = PromotionService()
 
-    return PaymentService(
-        db=db,
-        stripe_gateway=stripe_gateway,
-        momo_gateway=momo_gateway,
-        vnpay_gateway=vnpay_gateway,
-        promotion_service=promotion_service,
-    )
+def _enqueue_event(request: Request, source: str, event: Dict[str, Any]) -> None:
+    """Hand a verified event to the webhook workers."""
+    if not request.app.state.webhook_dispatcher.submit(source, event):
+        logger.error(f"Webhook queue full, rejecting {source} event")
+        # Gateways retry deliveries that are not acknowledged
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook queue full",
+        )
 
 
-@router.post("/stripe")
+@router.post("/stripe", status_code=status.HTTP_202_ACCEPTED)
 async def handle_stripe_webhook(
     request: Request,
     stripe_signature: str = Header(..., alias="stripe-signature"),
-    payment_service: PaymentService = Depends(get_payment_service),
 ):
     """
     Handle Stripe webhooks.
@@ -48,33 +44,30 @@ async def handle_stripe_webhook(
     Args:
         request: HTTP request containing webhook payload
         stripe_signature: Stripe webhook signature header
-        payment_service: Payment service instance
 
     Returns:
-        Success response
+        Accepted response; the event is processed by the webhook workers
     """
     try:
-        # Get webhook payload
+        # Get raw webhook payload; the signature covers these exact bytes
         payload = await request.body()
-        payload_str = payload.decode("utf-8")
 
         # Verify webhook signature
-        stripe_gateway = StripeGateway()
-        if not stripe_gateway.verify_webhook_signature(payload_str, stripe_signature):
+        stripe_gateway = request.app.state.stripe_gateway
+        if not stripe_gateway.verify_webhook_signature(payload, stripe_signature):
             logger.error("Invalid Stripe webhook signature")
             raise HTTPException(status_code=400, detail="Invalid signature")
 
         # Parse webhook event
-        import json
+        event = orjson.loads(payload)
 
-        event = json.loads(payload_str)
+        _enqueue_event(request, "stripe", event)
 
-        # Handle different event types
-        await _handle_stripe_event(event, payment_service)
+        return {"status": "accepted"}
 
-        return {"status": "success"}
-
-    except json.JSONDecodeError:
+    except HTTPException:
+        raise
+    except orjson.JSONDecodeError:
         logger.error("Invalid JSON in webhook payload")
         raise HTTPException(status_code=400, detail="Invalid JSON")
     except Exception as e:
@@ -82,69 +75,38 @@ async def handle_stripe_webhook(
         raise HTTPException(status_code=500, detail="Webhook processing failed")
 
 
-@router.post("/momo")
-async def handle_momo_webhook(
-    request: Request, payment_service: PaymentService = Depends(get_payment_service)
-):
-    """
-    Handle MoMo webhooks.
-
-    Args:
-        request: HTTP request containing webhook payload
-        payment_service: Payment service instance
-
-    Returns:
-        Success response
-    """
-    try:
-        # Get webhook payload
-        payload = await request.body()
-        payload_str = payload.decode("utf-8")
-
-        # Parse webhook data (MoMo specific format)
-        import json
-
-        webhook_data = json.loads(payload_str)
-
-        # Handle MoMo webhook
-        await _handle_momo_event(webhook_data, payment_service)
-
-        return {"status": "success"}
-
-    except Exception as e:
-        logger.error(f"Error handling MoMo webhook: {e}")
-        raise HTTPException(status_code=500, detail="Webhook processing failed")
-
-
-@router.post("/vnpay")
-async def handle_vnpay_webhook(
-    request: Request, payment_service: PaymentService = Depends(get_payment_service)
-):
+@router.post("/vnpay", status_code=status.HTTP_202_ACCEPTED)
+async def handle_vnpay_webhook(request: Request):
     """
     Handle VNPay webhooks.
 
     Args:
         request: HTTP request containing webhook payload
-        payment_service: Payment service instance
 
     Returns:
-        Success response
+        Accepted response; the event is processed by the webhook workers
     """
     try:
         # Get webhook payload
         payload = await request.body()
-        payload_str = payload.decode("utf-8")
 
         # Parse webhook data (VNPay specific format)
-        import json
+        webhook_data = orjson.loads(payload)
 
-        webhook_data = json.loads(payload_str)
+        # Verify webhook signature
+        vnpay_gateway = request.app.state.vnpay_gateway
+        if not vnpay_gateway.verify_webhook_signature(
+            payload, webhook_data.get("vnp_SecureHash", "")
+        ):
+            logger.error("Invalid VNPay webhook signature")
+            raise HTTPException(status_code=400, detail="Invalid signature")
 
-        # Handle VNPay webhook
-        await _handle_vnpay_event(webhook_data, payment_service)
+        _enqueue_event(request, "vnpay", webhook_data)
 
-        return {"status": "success"}
+        return {"status": "accepted"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error handling VNPay webhook: {e}")
         raise HTTPException(status_code=500, detail="Webhook processing failed")
@@ -193,33 +155,6 @@ async def _handle_stripe_event(event: Dict[str, Any], payment_service: PaymentSe
         raise
 
 
-async def _handle_momo_event(
-    webhook_data: Dict[str, Any], payment_service: PaymentService
-):
-    """
-    Handle MoMo webhook events.
-
-    Args:
-        webhook_data: MoMo webhook data
-        payment_service: Payment service instance
-    """
-    # MoMo specific webhook handling logic
-    result_code = webhook_data.get("resultCode")
-    order_id = webhook_data.get("orderId")
-
-    logger.info(f"Processing MoMo webhook for order {order_id}, result: {result_code}")
-
-    try:
-        if result_code == 0:  # Success
-            await _update_payment_status(payment_service, order_id, "completed")
-        else:  # Failed
-            await _update_payment_status(payment_service, order_id, "failed")
-
-    except Exception as e:
-        logger.error(f"Error processing MoMo webhook: {e}")
-        raise
-
-
 async def _handle_vnpay_event(
     webhook_data: Dict[str, Any], payment_service: PaymentService
 ):
@@ -249,6 +184,27 @@ async def _handle_vnpay_event(
         raise
 
 
+_EVENT_HANDLERS = {
+    "stripe": _handle_stripe_event,
+    "vnpay": _handle_vnpay_event,
+}
+
+
+def make_webhook_handler(state: Any) -> WebhookHandler:
+    """
+    Build the handler the webhook workers run for each queued event.
+
+    Each event gets its own database session, since it is processed after
+    the request that delivered it has finished.
+    """
+
+    async def process_event(source: str, event: Dict[str, Any]) -> None:
+        async with AsyncSessionLocal() as db:
+            await _EVENT_HANDLERS[source](event, build_payment_service(state, db))
+
+    return process_event
+
+
 async def _update_payment_status(
     payment_service: PaymentService, payment_intent_id: str, new_status: str
 ):
@@ -92,12 +92,12 @@ class PaymentGateway(ABC):
         pass
 
     @abstractmethod
-    def verify_webhook_signature(self, payload: str, signature: str) -> bool:
+    def verify_webhook_signature(self, payload: bytes, signature: str) -> bool:
         """
         Verify webhook signature.
 
         Args:
-            payload: Webhook payload
+            payload: Raw webhook request body
             signature: Webhook signature
 
         Returns:
@@ -4,8 +4,8 @@ MoMo Payment Gateway - Handles MoMo payment processing.
 
 import logging
 from typing import Dict, Any, Optional
-import os
 
+from core.config import get_gateway_settings
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -15,12 +15,11 @@ class MoMoGateway:
     """MoMo payment gateway implementation."""
 
     def __init__(self):
-        self.partner_code = os.getenv("MOMO_PARTNER_CODE", "")
-        self.access_key = os.getenv("MOMO_ACCESS_KEY", "")
-        self.secret_key = os.getenv("MOMO_SECRET_KEY", "")
-        self.endpoint = os.getenv(
-            "MOMO_ENDPOINT", "https://test-payment.momo.vn/v2/gateway/api/create"
-        )
+        settings = get_gateway_settings()
+        self.partner_code = settings.MOMO_PARTNER_CODE
+        self.access_key = settings.MOMO_ACCESS_KEY
+        self.secret_key = settings.MOMO_SECRET_KEY
+        self.endpoint = settings.MOMO_ENDPOINT
 
     async def create_payment_intent(
         self, amount: float, currency: str = "VND", metadata: Dict[str, Any] = None
@@ -101,14 +100,13 @@ class MoMoGateway:
             logger.error(f"Failed to refund MoMo payment: {e}")
             raise
 
-    def verify_webhook_signature(self, payload: str, signature: str) -> bool:
+    def verify_webhook_signature(self, payload: bytes, signature: str) -> bool:
         """Verify MoMo webhook signature."""
-        try:
-            # In production, verify MoMo webhook signature
-            # This would use MoMo's signature verification method
-
-            return True
-
-        except Exception as e:
-            logger.error(f"Failed to verify MoMo webhook signature: {e}")
-            return False
+        # MoMo signature verification is not implemented yet, so no
+        # delivery can be trusted
+        logger.error("MoMo webhook signature verification is not implemented")
+        return False
+
+    async def cleanup(self):
+        """Release gateway resources (no pooled connections yet)."""
+        pass
@@ -2,16 +2,81 @@
 Stripe Payment Gateway - Handles Stripe payment processing.
 """
 
+import asyncio
+import functools
+import hashlib
+import hmac
 import logging
-from typing import Dict, Any, Optional
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlencode
 import httpx
+import orjson
+
+try:
+    import stripe
+except ImportError:
+    stripe = None
 
 from .base import PaymentGateway
+from core.config import get_gateway_settings
+from shared_code.cache import get_cache_service
 from utils.logger import get_logger
+from utils.validators import to_minor_units
 
 logger = get_logger(__name__)
 
+# Maximum age of a webhook event before its signature is rejected (seconds)
+WEBHOOK_TOLERANCE_SECONDS = 300
+
+# Connection-level retries; safe because every POST carries an Idempotency-Key
+HTTP_RETRIES = 3
+
+# Payment intent statuses that never change again
+TERMINAL_STATUSES = frozenset({"succeeded", "canceled"})
+
+# Status cache TTLs: short while a payment is in flight, long once final
+PENDING_STATUS_TTL = 3
+TERMINAL_STATUS_TTL = 86400
+
+# Dedicated pool for the blocking stripe SDK so refund sweeps cannot starve
+# the default executor used by the rest of the service
+_stripe_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stripe")
+
+
+# Shared HTTP client so concurrent Stripe calls reuse pooled HTTP/2 connections
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide Stripe HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        settings = get_gateway_settings()
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=HTTP_RETRIES,
+            limits=httpx.Limits(
+                max_keepalive_connections=settings.GATEWAY_HTTP_MAX_KEEPALIVE,
+                max_connections=settings.GATEWAY_HTTP_MAX_CONNECTIONS,
+            ),
+        )
+        _http_client = httpx.AsyncClient(
+            transport=transport,
+            # Fail fast on a saturated pool instead of queueing requests
+            timeout=httpx.Timeout(connect=2.0, read=15.0, write=5.0, pool=1.0),
+        )
+    return _http_client
+
+
+async def _run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking stripe SDK call without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _stripe_executor, functools.partial(func, *args, **kwargs)
+    )
+
 
 class StripeException(Exception):
     """Exception for Stripe-specific errors"""
@@ -26,10 +91,20 @@ class StripeGateway(PaymentGateway):
     """
 
     def __init__(self):
-        self.api_key = os.getenv("STRIPE_SECRET_KEY", "")
-        self.publishable_key = os.getenv("STRIPE_PUBLISHABLE_KEY", "")
-        self.webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET", "")
+        settings = get_gateway_settings()
+        self.api_key = settings.STRIPE_SECRET_KEY
+        self.publishable_key = settings.STRIPE_PUBLISHABLE_KEY
+        self.webhook_secret = settings.STRIPE_WEBHOOK_SECRET
+        self._webhook_key = self.webhook_secret.encode("utf-8")
         self.base_url = "https://api.stripe.com/v1"
+        self.cache = get_cache_service("payment")
+
+        # Immutable request pieces, built once instead of on every call
+        self._auth_headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+        self._intents_url = f"{self.base_url}/payment_intents"
 
         if not self.api_key:
             logger.warning("Stripe API key not configured, using mock mode")
@@ -37,12 +112,23 @@ class StripeGateway(PaymentGateway):
         else:
             self.mock_mode = False
 
+        # SDK-backed calls fall back to mock responses without the stripe library
+        self.sdk_mock_mode = self.mock_mode or stripe is None
+        if stripe is None:
+            if not self.mock_mode:
+                logger.error("Stripe library not installed, using mock responses")
+        else:
+            self._pi_confirm = stripe.PaymentIntent.confirm
+            self._pi_retrieve = stripe.PaymentIntent.retrieve
+            self._refund_create = stripe.Refund.create
+
     async def create_payment_intent(
         self,
         amount: float,
         currency: str = "usd",
         order_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Create a Stripe payment intent.
@@ -52,6 +138,7 @@ class StripeGateway(PaymentGateway):
             currency: Three-letter ISO currency code
             order_id: Optional order identifier
             metadata: Optional metadata to attach to the payment
+            idempotency_key: Optional key; derived from order_id if omitted
 
         Returns:
             Dict containing payment intent details
@@ -62,50 +149,53 @@ class StripeGateway(PaymentGateway):
                 "id": f"pi_mock_{order_id or 'test'}",
                 "client_secret": "pi_mock_client_secret",
                 "status": "requires_payment_method",
-                "amount": int(amount * 100),  # Convert to cents
+                "amount": to_minor_units(amount),  # Convert to cents
                 "currency": currency,
                 "metadata": metadata or {},
             }
 
         try:
             # Convert amount to cents (Stripe expects smallest currency unit)
-            amount_cents = int(amount * 100)
+            amount_cents = to_minor_units(amount)
 
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/x-www-form-urlencoded",
-            }
+            # Let Stripe deduplicate retried requests for the same order
+            headers = self._auth_headers
+            idempotency_key = idempotency_key or (order_id and f"pi:{order_id}")
+            if idempotency_key:
+                headers = {**headers, "Idempotency-Key": idempotency_key}
 
-            data = {
-                "amount": amount_cents,
-                "currency": currency,
-                "automatic_payment_methods[enabled]": "true",
-            }
+            fields = [
+                ("amount", amount_cents),
+                ("currency", currency),
+                ("automatic_payment_methods[enabled]", "true"),
+            ]
 
             if order_id:
-                data["metadata[order_id]"] = order_id
+                fields.append(("metadata[order_id]", order_id))
 
             if metadata:
-                for key, value in metadata.items():
-                    data[f"metadata[{key}]"] = str(value)
-
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/payment_intents",
-                    headers=headers,
-                    data=data,
-                    timeout=30.0,
+                fields.extend(
+                    (f"metadata[{key}]", str(value)) for key, value in metadata.items()
                 )
 
-                if response.status_code != 200:
-                    error_data = response.json()
-                    raise StripeException(
-                        f"Stripe API error: {error_data.get('error', {}).get('message', 'Unknown error')}"
-                    )
+            # Encode the form body once and send it as raw bytes
+            body = urlencode(fields).encode("ascii")
 
-                result = response.json()
-                logger.info(f"Payment intent created successfully: {result['id']}")
-                return result
+            response = await _get_http_client().post(
+                self._intents_url,
+                headers=headers,
+                content=body,
+            )
+
+            if response.status_code != 200:
+                error_data = orjson.loads(response.content)
+                raise StripeException(
+                    f"Stripe API error: {error_data.get('error', {}).get('message', 'Unknown error')}"
+                )
+
+            result = orjson.loads(response.content)
+            logger.info(f"Payment intent created successfully: {result['id']}")
+            return result
 
         except httpx.TimeoutException:
             logger.error("Stripe API timeout")
@@ -115,7 +205,10 @@ class StripeGateway(PaymentGateway):
             raise StripeException(f"Failed to create payment intent: {str(e)}")
 
     async def confirm_payment(
-        self, payment_intent_id: str, confirmation_data: Optional[Dict[str, Any]] = None
+        self,
+        payment_intent_id: str,
+        confirmation_data: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Confirm a Stripe payment.
@@ -123,6 +216,8 @@ class StripeGateway(PaymentGateway):
         Args:
             payment_intent_id: Payment intent ID
             confirmation_data: Additional confirmation data
+            idempotency_key: Optional key; derived from the intent and the
+                confirmation data if omitted
 
         Returns:
             Dict containing payment confirmation details
@@ -131,7 +226,7 @@ class StripeGateway(PaymentGateway):
             StripeException: If Stripe API call fails
         """
         try:
-            if self.mock_mode:
+            if self.sdk_mock_mode:
                 # Mock response
                 return {
                     "id": payment_intent_id,
@@ -141,27 +236,34 @@ class StripeGateway(PaymentGateway):
                 }
 
             # Real Stripe API implementation
-            try:
-                import stripe
-
-                stripe.api_key = self.api_key
-
-                confirm_data = {}
-                if confirmation_data:
-                    confirm_data.update(confirmation_data)
-
-                intent = stripe.PaymentIntent.confirm(payment_intent_id, **confirm_data)
+            confirm_data = {}
+            if confirmation_data:
+                confirm_data.update(confirmation_data)
+
+            # Retrying with other params (e.g. a new payment method) must not
+            # replay the response Stripe stored for the first attempt
+            if not idempotency_key:
+                digest = hashlib.sha256(
+                    orjson.dumps(
+                        confirm_data, default=str, option=orjson.OPT_SORT_KEYS
+                    )
+                ).hexdigest()[:16]
+                idempotency_key = f"confirm:{payment_intent_id}:{digest}"
 
-                return {
-                    "id": intent.id,
-                    "status": intent.status,
-                    "amount": intent.amount / 100,  # Convert from cents
-                    "currency": intent.currency,
-                }
+            intent = await _run_blocking(
+                self._pi_confirm,
+                payment_intent_id,
+                api_key=self.api_key,
+                idempotency_key=idempotency_key,
+                **confirm_data,
+            )
 
-            except ImportError:
-                logger.error("Stripe library not installed, using mock response")
-                return await self.confirm_payment(payment_intent_id, confirmation_data)
+            return {
+                "id": intent.id,
+                "status": intent.status,
+                "amount": intent.amount / 100,  # Convert from cents
+                "currency": intent.currency,
+            }
 
         except Exception as e:
             logger.error(f"Failed to confirm Stripe payment: {e}")
@@ -181,7 +283,7 @@ class StripeGateway(PaymentGateway):
             StripeException: If Stripe API call fails
         """
         try:
-            if self.mock_mode:
+            if self.sdk_mock_mode:
                 # Mock response
                 return {
                     "id": payment_intent_id,
@@ -191,25 +293,34 @@ class StripeGateway(PaymentGateway):
                     "created": 1234567890,
                 }
 
-            # Real Stripe API implementation
-            try:
-                import stripe
-
-                stripe.api_key = self.api_key
+            # Serve polling clients from cache to avoid one Stripe call per poll
+            cached = await self.cache.get_payment_status(payment_intent_id)
+            if cached:
+                return cached
 
-                intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            # Real Stripe API implementation
+            intent = await _run_blocking(
+                self._pi_retrieve,
+                payment_intent_id,
+                api_key=self.api_key,
+            )
+
+            result = {
+                "id": intent.id,
+                "status": intent.status,
+                "amount": intent.amount / 100,  # Convert from cents
+                "currency": intent.currency,
+                "created": intent.created,
+            }
 
-                return {
-                    "id": intent.id,
-                    "status": intent.status,
-                    "amount": intent.amount / 100,  # Convert from cents
-                    "currency": intent.currency,
-                    "created": intent.created,
-                }
+            ttl = (
+                TERMINAL_STATUS_TTL
+                if result["status"] in TERMINAL_STATUSES
+                else PENDING_STATUS_TTL
+            )
+            await self.cache.set_payment_status(payment_intent_id, result, ttl)
 
-            except ImportError:
-                logger.error("Stripe library not installed, using mock response")
-                return await self.get_payment_status(payment_intent_id)
+            return result
 
         except Exception as e:
             logger.error(f"Failed to get Stripe payment status: {e}")
@@ -232,7 +343,7 @@ class StripeGateway(PaymentGateway):
             StripeException: If Stripe API call fails
         """
         try:
-            if self.mock_mode:
+            if self.sdk_mock_mode:
                 # Mock response
                 refund_id = f"re_stripe_{payment_intent_id}"
                 return {
@@ -243,64 +354,92 @@ class StripeGateway(PaymentGateway):
                 }
 
             # Real Stripe API implementation
-            try:
-                import stripe
-
-                stripe.api_key = self.api_key
-
-                refund_data = {"payment_intent": payment_intent_id}
-                if amount is not None:
-                    refund_data["amount"] = int(amount * 100)  # Convert to cents
+            refund_data = {"payment_intent": payment_intent_id}
+            if amount is not None:
+                refund_data["amount"] = to_minor_units(amount)  # Convert to cents
 
-                refund = stripe.Refund.create(**refund_data)
+            refund = await _run_blocking(
+                self._refund_create,
+                api_key=self.api_key,
+                idempotency_key=f"refund:{payment_intent_id}:{amount}",
+                **refund_data,
+            )
 
-                return {
-                    "id": refund.id,
-                    "payment_intent": payment_intent_id,
-                    "amount": refund.amount / 100,  # Convert from cents
-                    "status": refund.status,
-                }
-
-            except ImportError:
-                logger.error("Stripe library not installed, using mock response")
-                return await self.refund_payment(payment_intent_id, amount)
+            return {
+                "id": refund.id,
+                "payment_intent": payment_intent_id,
+                "amount": refund.amount / 100,  # Convert from cents
+                "status": refund.status,
+            }
 
         except Exception as e:
             logger.error(f"Failed to refund Stripe payment: {e}")
             raise StripeException(f"Failed to refund payment: {str(e)}")
 
-    def verify_webhook_signature(self, payload: str, signature: str) -> bool:
+    def verify_webhook_signature(self, payload: bytes, signature: str) -> bool:
         """
         Verify Stripe webhook signature.
 
+        The ``Stripe-Signature`` header has the form ``t=<timestamp>,v1=<sig>``;
+        the expected signature is an HMAC-SHA256 of ``<timestamp>.<payload>``
+        keyed with the webhook secret.
+
         Args:
-            payload: Webhook payload
-            signature: Webhook signature
+            payload: Raw webhook request body, exactly as received
+            signature: Value of the ``Stripe-Signature`` header
 
         Returns:
             True if signature is valid, False otherwise
         """
         try:
-            if self.mock_mode:
-                # Mock verification - always return True in development
-                return True
+            if not self.webhook_secret:
+                # An empty key would let anyone compute a valid signature
+                logger.error("STRIPE_WEBHOOK_SECRET is not set; rejecting webhook")
+                return False
 
-            # Real Stripe webhook verification
-            try:
-                import stripe
+            timestamp = None
+            candidates = []
+            for item in signature.split(","):
+                key, _, value = item.strip().partition("=")
+                if key == "t":
+                    timestamp = value
+                elif key == "v1":
+                    candidates.append(value)
+
+            if not timestamp or not candidates:
+                logger.error("Malformed Stripe-Signature header")
+                return False
 
-                stripe.Webhook.construct_event(payload, signature, self.webhook_secret)
-                return True
+            if abs(time.time() - int(timestamp)) > WEBHOOK_TOLERANCE_SECONDS:
+                logger.error("Stripe webhook timestamp outside tolerance")
+                return False
 
-            except ImportError:
-                logger.error(
-                    "Stripe library not installed, webhook verification skipped"
-                )
-                return True
-            except stripe.error.SignatureVerificationError:
+            # Feed the raw body separately rather than concatenating it with
+            # the timestamp, which would copy the whole payload. Naming the
+            # digest keeps the whole HMAC inside OpenSSL.
+            mac = hmac.new(
+                self._webhook_key, timestamp.encode("utf-8") + b".", "sha256"
+            )
+            mac.update(payload)
+            expected = mac.hexdigest()
+
+            # Check every candidate so timing does not reveal which one matched
+            valid = False
+            for candidate in candidates:
+                if hmac.compare_digest(expected, candidate):
+                    valid = True
+
+            if not valid:
                 logger.error("Invalid webhook signature")
-                return False
+            return valid
 
         except Exception as e:
             logger.error(f"Failed to verify Stripe webhook signature: {e}")
             return False
+
+    async def cleanup(self):
+        """Close the shared Stripe HTTP client."""
+        global _http_client
+        if _http_client is not None:
+            await _http_client.aclose()
+            _http_client = None
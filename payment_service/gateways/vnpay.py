@@ -2,26 +2,53 @@
 VNPay Payment Gateway - Handles VNPay payment processing.
 """
 
+import heapq
+import hmac
 import logging
+from datetime import datetime
 from typing import Dict, Any, Optional
-import os
+from urllib.parse import urlencode
 
+import orjson
+
+from core.config import get_gateway_settings
 from utils.logger import get_logger
+from utils.validators import to_minor_units
 
 logger = get_logger(__name__)
 
+# Parameters excluded from the VNPay signed data
+SIGNATURE_FIELDS = ("vnp_SecureHash", "vnp_SecureHashType")
+
+VNPAY_VERSION = "2.1.0"
+
 
 class VNPayGateway:
     """VNPay payment gateway implementation."""
 
     def __init__(self):
-        self.tmn_code = os.getenv("VNPAY_TMN_CODE", "")
-        self.hash_secret = os.getenv("VNPAY_HASH_SECRET", "")
-        self.payment_url = os.getenv(
-            "VNPAY_PAYMENT_URL", "https://sandbox.vnpayment.vn/paymentv2/vpcpay.html"
-        )
-        self.return_url = os.getenv(
-            "VNPAY_RETURN_URL", "https://foodfast.com/payment/return"
+        settings = get_gateway_settings()
+        self.tmn_code = settings.VNPAY_TMN_CODE
+        self.hash_secret = settings.VNPAY_HASH_SECRET
+        self.payment_url = settings.VNPAY_PAYMENT_URL
+        self.return_url = settings.VNPAY_RETURN_URL
+        self._pay_url_prefix = f"{self.payment_url}?vnp_TxnRef="
+        self._hash_key = self.hash_secret.encode("utf-8")
+
+        # Parameters identical for every payment, sorted and URL-encoded once.
+        # Each entry is (key, "key=value") so it can be merged by key later.
+        static_params = {
+            "vnp_Version": VNPAY_VERSION,
+            "vnp_Command": "pay",
+            "vnp_TmnCode": self.tmn_code,
+            "vnp_CurrCode": "VND",
+            "vnp_Locale": "vn",
+            "vnp_ReturnUrl": self.return_url,
+        }
+        self._static_pairs = tuple(
+            sorted(
+                (key, urlencode({key: value})) for key, value in static_params.items()
+            )
         )
 
     async def create_payment_intent(
@@ -39,7 +66,7 @@ class VNPayGateway:
                 "amount": amount,
                 "currency": currency,
                 "status": "pending",
-                "payment_url": f"{self.payment_url}?vnp_TxnRef={payment_intent_id}",
+                "payment_url": self._pay_url_prefix + payment_intent_id,
                 "qr_code": f"vnpay://payment?code={payment_intent_id}",
             }
 
@@ -103,23 +130,80 @@ class VNPayGateway:
             logger.error(f"Failed to refund VNPay payment: {e}")
             raise
 
-    def verify_webhook_signature(self, payload: str, signature: str) -> bool:
-        """Verify VNPay webhook signature."""
+    def verify_webhook_signature(self, payload: bytes, signature: str) -> bool:
+        """
+        Verify VNPay webhook signature.
+
+        VNPay signs the ``vnp_*`` parameters sorted by name and URL-encoded,
+        using HMAC-SHA512 keyed with the merchant hash secret.
+
+        Args:
+            payload: Raw webhook request body (JSON object of ``vnp_*`` params)
+            signature: Value of ``vnp_SecureHash`` sent by VNPay
+
+        Returns:
+            True if signature is valid, False otherwise
+        """
         try:
-            # In production, verify VNPay webhook signature
-            # This would use VNPay's signature verification method
+            if not self.hash_secret:
+                # Without the merchant secret no signature can be trusted
+                logger.error("VNPAY_HASH_SECRET is not set; rejecting webhook")
+                return False
+
+            params = orjson.loads(payload)
+            expected = hmac.digest(
+                self._hash_key, self._canonical_query(params).encode("utf-8"), "sha512"
+            ).hex()
 
-            return True
+            return hmac.compare_digest(expected, signature.lower())
 
         except Exception as e:
             logger.error(f"Failed to verify VNPay webhook signature: {e}")
             return False
 
-    def create_payment_url(self, payment_intent_id: str, amount: float) -> str:
-        """Create VNPay payment URL."""
+    @staticmethod
+    def _canonical_query(params: Dict[str, Any]) -> str:
+        """Build the sorted, URL-encoded query string VNPay signs."""
+        return urlencode(
+            sorted(
+                (key, str(value))
+                for key, value in params.items()
+                if key.startswith("vnp_") and key not in SIGNATURE_FIELDS
+            )
+        )
+
+    async def cleanup(self):
+        """Release gateway resources (no pooled connections yet)."""
+        pass
+
+    def create_payment_url(
+        self, payment_intent_id: str, amount: float, ip_address: str = "127.0.0.1"
+    ) -> str:
+        """Create a signed VNPay payment URL."""
         try:
-            # In production, create proper VNPay payment URL with all required parameters
-            return f"{self.payment_url}?vnp_TxnRef={payment_intent_id}&vnp_Amount={int(amount * 100)}"
+            dynamic_params = {
+                "vnp_Amount": to_minor_units(amount),
+                "vnp_CreateDate": datetime.now().strftime("%Y%m%d%H%M%S"),
+                "vnp_IpAddr": ip_address,
+                "vnp_OrderInfo": f"Payment {payment_intent_id}",
+                "vnp_OrderType": "other",
+                "vnp_TxnRef": payment_intent_id,
+            }
+            dynamic_pairs = sorted(
+                (key, urlencode({key: value})) for key, value in dynamic_params.items()
+            )
+
+            # Both sides are already sorted, so a linear merge yields the
+            # canonical key order VNPay signs without re-sorting everything
+            query = "&".join(
+                pair for _, pair in heapq.merge(self._static_pairs, dynamic_pairs)
+            )
+            # One-shot HMAC computed entirely inside OpenSSL
+            secure_hash = hmac.digest(
+                self._hash_key, query.encode("utf-8"), "sha512"
+            ).hex()
+
+            return f"{self.payment_url}?{query}&vnp_SecureHash={secure_hash}"
 
         except Exception as e:
             logger.error(f"Failed to create VNPay payment URL: {e}")
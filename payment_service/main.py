@@ -12,40 +12,48 @@ parent_dir = os.path.abspath(os.path.join(current_dir, ".."))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+from shared_code.cache import get_cache_service
 from shared_code.core.app import create_app
 from shared_code.core.config import get_service_settings
 from shared_code.utils.logging import get_logger
 
 from api.routers.payment_controller import router as payment_router
+from api.routers.webhook_controller import make_webhook_handler
+from api.routers.webhook_controller import router as webhook_router
+from core.database import close_db
 from gateways.stripe import StripeGateway
 from gateways.momo import MoMoGateway
 from gateways.vnpay import VNPayGateway
 from promotions.promotion_service import PromotionService
+from services.webhook_dispatcher import WebhookDispatcher
 
 logger = get_logger(__name__)
 settings = get_service_settings("payment_service")
 
-# Initialize services
-stripe_gateway = None
-momo_gateway = None
-vnpay_gateway = None
-promotion_service = None
-
-
 async def startup_task():
     """Payment service startup tasks"""
-    global stripe_gateway, momo_gateway, vnpay_gateway, promotion_service
-    
     logger.info("Payment Service starting up...")
     
     try:
-        # Initialize payment gateways
-        stripe_gateway = StripeGateway()
-        momo_gateway = MoMoGateway()
-        vnpay_gateway = VNPayGateway()
+        # Initialize payment gateways once per worker; routes use app.state
+        app.state.stripe_gateway = StripeGateway()
+        app.state.momo_gateway = MoMoGateway()
+        app.state.vnpay_gateway = VNPayGateway()
         
         # Initialize promotion service
-        promotion_service = PromotionService()
+        app.state.promotion_service = PromotionService(
+            cache_service=get_cache_service("payment")
+        )
+        app.state.promotion_service.start_usage_flusher()
+
+        # Webhook events are acknowledged first and processed by workers
+        app.state.webhook_dispatcher = WebhookDispatcher(
+            make_webhook_handler(app.state)
+        )
+        app.state.webhook_dispatcher.start()
+
+        # Connect payment cache (idempotency keys)
+        await get_cache_service("payment").connect()
         
         logger.info("Payment Service startup completed")
         
@@ -59,13 +67,25 @@ async def shutdown_task():
     logger.info("Payment Service shutting down...")
     
     try:
+        # Finish queued webhook events while gateways and the database are up
+        webhook_dispatcher = getattr(app.state, "webhook_dispatcher", None)
+        if webhook_dispatcher:
+            await webhook_dispatcher.stop()
+
+        # Persist promotion usage before the cache goes away
+        promotion_service = getattr(app.state, "promotion_service", None)
+        if promotion_service:
+            await promotion_service.stop_usage_flusher()
+
+        await get_cache_service("payment").disconnect()
+
         # Cleanup payment gateways
-        if stripe_gateway:
-            await stripe_gateway.cleanup()
-        if momo_gateway:
-            await momo_gateway.cleanup()
-        if vnpay_gateway:
-            await vnpay_gateway.cleanup()
+        for name in ("stripe_gateway", "momo_gateway", "vnpay_gateway"):
+            gateway = getattr(app.state, name, None)
+            if gateway:
+                await gateway.cleanup()
+
+        await close_db()
             
         logger.info("Payment Service shutdown completed")
         
@@ -77,7 +97,7 @@ async def shutdown_task():
 app = create_app(
     service_name="Payment Service",
     settings=settings,
-    routers=[payment_router],
+    routers=[payment_router, webhook_router],
     startup_tasks=[startup_task],
     shutdown_tasks=[shutdown_task],
 )
@@ -89,5 +109,8 @@ if __name__ == "__main__":
         host=getattr(settings, 'SERVICE_HOST', '0.0.0.0'),
         port=getattr(settings, 'SERVICE_PORT', 8005),
         reload=getattr(settings, 'DEBUG', False),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WORKERS", "1")),
         log_level=getattr(settings, 'LOG_LEVEL', 'info').lower(),
     )
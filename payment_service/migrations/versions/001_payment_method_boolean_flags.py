@@ -0,0 +1,55 @@
+"""Store payment method flags as booleans
+
+Revision ID: 001
+Revises:
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Convert Y/N flags to native booleans
+    for column, default in (("is_default", "false"), ("is_active", "true")):
+        op.alter_column("payment_methods", column, server_default=None)
+        op.alter_column(
+            "payment_methods",
+            column,
+            type_=sa.Boolean(),
+            postgresql_using=f"{column} = 'Y'",
+            nullable=False,
+            server_default=sa.text(default),
+        )
+
+    # Partial index for looking up a user's active default method
+    op.create_index(
+        "ix_payment_methods_user_default",
+        "payment_methods",
+        ["user_id"],
+        postgresql_where=sa.text("is_default AND is_active"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payment_methods_user_default", "payment_methods")
+
+    # Convert booleans back to Y/N flags
+    for column, default in (("is_default", "N"), ("is_active", "Y")):
+        op.alter_column("payment_methods", column, server_default=None)
+        op.alter_column(
+            "payment_methods",
+            column,
+            type_=sa.String(1),
+            postgresql_using=f"CASE WHEN {column} THEN 'Y' ELSE 'N' END",
+            nullable=True,
+            server_default=sa.text(f"'{default}'"),
+        )
@@ -0,0 +1,49 @@
+"""Server-side timestamp defaults and payment list indexes
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "002"
+down_revision = "001"
+branch_labels = None
+depends_on = None
+
+TIMESTAMP_COLUMNS = (
+    ("payments", "created_at"),
+    ("payments", "updated_at"),
+    ("payment_transactions", "created_at"),
+    ("payment_methods", "created_at"),
+    ("payment_methods", "updated_at"),
+    ("refunds", "created_at"),
+    ("refunds", "updated_at"),
+)
+
+
+def upgrade() -> None:
+    # Let the database stamp rows instead of sending the time from the app
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=sa.func.now())
+
+    # Composite indexes for the history and status list queries
+    op.create_index("ix_payments_user_created", "payments", ["user_id", "created_at"])
+    op.create_index("ix_payments_order_status", "payments", ["order_id", "status"])
+    op.create_index(
+        "ix_payments_status_created", "payments", ["status", "created_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payments_status_created", "payments")
+    op.drop_index("ix_payments_order_status", "payments")
+    op.drop_index("ix_payments_user_created", "payments")
+
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=None)
@@ -0,0 +1,49 @@
+"""Covering indexes for payment history
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "003"
+down_revision = "002"
+branch_labels = None
+depends_on = None
+
+# Columns read by the history page beyond the index keys
+HISTORY_INCLUDE = [
+    "gateway_payment_id",
+    "status",
+    "final_amount",
+    "currency",
+    "updated_at",
+]
+
+
+def upgrade() -> None:
+    # Newest-first history per user/order as an index-only scan
+    op.drop_index("ix_payments_user_created", "payments")
+    op.create_index(
+        "ix_payments_user_created",
+        "payments",
+        ["user_id", sa.text("created_at DESC")],
+        postgresql_include=HISTORY_INCLUDE,
+    )
+    op.create_index(
+        "ix_payments_order_created",
+        "payments",
+        ["order_id", sa.text("created_at DESC")],
+        postgresql_include=HISTORY_INCLUDE,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payments_order_created", "payments")
+    op.drop_index("ix_payments_user_created", "payments")
+    op.create_index("ix_payments_user_created", "payments", ["user_id", "created_at"])
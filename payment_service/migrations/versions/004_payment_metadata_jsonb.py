@@ -0,0 +1,45 @@
+"""Store payment metadata as JSONB
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "004"
+down_revision = "003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # JSONB is stored parsed, so reads skip re-parsing the text on the server
+    op.alter_column(
+        "payments",
+        "metadata",
+        type_=postgresql.JSONB(),
+        postgresql_using="metadata::jsonb",
+    )
+    op.execute("UPDATE payments SET metadata = '{}'::jsonb WHERE metadata IS NULL")
+    op.alter_column(
+        "payments",
+        "metadata",
+        server_default=sa.text("'{}'::jsonb"),
+        nullable=False,
+    )
+
+
+def downgrade() -> None:
+    op.alter_column("payments", "metadata", server_default=None, nullable=True)
+    op.alter_column(
+        "payments",
+        "metadata",
+        type_=sa.JSON(),
+        postgresql_using="metadata::json",
+    )
@@ -2,21 +2,38 @@
 Payment Models - Database models for payment service
 """
 
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
 from sqlalchemy import (
-    Column,
-    Integer,
-    String,
-    Decimal,
-    DateTime,
-    Text,
     JSON,
+    DateTime,
     ForeignKey,
+    Index,
+    Numeric,
+    String,
+    Text,
+    desc,
+    func,
+    text,
 )
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+
+class Base(DeclarativeBase):
+    pass
+
 
-Base = declarative_base()
+# Columns read by get_payment_history beyond the index keys
+_HISTORY_INCLUDE = [
+    "gateway_payment_id",
+    "status",
+    "final_amount",
+    "currency",
+    "updated_at",
+]
 
 
 class Payment(Base):
@@ -25,42 +42,76 @@ class Payment(Base):
     """
 
     __tablename__ = "payments"
-
-    id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(String(100), index=True, nullable=True)
-    user_id = Column(Integer, index=True, nullable=True)
+    __table_args__ = (
+        # Match the history and status list queries; the INCLUDE columns
+        # let the history page come straight from the index on PostgreSQL
+        Index(
+            "ix_payments_user_created",
+            "user_id",
+            desc("created_at"),
+            postgresql_include=_HISTORY_INCLUDE,
+        ),
+        Index(
+            "ix_payments_order_created",
+            "order_id",
+            desc("created_at"),
+            postgresql_include=_HISTORY_INCLUDE,
+        ),
+        Index("ix_payments_order_status", "order_id", "status"),
+        Index("ix_payments_status_created", "status", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    order_id: Mapped[Optional[str]] = mapped_column(String(100), index=True)
+    user_id: Mapped[Optional[int]] = mapped_column(index=True)
 
     # Amount fields
-    original_amount = Column(Decimal(10, 2), nullable=False)
-    discount_amount = Column(Decimal(10, 2), default=0)
-    final_amount = Column(Decimal(10, 2), nullable=False)
-    refunded_amount = Column(Decimal(10, 2), default=0)
-    currency = Column(String(3), nullable=False, default="USD")
+    original_amount: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    discount_amount: Mapped[Optional[Decimal]] = mapped_column(
+        Numeric(10, 2), default=0
+    )
+    final_amount: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    refunded_amount: Mapped[Optional[Decimal]] = mapped_column(
+        Numeric(10, 2), default=0
+    )
+    currency: Mapped[str] = mapped_column(String(3), default="USD")
 
     # Payment method and gateway info
-    payment_method = Column(String(50), nullable=False)  # stripe, momo, vnpay
-    gateway_payment_id = Column(String(255), unique=True, index=True)
-    client_secret = Column(String(255), nullable=True)
+    payment_method: Mapped[str] = mapped_column(String(50))  # stripe, momo, vnpay
+    gateway_payment_id: Mapped[Optional[str]] = mapped_column(
+        String(255), unique=True, index=True
+    )
+    client_secret: Mapped[Optional[str]] = mapped_column(String(255))
 
     # Status fields
-    status = Column(
-        String(50), nullable=False, default="pending"
-    )  # pending, processing, completed, failed, cancelled, refunded
-    gateway_status = Column(String(50), nullable=True)  # Gateway-specific status
+    status: Mapped[str] = mapped_column(
+        String(50), default="pending"
+    )  # pending, processing, completed, failed, timeout, cancelled, refunded
+    gateway_status: Mapped[Optional[str]] = mapped_column(
+        String(50)
+    )  # Gateway-specific status
 
     # Promotion info
-    promotion_code = Column(String(50), nullable=True)
+    promotion_code: Mapped[Optional[str]] = mapped_column(String(50))
 
-    # Metadata
-    metadata = Column(JSON, nullable=True)
+    # Metadata (attribute renamed so it does not shadow Base.metadata)
+    payment_metadata: Mapped[Dict[str, Any]] = mapped_column(
+        "metadata", JSONB, server_default=text("'{}'::jsonb")
+    )
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    confirmed_at = Column(DateTime, nullable=True)
-
-    # Relationships
-    transactions = relationship("PaymentTransaction", back_populates="payment")
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, server_default=func.now()
+    )
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
+    confirmed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    # Relationships (lazy; get_payment_history reads transactions in one IN query)
+    transactions: Mapped[List["PaymentTransaction"]] = relationship(
+        back_populates="payment"
+    )
 
     def __repr__(self):
         return f"<Payment(id={self.id}, order_id={self.order_id}, amount={self.final_amount}, status={self.status})>"
@@ -73,31 +124,33 @@ class PaymentTransaction(Base):
 
     __tablename__ = "payment_transactions"
 
-    id = Column(Integer, primary_key=True, index=True)
-    payment_id = Column(Integer, ForeignKey("payments.id"), nullable=False)
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    payment_id: Mapped[int] = mapped_column(ForeignKey("payments.id"))
 
     # Transaction details
-    transaction_type = Column(
-        String(50), nullable=False
+    transaction_type: Mapped[str] = mapped_column(
+        String(50)
     )  # create_intent, confirm_payment, refund, webhook
-    amount = Column(
-        Decimal(10, 2), nullable=True
+    amount: Mapped[Optional[Decimal]] = mapped_column(
+        Numeric(10, 2)
     )  # For refunds and partial transactions
-    status = Column(String(50), nullable=False)  # success, failed, pending
+    status: Mapped[str] = mapped_column(String(50))  # success, failed, pending
 
     # Gateway response
-    gateway_response = Column(JSON, nullable=True)
-    gateway_transaction_id = Column(String(255), nullable=True)
+    gateway_response: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
+    gateway_transaction_id: Mapped[Optional[str]] = mapped_column(String(255))
 
     # Error info
-    error_code = Column(String(50), nullable=True)
-    error_message = Column(Text, nullable=True)
+    error_code: Mapped[Optional[str]] = mapped_column(String(50))
+    error_message: Mapped[Optional[str]] = mapped_column(Text)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.now)
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, server_default=func.now()
+    )
 
     # Relationships
-    payment = relationship("Payment", back_populates="transactions")
+    payment: Mapped["Payment"] = relationship(back_populates="transactions")
 
     def __repr__(self):
         return f"<PaymentTransaction(id={self.id}, payment_id={self.payment_id}, type={self.transaction_type}, status={self.status})>"
@@ -109,28 +162,44 @@ class PaymentMethod(Base):
     """
 
     __tablename__ = "payment_methods"
-
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False, index=True)
+    __table_args__ = (
+        # Default-method lookup only ever touches a user's active default
+        Index(
+            "ix_payment_methods_user_default",
+            "user_id",
+            postgresql_where=text("is_default AND is_active"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(index=True)
 
     # Payment method details
-    gateway = Column(String(50), nullable=False)  # stripe, momo, vnpay
-    gateway_payment_method_id = Column(String(255), nullable=False)
+    gateway: Mapped[str] = mapped_column(String(50))  # stripe, momo, vnpay
+    gateway_payment_method_id: Mapped[str] = mapped_column(String(255))
 
     # Card/method info (encrypted/tokenized)
-    method_type = Column(String(50), nullable=False)  # card, bank_account, wallet
-    last_four = Column(String(4), nullable=True)  # Last 4 digits for cards
-    brand = Column(String(50), nullable=True)  # visa, mastercard, etc.
-    exp_month = Column(Integer, nullable=True)
-    exp_year = Column(Integer, nullable=True)
+    method_type: Mapped[str] = mapped_column(
+        String(50)
+    )  # card, bank_account, wallet
+    last_four: Mapped[Optional[str]] = mapped_column(
+        String(4)
+    )  # Last 4 digits for cards
+    brand: Mapped[Optional[str]] = mapped_column(String(50))  # visa, mastercard, etc.
+    exp_month: Mapped[Optional[int]]
+    exp_year: Mapped[Optional[int]]
 
     # Status
-    is_default = Column(String(1), default="N")  # Y/N
-    is_active = Column(String(1), default="Y")  # Y/N
+    is_default: Mapped[bool] = mapped_column(default=False)
+    is_active: Mapped[bool] = mapped_column(default=True)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, server_default=func.now()
+    )
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
 
     def __repr__(self):
         return f"<PaymentMethod(id={self.id}, user_id={self.user_id}, gateway={self.gateway}, type={self.method_type})>"
@@ -143,25 +212,31 @@ class Refund(Base):
 
     __tablename__ = "refunds"
 
-    id = Column(Integer, primary_key=True, index=True)
-    payment_id = Column(Integer, ForeignKey("payments.id"), nullable=False)
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    payment_id: Mapped[int] = mapped_column(ForeignKey("payments.id"))
 
     # Refund details
-    gateway_refund_id = Column(String(255), unique=True, index=True)
-    amount = Column(Decimal(10, 2), nullable=False)
-    reason = Column(String(255), nullable=True)
-    status = Column(
-        String(50), nullable=False, default="pending"
+    gateway_refund_id: Mapped[Optional[str]] = mapped_column(
+        String(255), unique=True, index=True
+    )
+    amount: Mapped[Decimal] = mapped_column(Numeric(10, 2))
+    reason: Mapped[Optional[str]] = mapped_column(String(255))
+    status: Mapped[str] = mapped_column(
+        String(50), default="pending"
     )  # pending, succeeded, failed
 
     # Processing info
-    processed_by = Column(Integer, nullable=True)  # User ID who processed the refund
-    gateway_response = Column(JSON, nullable=True)
+    processed_by: Mapped[Optional[int]]  # User ID who processed the refund
+    gateway_response: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    processed_at = Column(DateTime, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, server_default=func.now()
+    )
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
 
     def __repr__(self):
         return f"<Refund(id={self.id}, payment_id={self.payment_id}, amount={self.amount}, status={self.status})>"
@@ -2,156 +2,497 @@
 Promotion Service - Handles promotion and discount functionality.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field, replace
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, List
 from datetime import datetime, timedelta
 
+import numpy as np
+from cachetools import TTLCache
+from sqlalchemy import text
+
 from utils.logger import get_logger
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 logger = get_logger(__name__)
 
+# Seconds before the active-promotions snapshot is rebuilt. Bounds how long
+# expired promotions or changes made by other workers can go unnoticed.
+ACTIVE_SNAPSHOT_TTL = 30
+
+# Promotion usage is written back at most this often (seconds), or as soon as
+# this many increments are queued, instead of one UPDATE per applied code
+USAGE_FLUSH_INTERVAL = 1.0
+USAGE_FLUSH_THRESHOLD = 100
+
+# Validation results are reused for this long (seconds) per code and amount,
+# which covers clients re-validating on every cart refresh
+VALIDATION_CACHE_TTL = 5
+VALIDATION_CACHE_SIZE = 4096
+
+# Constant rejections are shared read-only mappings instead of fresh dicts
+_ERR_INVALID = MappingProxyType({"valid": False, "error": "Invalid promotion code"})
+_ERR_INACTIVE = MappingProxyType(
+    {"valid": False, "error": "Promotion code is inactive"}
+)
+_ERR_EXPIRED = MappingProxyType(
+    {"valid": False, "error": "Promotion code has expired or not yet active"}
+)
+_ERR_LIMIT = MappingProxyType(
+    {"valid": False, "error": "Promotion code usage limit reached"}
+)
+_MIN_AMOUNT_ERROR = "Minimum order amount required: $%s"
+
+INCREMENT_USAGE_SQL = text(
+    "UPDATE promotions SET used_count = used_count + :inc WHERE code = :code"
+)
+
+
+def _filter_eligible_numpy(
+    now_ts, amount, min_amount, valid_from, valid_until, used, limit, out
+):
+    """Write positions of eligible promotions into out; return their count."""
+    positions = np.flatnonzero(
+        (min_amount <= amount)
+        & (valid_from <= now_ts)
+        & (now_ts <= valid_until)
+        & (used < limit)
+    )
+    out[: positions.size] = positions
+    return positions.size
+
+
+def _filter_eligible_kernel(
+    now_ts, amount, min_amount, valid_from, valid_until, used, limit, out
+):
+    """Fused single-pass version of _filter_eligible_numpy for Numba."""
+    n = min_amount.shape[0]
+    mask = np.empty(n, dtype=np.bool_)
+    for i in prange(n):
+        mask[i] = (
+            min_amount[i] <= amount
+            and valid_from[i] <= now_ts <= valid_until[i]
+            and used[i] < limit[i]
+        )
+    count = 0
+    for i in range(n):
+        if mask[i]:
+            out[count] = i
+            count += 1
+    return count
+
+
+# Compiled eagerly at import and cached on disk so no request pays for the
+# JIT; without numba the NumPy version is used
+if njit is not None:
+    _filter_eligible = njit(
+        "int64(float64, float64, float64[:], float64[:], float64[:],"
+        " int64[:], int64[:], int64[:])",
+        cache=True,
+        parallel=True,
+        fastmath=True,
+    )(_filter_eligible_kernel)
+else:
+    _filter_eligible = _filter_eligible_numpy
+
+
+@lru_cache(maxsize=1024)
+def _normalize_code(code: str) -> str:
+    """
+    Upper-case a promotion code.
+
+    Repeated codes get back the same string object, so its hash is already
+    computed and dict lookups resolve on identity.
+    """
+    return code.upper()
+
+
+# Promotion fields computed in __post_init__ rather than stored
+_DERIVED_FIELDS = ("description", "valid_until_iso", "valid_from_ts", "valid_until_ts")
+
+
+@dataclass(frozen=True, slots=True)
+class Promotion:
+    """Immutable promotion record."""
+
+    code: str
+    discount_percentage: Optional[float]
+    discount_amount: Optional[float]
+    min_amount: float
+    max_discount: Optional[float]
+    valid_from: datetime
+    valid_until: datetime
+    usage_limit: int
+    used_count: int = 0
+    is_active: bool = True
+
+    # Values derived from the fields above, built once per record
+    description: str = field(init=False, repr=False, compare=False)
+    valid_until_iso: str = field(init=False, repr=False, compare=False)
+    valid_from_ts: float = field(init=False, repr=False, compare=False)
+    valid_until_ts: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        description = (
+            f"Save {self.discount_percentage}%"
+            if self.discount_percentage
+            else f"Save ${self.discount_amount}"
+        )
+        object.__setattr__(self, "description", description)
+        object.__setattr__(self, "valid_until_iso", self.valid_until.isoformat())
+        object.__setattr__(self, "valid_from_ts", self.valid_from.timestamp())
+        object.__setattr__(self, "valid_until_ts", self.valid_until.timestamp())
+
+    def to_cache(self) -> Dict[str, Any]:
+        """Serialize to a JSON-compatible dict for the shared cache."""
+        data = asdict(self)
+        for derived in _DERIVED_FIELDS:
+            del data[derived]
+        data["valid_from"] = self.valid_from.isoformat()
+        data["valid_until"] = self.valid_until_iso
+        return data
+
+    @classmethod
+    def from_cache(cls, data: Dict[str, Any]) -> "Promotion":
+        """Rebuild a promotion serialized with to_cache."""
+        return cls(
+            **{
+                **data,
+                "valid_from": datetime.fromisoformat(data["valid_from"]),
+                "valid_until": datetime.fromisoformat(data["valid_until"]),
+            }
+        )
+
 
 class PromotionService:
     """Service for handling promotions and discounts."""
 
-    def __init__(self, db_manager=None):
+    def __init__(self, db_manager=None, cache_service=None):
         self.db_manager = db_manager
+        self.cache_service = cache_service
+        now = datetime.now()
         # Mock promotion data - in production, fetch from database
-        self.promotions = {
-            "WELCOME10": {
-                "code": "WELCOME10",
-                "discount_percentage": 10,
-                "discount_amount": None,
-                "min_amount": 50,
-                "max_discount": 20,
-                "valid_from": datetime.now() - timedelta(days=30),
-                "valid_until": datetime.now() + timedelta(days=365),
-                "usage_limit": 1000,
-                "used_count": 150,
-                "is_active": True,
-            },
-            "SAVE20": {
-                "code": "SAVE20",
-                "discount_percentage": None,
-                "discount_amount": 20,
-                "min_amount": 100,
-                "max_discount": 20,
-                "valid_from": datetime.now() - timedelta(days=15),
-                "valid_until": datetime.now() + timedelta(days=30),
-                "usage_limit": 500,
-                "used_count": 75,
-                "is_active": True,
-            },
+        self.promotions: Dict[str, Promotion] = {
+            "WELCOME10": Promotion(
+                code="WELCOME10",
+                discount_percentage=10,
+                discount_amount=None,
+                min_amount=50,
+                max_discount=20,
+                valid_from=now - timedelta(days=30),
+                valid_until=now + timedelta(days=365),
+                usage_limit=1000,
+                used_count=150,
+            ),
+            "SAVE20": Promotion(
+                code="SAVE20",
+                discount_percentage=None,
+                discount_amount=20,
+                min_amount=100,
+                max_discount=20,
+                valid_from=now - timedelta(days=15),
+                valid_until=now + timedelta(days=30),
+                usage_limit=500,
+                used_count=75,
+            ),
+        }
+
+        # Snapshot of active, unexpired promotions. The fields listings filter
+        # on are kept as parallel arrays so eligibility is one vectorized pass.
+        self._active_promotions: List[Promotion] = []
+        self._active_positions: Dict[str, int] = {}
+        self._active_min_amount = np.empty(0, dtype=np.float64)
+        self._active_valid_from = np.empty(0, dtype=np.float64)
+        self._active_valid_until = np.empty(0, dtype=np.float64)
+        self._active_used = np.empty(0, dtype=np.int64)
+        self._active_limit = np.empty(0, dtype=np.int64)
+        self._eligible_positions = np.empty(0, dtype=np.int64)
+        self._snapshot_expires_at = 0.0
+
+        # (code, amount in cents) -> validation result
+        self._validation_cache = TTLCache(
+            maxsize=VALIDATION_CACHE_SIZE, ttl=VALIDATION_CACHE_TTL
+        )
+
+        # Applied-but-not-yet-persisted usage per code
+        self._pending_usage: Counter = Counter()
+        self._pending_total = 0
+        self._flush_requested = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def start_usage_flusher(self) -> None:
+        """Start the background task that persists promotion usage."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._usage_flush_loop())
+
+    async def stop_usage_flusher(self) -> None:
+        """Stop the background flusher and persist any remaining usage."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush_usage()
+
+    async def _usage_flush_loop(self) -> None:
+        """Flush pending usage every interval or once the threshold is hit."""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), USAGE_FLUSH_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush_usage()
+
+    async def flush_usage(self) -> None:
+        """Persist pending usage increments in a single transaction."""
+        if not self._pending_usage:
+            return
+
+        # Unary plus drops codes whose reservations were all rolled back
+        pending, self._pending_usage = +self._pending_usage, Counter()
+        self._pending_total = 0
+        if not pending:
+            return
+
+        if self.db_manager:
+            try:
+                async with self.db_manager.engine.begin() as conn:
+                    await conn.execute(
+                        INCREMENT_USAGE_SQL,
+                        [{"code": code, "inc": inc} for code, inc in pending.items()],
+                    )
+            except Exception as e:
+                logger.error(f"Failed to flush promotion usage: {e}")
+                # Requeue so the increments are retried on the next flush
+                self._pending_usage.update(pending)
+                self._pending_total += sum(pending.values())
+                return
+
+        for code, inc in pending.items():
+            promotion = self.promotions.get(code)
+            if promotion:
+                promotion = replace(promotion, used_count=promotion.used_count + inc)
+                self.promotions[code] = promotion
+                position = self._active_positions.get(code)
+                if position is not None:
+                    self._active_promotions[position] = promotion
+                    self._active_used[position] = promotion.used_count
+
+    def _rebuild_active_snapshot(self) -> None:
+        """Rebuild the active-promotions snapshot from self.promotions."""
+        now_ts = time.time()
+        active = sorted(
+            (
+                promotion
+                for promotion in self.promotions.values()
+                if promotion.is_active and promotion.valid_until_ts >= now_ts
+            ),
+            key=lambda promotion: promotion.min_amount,
+        )
+        self._active_promotions = active
+        self._active_positions = {
+            promotion.code: position for position, promotion in enumerate(active)
+        }
+        self._active_min_amount = np.array(
+            [promotion.min_amount for promotion in active], dtype=np.float64
+        )
+        self._active_valid_from = np.array(
+            [promotion.valid_from_ts for promotion in active], dtype=np.float64
+        )
+        self._active_valid_until = np.array(
+            [promotion.valid_until_ts for promotion in active], dtype=np.float64
+        )
+        self._active_used = np.array(
+            [promotion.used_count for promotion in active], dtype=np.int64
+        )
+        self._active_limit = np.array(
+            [promotion.usage_limit for promotion in active], dtype=np.int64
+        )
+        self._eligible_positions = np.empty(len(active), dtype=np.int64)
+        self._snapshot_expires_at = time.monotonic() + ACTIVE_SNAPSHOT_TTL
+
+    async def _refresh_active_snapshot(self) -> None:
+        """Rebuild the snapshot once its TTL has expired."""
+        if time.monotonic() < self._snapshot_expires_at:
+            return
+
+        if self.cache_service:
+            # Pick up promotions published by other workers
+            shared = await self.cache_service.get_active_promotions()
+            for data in shared or ():
+                try:
+                    promotion = Promotion.from_cache(data)
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.error(f"Skipping malformed cached promotion: {e}")
+                    continue
+                self.promotions[promotion.code] = promotion
+
+        self._rebuild_active_snapshot()
+
+    async def _check_and_reserve(
+        self, code: str, amount: float, now_ts: float, reserve: bool
+    ) -> Mapping[str, Any]:
+        """
+        Validate a normalized promotion code and optionally reserve one use.
+
+        Every guard runs against a single lookup and the caller's timestamp. The
+        local reservation happens before any await, so the limit check and
+        the increment cannot interleave with another request.
+        """
+        promotion = self.promotions.get(code)
+
+        if not promotion:
+            return _ERR_INVALID
+
+        if not promotion.is_active:
+            return _ERR_INACTIVE
+
+        if not promotion.valid_from_ts <= now_ts <= promotion.valid_until_ts:
+            return _ERR_EXPIRED
+
+        if amount < promotion.min_amount:
+            return {"valid": False, "error": _MIN_AMOUNT_ERROR % promotion.min_amount}
+
+        if promotion.used_count + self._pending_usage[code] >= promotion.usage_limit:
+            return _ERR_LIMIT
+
+        if reserve:
+            # Recorded in the database by the next usage flush
+            self._pending_usage[code] += 1
+            self._pending_total += 1
+            if self._pending_total >= USAGE_FLUSH_THRESHOLD:
+                self._flush_requested.set()
+
+            if self.cache_service:
+                # Redis holds the authoritative count across workers
+                used_count = await self.cache_service.increment_promotion_usage(
+                    code, promotion.used_count
+                )
+                if used_count is not None and used_count > promotion.usage_limit:
+                    self._pending_usage[code] -= 1
+                    self._pending_total -= 1
+                    return _ERR_LIMIT
+
+        # Calculate discount
+        if promotion.discount_percentage:
+            discount_amount = amount * (promotion.discount_percentage / 100)
+            discount_amount = min(discount_amount, promotion.max_discount)
+        else:
+            discount_amount = promotion.discount_amount
+
+        return {
+            "valid": True,
+            "promotion_code": code,
+            "original_amount": amount,
+            "discount_amount": discount_amount,
+            "final_amount": amount - discount_amount,
+            "discount_percentage": promotion.discount_percentage,
         }
 
     async def validate_promotion_code(
-        self, code: str, amount: float, user_id: Optional[int] = None
-    ) -> Dict[str, Any]:
-        """Validate a promotion code."""
-        try:
-            promotion = self.promotions.get(code.upper())
-
-            if not promotion:
-                return {"valid": False, "error": "Invalid promotion code"}
-
-            if not promotion["is_active"]:
-                return {"valid": False, "error": "Promotion code is inactive"}
-
-            current_time = datetime.now()
-            if (
-                current_time < promotion["valid_from"]
-                or current_time > promotion["valid_until"]
-            ):
-                return {
-                    "valid": False,
-                    "error": "Promotion code has expired or not yet active",
-                }
-
-            if amount < promotion["min_amount"]:
-                return {
-                    "valid": False,
-                    "error": f"Minimum order amount required: ${promotion['min_amount']}",
-                }
-
-            if promotion["used_count"] >= promotion["usage_limit"]:
-                return {"valid": False, "error": "Promotion code usage limit reached"}
-
-            # Calculate discount
-            if promotion["discount_percentage"]:
-                discount_amount = amount * (promotion["discount_percentage"] / 100)
-                discount_amount = min(discount_amount, promotion["max_discount"])
-            else:
-                discount_amount = promotion["discount_amount"]
-
-            final_amount = amount - discount_amount
-
-            return {
-                "valid": True,
-                "promotion_code": code,
-                "original_amount": amount,
-                "discount_amount": discount_amount,
-                "final_amount": final_amount,
-                "discount_percentage": promotion["discount_percentage"],
-            }
+        self,
+        code: str,
+        amount: float,
+        user_id: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> Mapping[str, Any]:
+        """
+        Validate a promotion code.
 
-        except Exception as e:
-            logger.error(f"Failed to validate promotion code: {e}")
-            return {"valid": False, "error": "Failed to validate promotion code"}
+        ``now`` lets callers share one timestamp across several promotion
+        calls in the same request; it defaults to the current time. Only
+        current-time results are cached, so a supplied ``now`` is always
+        checked against the validity window.
+        """
+        code = _normalize_code(code)
 
-    async def apply_promotion(
-        self, code: str, amount: float, user_id: Optional[int] = None
-    ) -> Dict[str, Any]:
-        """Apply a promotion code to an order."""
-        try:
-            validation_result = await self.validate_promotion_code(
-                code, amount, user_id
+        # Reject unknown codes (typos, guessing) before the validation cache
+        # so they cannot evict entries for real promotions
+        if code not in self.promotions:
+            return _ERR_INVALID
+
+        if now is not None:
+            return await self._check_and_reserve(
+                code, amount, now.timestamp(), reserve=False
             )
 
-            if not validation_result["valid"]:
-                return validation_result
+        cache_key = (code, round(amount * 100))
 
-            # In production, record the usage in database
-            if code.upper() in self.promotions:
-                self.promotions[code.upper()]["used_count"] += 1
+        result = self._validation_cache.get(cache_key)
+        if result is None:
+            result = await self._check_and_reserve(
+                code, amount, time.time(), reserve=False
+            )
+            # Cached results are shared between callers, so keep them read-only
+            if not isinstance(result, MappingProxyType):
+                result = MappingProxyType(result)
+            self._validation_cache[cache_key] = result
 
-            return validation_result
+        return result
 
-        except Exception as e:
-            logger.error(f"Failed to apply promotion: {e}")
-            return {"valid": False, "error": "Failed to apply promotion"}
+    async def apply_promotion(
+        self,
+        code: str,
+        amount: float,
+        user_id: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> Mapping[str, Any]:
+        """Apply a promotion code to an order."""
+        return await self._check_and_reserve(
+            _normalize_code(code),
+            amount,
+            now.timestamp() if now else time.time(),
+            reserve=True,
+        )
 
-    async def get_available_promotions(self, amount: float = 0) -> List[Dict[str, Any]]:
+    async def get_available_promotions(
+        self, amount: float = 0, now: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
         """Get available promotions for a given amount."""
-        try:
-            available_promotions = []
-            current_time = datetime.now()
-
-            for code, promotion in self.promotions.items():
-                if (
-                    promotion["is_active"]
-                    and current_time >= promotion["valid_from"]
-                    and current_time <= promotion["valid_until"]
-                    and amount >= promotion["min_amount"]
-                    and promotion["used_count"] < promotion["usage_limit"]
-                ):
-                    available_promotions.append(
-                        {
-                            "code": code,
-                            "description": (
-                                f"Save {promotion['discount_percentage']}%"
-                                if promotion["discount_percentage"]
-                                else f"Save ${promotion['discount_amount']}"
-                            ),
-                            "min_amount": promotion["min_amount"],
-                            "valid_until": promotion["valid_until"].isoformat(),
-                        }
-                    )
+        await self._refresh_active_snapshot()
 
-            return available_promotions
+        available_promotions = []
+        eligible = _filter_eligible(
+            now.timestamp() if now else time.time(),
+            float(amount),
+            self._active_min_amount,
+            self._active_valid_from,
+            self._active_valid_until,
+            self._active_used,
+            self._active_limit,
+            self._eligible_positions,
+        )
 
-        except Exception as e:
-            logger.error(f"Failed to get available promotions: {e}")
-            return []
+        for position in self._eligible_positions[:eligible]:
+            promotion = self._active_promotions[position]
+            code = promotion.code
+            # Unflushed usage is only checked for the few matches
+            pending = self._pending_usage[code]
+            if promotion.used_count + pending < promotion.usage_limit:
+                available_promotions.append(
+                    {
+                        "code": code,
+                        "description": promotion.description,
+                        "min_amount": promotion.min_amount,
+                        "valid_until": promotion.valid_until_iso,
+                    }
+                )
+
+        return available_promotions
 
     async def create_promotion(
         self,
@@ -164,39 +505,43 @@ class PromotionService:
         usage_limit: int = 1000,
     ) -> Dict[str, Any]:
         """Create a new promotion."""
-        try:
-            # In production, save to database
-            promotion = {
-                "code": code.upper(),
-                "discount_percentage": discount_percentage,
-                "discount_amount": discount_amount,
-                "min_amount": min_amount,
-                "max_discount": max_discount,
-                "valid_from": datetime.now(),
-                "valid_until": valid_until or (datetime.now() + timedelta(days=30)),
-                "usage_limit": usage_limit,
-                "used_count": 0,
-                "is_active": True,
-            }
+        code = _normalize_code(code)
+        now = datetime.now()
+        # In production, save to database
+        promotion = Promotion(
+            code=code,
+            discount_percentage=discount_percentage,
+            discount_amount=discount_amount,
+            min_amount=min_amount,
+            max_discount=max_discount,
+            valid_from=now,
+            valid_until=valid_until or (now + timedelta(days=30)),
+            usage_limit=usage_limit,
+        )
 
-            self.promotions[code.upper()] = promotion
-
-            logger.info(f"Created promotion code: {code}")
-            return {"success": True, "promotion": promotion}
+        self.promotions[promotion.code] = promotion
+        self._rebuild_active_snapshot()
+        self._validation_cache.clear()
+        if self.cache_service:
+            await self.cache_service.set_promotion(
+                promotion.code,
+                promotion.to_cache(),
+                promotion.valid_until.timestamp(),
+            )
 
-        except Exception as e:
-            logger.error(f"Failed to create promotion: {e}")
-            return {"success": False, "error": "Failed to create promotion"}
+        logger.info(f"Created promotion code: {code}")
+        return {"success": True, "promotion": asdict(promotion)}
 
     async def deactivate_promotion(self, code: str) -> bool:
         """Deactivate a promotion code."""
-        try:
-            if code.upper() in self.promotions:
-                self.promotions[code.upper()]["is_active"] = False
-                logger.info(f"Deactivated promotion code: {code}")
-                return True
-            return False
-
-        except Exception as e:
-            logger.error(f"Failed to deactivate promotion: {e}")
-            return False
+        code = _normalize_code(code)
+        promotion = self.promotions.get(code)
+        if promotion:
+            self.promotions[promotion.code] = replace(promotion, is_active=False)
+            self._rebuild_active_snapshot()
+            self._validation_cache.clear()
+            if self.cache_service:
+                await self.cache_service.remove_promotion(promotion.code)
+            logger.info(f"Deactivated promotion code: {code}")
+            return True
+        return False
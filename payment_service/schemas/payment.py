@@ -2,26 +2,49 @@
 Payment Schemas - Pydantic models for data validation.
 """
 
+from decimal import Decimal
+from enum import Enum
 from typing import Dict, Any, Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, SkipValidation
+
+# Incoming payloads: immutable, trimmed, and unknown fields rejected
+REQUEST_CONFIG = ConfigDict(frozen=True, str_strip_whitespace=True, extra="forbid")
+
+# Outgoing payloads are built by the service and never mutated
+RESPONSE_CONFIG = ConfigDict(frozen=True)
+
+
+class PaymentMethodType(str, Enum):
+    """Supported payment gateways."""
+
+    STRIPE = "stripe"
+    MOMO = "momo"
+    VNPAY = "vnpay"
 
 
 class PaymentIntentRequest(BaseModel):
     """Payment intent request schema."""
 
-    amount: float = Field(..., description="Payment amount", gt=0)
+    model_config = REQUEST_CONFIG
+
+    # Decimal keeps the amount exact from the JSON number to the Numeric column
+    amount: Decimal = Field(..., description="Payment amount", gt=0)
     currency: str = Field(default="USD", description="Payment currency")
-    payment_method: str = Field(..., description="Payment method (stripe, momo, vnpay)")
+    payment_method: PaymentMethodType = Field(
+        ..., description="Payment method (stripe, momo, vnpay)"
+    )
     order_id: Optional[str] = Field(default=None, description="Order ID")
     promotion_code: Optional[str] = Field(default=None, description="Promotion code")
-    metadata: Optional[Dict[str, Any]] = Field(
-        default=None, description="Additional metadata"
+    metadata: Dict[str, Any] = Field(
+        default_factory=dict, description="Additional metadata"
     )
 
 
 class PaymentIntentResponse(BaseModel):
     """Payment intent response schema."""
 
+    model_config = RESPONSE_CONFIG
+
     payment_intent_id: str = Field(..., description="Payment intent ID")
     amount: float = Field(..., description="Payment amount")
     currency: str = Field(..., description="Payment currency")
@@ -32,27 +55,47 @@ class PaymentIntentResponse(BaseModel):
 class PaymentConfirmationRequest(BaseModel):
     """Payment confirmation request schema."""
 
+    model_config = REQUEST_CONFIG
+
     payment_intent_id: str = Field(..., description="Payment intent ID")
-    payment_method: str = Field(..., description="Payment method used")
+    payment_method: PaymentMethodType = Field(..., description="Payment method used")
     confirmation_data: Optional[Dict[str, Any]] = Field(
         default=None, description="Confirmation data"
     )
 
 
+class PaymentTransactionInfo(BaseModel):
+    """Payment transaction schema."""
+
+    model_config = RESPONSE_CONFIG
+
+    transaction_type: str = Field(..., description="Transaction type")
+    status: str = Field(..., description="Transaction status")
+    amount: Optional[float] = Field(default=None, description="Transaction amount")
+    created_at: Optional[str] = Field(default=None, description="Creation timestamp")
+
+
 class PaymentStatusResponse(BaseModel):
     """Payment status response schema."""
 
+    model_config = RESPONSE_CONFIG
+
     payment_intent_id: str = Field(..., description="Payment intent ID")
     status: str = Field(..., description="Payment status")
     amount: Optional[float] = Field(default=None, description="Payment amount")
     currency: Optional[str] = Field(default=None, description="Payment currency")
     created_at: Optional[str] = Field(default=None, description="Creation timestamp")
     updated_at: Optional[str] = Field(default=None, description="Last update timestamp")
+    transactions: Optional[List[PaymentTransactionInfo]] = Field(
+        default=None, description="Payment transactions"
+    )
 
 
 class PaymentMethodInfo(BaseModel):
     """Payment method information schema."""
 
+    model_config = RESPONSE_CONFIG
+
     id: str = Field(..., description="Payment method ID")
     name: str = Field(..., description="Payment method name")
     description: str = Field(..., description="Payment method description")
@@ -62,6 +105,8 @@ class PaymentMethodInfo(BaseModel):
 class PaymentMethodResponse(BaseModel):
     """Payment methods response schema."""
 
+    model_config = RESPONSE_CONFIG
+
     payment_methods: List[PaymentMethodInfo] = Field(
         ..., description="Available payment methods"
     )
@@ -70,7 +115,9 @@ class PaymentMethodResponse(BaseModel):
 class RefundRequest(BaseModel):
     """Refund request schema."""
 
-    amount: Optional[float] = Field(
+    model_config = REQUEST_CONFIG
+
+    amount: Optional[Decimal] = Field(
         default=None, description="Refund amount (full refund if not specified)"
     )
     reason: Optional[str] = Field(default=None, description="Refund reason")
@@ -82,6 +129,8 @@ class RefundRequest(BaseModel):
 class RefundResponse(BaseModel):
     """Refund response schema."""
 
+    model_config = RESPONSE_CONFIG
+
     refund_id: str = Field(..., description="Refund ID")
     payment_intent_id: str = Field(..., description="Payment intent ID")
     amount: float = Field(..., description="Refund amount")
@@ -92,6 +141,8 @@ class RefundResponse(BaseModel):
 class PromotionRequest(BaseModel):
     """Promotion request schema."""
 
+    model_config = REQUEST_CONFIG
+
     promotion_code: str = Field(..., description="Promotion code")
     amount: float = Field(..., description="Original amount")
 
@@ -99,6 +150,8 @@ class PromotionRequest(BaseModel):
 class PromotionResponse(BaseModel):
     """Promotion response schema."""
 
+    model_config = RESPONSE_CONFIG
+
     promotion_code: str = Field(..., description="Promotion code")
     original_amount: float = Field(..., description="Original amount")
     discount_amount: float = Field(..., description="Discount amount")
@@ -111,9 +164,12 @@ class PromotionResponse(BaseModel):
 class PaymentWebhookRequest(BaseModel):
     """Payment webhook request schema."""
 
+    model_config = REQUEST_CONFIG
+
     event_type: str = Field(..., description="Webhook event type")
     payment_intent_id: str = Field(..., description="Payment intent ID")
-    data: Dict[str, Any] = Field(..., description="Webhook data")
+    # Signature-verified gateway payload; not walked by the validator
+    data: SkipValidation[Dict[str, Any]] = Field(..., description="Webhook data")
     signature: Optional[str] = Field(
         default=None, description="Webhook signature for verification"
     )
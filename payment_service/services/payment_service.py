@@ -2,31 +2,120 @@
 Payment Service - Business logic layer for payment processing
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
-from datetime import datetime
+from typing import AsyncIterator, Awaitable, Dict, Any, Optional, List
 from decimal import Decimal
-from sqlalchemy.orm import Session
+from cachetools import TTLCache
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
 from schemas.payment import (
     PaymentIntentRequest,
     PaymentIntentResponse,
     PaymentConfirmationRequest,
+    PaymentMethodType,
     PaymentStatusResponse,
     RefundRequest,
     RefundResponse,
 )
+from core.config import get_gateway_settings
 from gateways.base import PaymentGateway
 from gateways.stripe import StripeGateway
 from gateways.momo import MoMoGateway
 from gateways.vnpay import VNPayGateway
 from promotions.promotion_service import PromotionService
 from models.payment import Payment, PaymentTransaction
+from shared_code.cache import PaymentCacheService
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Money columns are Numeric(10, 2)
+TWOPLACES = Decimal("0.01")
+ZERO = Decimal("0")
+
+# Gateway-specific status -> standardized payment status
+_STATUS_MAP = {
+    # Stripe statuses
+    "requires_payment_method": "pending",
+    "requires_confirmation": "pending",
+    "requires_action": "pending",
+    "processing": "processing",
+    "succeeded": "completed",
+    "canceled": "cancelled",
+    # MoMo statuses
+    "pending": "pending",
+    "success": "completed",
+    "failed": "failed",
+    # VNPay statuses
+    "00": "completed",  # Success
+    "01": "pending",  # Pending
+    "02": "failed",  # Failed
+}
+
+# Statuses that polling clients can be answered from memory; completed is
+# included and dropped from the cache when this worker confirms or refunds
+TERMINAL_STATUSES = frozenset({"completed", "refunded", "failed", "cancelled"})
+TERMINAL_STATUS_CACHE_TTL = 60
+
+# Per-worker terminal status responses, keyed by payment intent ID
+_terminal_status_cache: TTLCache = TTLCache(
+    maxsize=10_000, ttl=TERMINAL_STATUS_CACHE_TTL
+)
+
+# Position of each gateway in PaymentService._gateways
+_GATEWAY_INDEX = {
+    PaymentMethodType.STRIPE: 0,
+    PaymentMethodType.MOMO: 1,
+    PaymentMethodType.VNPAY: 2,
+}
+
+# Columns behind a PaymentStatusResponse, read back by status updates
+STATUS_COLUMNS = (
+    Payment.gateway_payment_id,
+    Payment.status,
+    Payment.final_amount,
+    Payment.currency,
+    Payment.created_at,
+    Payment.updated_at,
+)
+
+
+# History rows, labelled with the PaymentStatusResponse field names
+HISTORY_COLUMNS = (
+    Payment.gateway_payment_id.label("payment_intent_id"),
+    Payment.status,
+    Payment.final_amount.label("amount"),
+    Payment.currency,
+    Payment.created_at,
+    Payment.updated_at,
+)
+
+# Rows buffered per fetch when streaming history
+HISTORY_YIELD_PER = 100
+
+# Transaction rows, labelled with the PaymentTransactionInfo field names
+TRANSACTION_COLUMNS = (
+    PaymentTransaction.transaction_type,
+    PaymentTransaction.status,
+    PaymentTransaction.amount,
+    PaymentTransaction.created_at,
+)
+
+
+def _status_response(row: Any) -> PaymentStatusResponse:
+    """Build a status response from a row of STATUS_COLUMNS."""
+    return PaymentStatusResponse(
+        payment_intent_id=row.gateway_payment_id,
+        status=row.status,
+        amount=float(row.final_amount),
+        currency=row.currency,
+        created_at=row.created_at.isoformat(),
+        updated_at=row.updated_at.isoformat(),
+    )
+
 
 class PaymentException(Exception):
     """Base exception for payment errors"""
@@ -52,6 +141,12 @@ class PaymentGatewayException(PaymentException):
     pass
 
 
+class PaymentGatewayTimeoutException(PaymentGatewayException):
+    """Exception raised when a payment gateway call exceeds its deadline"""
+
+    pass
+
+
 class PaymentService:
     """
     Business logic layer for payment processing.
@@ -60,21 +155,20 @@ class PaymentService:
 
     def __init__(
         self,
-        db: Session,
+        db: AsyncSession,
         stripe_gateway: StripeGateway,
         momo_gateway: MoMoGateway,
         vnpay_gateway: VNPayGateway,
         promotion_service: PromotionService,
+        cache_service: Optional[PaymentCacheService] = None,
     ):
         self.db = db
-        self.gateways = {
-            "stripe": stripe_gateway,
-            "momo": momo_gateway,
-            "vnpay": vnpay_gateway,
-        }
+        self._gateways = (stripe_gateway, momo_gateway, vnpay_gateway)
         self.promotion_service = promotion_service
+        self.cache_service = cache_service
+        self.gateway_timeout = get_gateway_settings().GATEWAY_TIMEOUT_SECONDS
 
-    def _get_gateway(self, payment_method: str) -> PaymentGateway:
+    def _get_gateway(self, payment_method: PaymentMethodType) -> PaymentGateway:
         """
         Get payment gateway instance for specified method.
 
@@ -83,16 +177,51 @@ class PaymentService:
 
         Returns:
             PaymentGateway: Gateway instance
+        """
+        # Request schemas and query parameters only admit PaymentMethodType
+        # members, so unsupported methods never get this far
+        return self._gateways[_GATEWAY_INDEX[payment_method]]
+
+    async def _call_gateway(self, call: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Await a gateway call under the configured deadline.
+
+        Args:
+            call: Pending gateway coroutine
+
+        Returns:
+            Dict[str, Any]: Gateway response
 
         Raises:
-            InvalidPaymentMethodException: If payment method not supported
+            PaymentGatewayTimeoutException: If the deadline passes first
         """
-        gateway = self.gateways.get(payment_method)
-        if not gateway:
-            raise InvalidPaymentMethodException(
-                f"Unsupported payment method: {payment_method}"
-            )
-        return gateway
+        try:
+            async with asyncio.timeout(self.gateway_timeout):
+                return await call
+        except TimeoutError:
+            raise PaymentGatewayTimeoutException("Payment gateway timed out")
+
+    async def _get_payment(self, payment_intent_id: str) -> Optional[Payment]:
+        """
+        Load a payment by its gateway payment intent ID.
+
+        Args:
+            payment_intent_id: Payment intent ID
+
+        Returns:
+            Optional[Payment]: Payment record, or None if not found
+        """
+        result = await self.db.execute(
+            select(Payment)
+            .where(Payment.gateway_payment_id == payment_intent_id)
+            .limit(1)
+        )
+        payment = result.scalar_one_or_none()
+
+        # End the read transaction so the pooled connection is not held across
+        # the gateway round trip that follows every lookup
+        await self.db.commit()
+        return payment
 
     async def create_payment_intent(
         self, request: PaymentIntentRequest
@@ -114,68 +243,98 @@ class PaymentService:
             gateway = self._get_gateway(request.payment_method)
 
             # Apply promotions if provided
-            original_amount = request.amount
-            final_amount = original_amount
-            discount_amount = 0
+            original_amount = request.amount.quantize(TWOPLACES)
+            discount_amount = ZERO
 
             if request.promotion_code:
-                promotion_result = await self.promotion_service.apply_promotions(
-                    original_amount, request.promotion_code
+                promotion_result = await self.promotion_service.apply_promotion(
+                    request.promotion_code, float(original_amount)
                 )
-                final_amount = promotion_result.get("final_amount", original_amount)
-                discount_amount = original_amount - final_amount
-
-            # Create payment record in database
-            payment = Payment(
-                order_id=request.order_id,
-                original_amount=Decimal(str(original_amount)),
-                discount_amount=Decimal(str(discount_amount)),
-                final_amount=Decimal(str(final_amount)),
-                currency=request.currency,
-                payment_method=request.payment_method,
-                status="pending",
-                promotion_code=request.promotion_code,
-                metadata=request.metadata or {},
-                created_at=datetime.now(),
+                # An invalid code leaves the amount undiscounted, as before
+                if promotion_result["valid"]:
+                    discount_amount = Decimal(
+                        promotion_result["discount_amount"]
+                    ).quantize(TWOPLACES)
+
+            final_amount = original_amount - discount_amount
+
+            # Persist the pending row in its own short transaction so no
+            # connection is held while the gateway call is in flight; the
+            # gateway metadata needs its ID, which RETURNING hands back
+            result = await self.db.execute(
+                insert(Payment)
+                .values(
+                    order_id=request.order_id,
+                    original_amount=original_amount,
+                    discount_amount=discount_amount,
+                    final_amount=final_amount,
+                    currency=request.currency,
+                    payment_method=request.payment_method,
+                    status="pending",
+                    promotion_code=request.promotion_code,
+                    payment_metadata=request.metadata,
+                )
+                .returning(Payment.id)
             )
-
-            self.db.add(payment)
-            self.db.flush()  # Get payment ID
+            payment_id = result.scalar_one()
+            await self.db.commit()
 
             # Create payment intent via gateway
-            gateway_response = await gateway.create_payment_intent(
-                amount=float(final_amount),
-                currency=request.currency,
-                order_id=request.order_id,
-                metadata={
-                    "payment_id": payment.id,
-                    "order_id": request.order_id,
-                    **(request.metadata or {}),
-                },
+            try:
+                gateway_response = await self._call_gateway(
+                    gateway.create_payment_intent(
+                        amount=float(final_amount),
+                        currency=request.currency,
+                        order_id=request.order_id,
+                        metadata={
+                            **request.metadata,
+                            "payment_id": payment_id,
+                            "order_id": request.order_id,
+                        },
+                    )
+                )
+            except Exception as e:
+                # The pending row is already committed; record the failure on it
+                # so a retry can tell a timed-out intent from a rejected one
+                failed_status = (
+                    "timeout"
+                    if isinstance(e, PaymentGatewayTimeoutException)
+                    else "failed"
+                )
+                await self.db.execute(
+                    update(Payment)
+                    .where(Payment.id == payment_id)
+                    .values(status=failed_status)
+                )
+                await self.db.commit()
+                raise
+
+            # Update payment with gateway information and record the
+            # transaction; both statements go out in the same commit
+            await self.db.execute(
+                update(Payment)
+                .where(Payment.id == payment_id)
+                .values(
+                    gateway_payment_id=gateway_response["id"],
+                    gateway_status=gateway_response["status"],
+                    client_secret=gateway_response.get("client_secret"),
+                )
             )
-
-            # Update payment with gateway information
-            payment.gateway_payment_id = gateway_response["id"]
-            payment.gateway_status = gateway_response["status"]
-            payment.client_secret = gateway_response.get("client_secret")
-            payment.updated_at = datetime.now()
-
-            # Create transaction record
-            transaction = PaymentTransaction(
-                payment_id=payment.id,
-                transaction_type="create_intent",
-                gateway_response=gateway_response,
-                status="success",
-                created_at=datetime.now(),
+            self.db.add(
+                PaymentTransaction(
+                    payment_id=payment_id,
+                    transaction_type="create_intent",
+                    gateway_response=gateway_response,
+                    status="success",
+                )
             )
-            self.db.add(transaction)
 
-            self.db.commit()
+            await self.db.commit()
 
-            logger.info(f"Payment intent created successfully: {payment.id}")
+            logger.info(f"Payment intent created successfully: {payment_id}")
 
             return PaymentIntentResponse(
-                payment_intent_id=payment.gateway_payment_id,
+                payment_intent_id=gateway_response["id"],
                 amount=float(final_amount),
                 currency=request.currency,
                 payment_method=request.payment_method,
@@ -183,11 +342,11 @@ class PaymentService:
             )
 
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Database error creating payment intent: {e}")
             raise PaymentException("Database error occurred")
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Failed to create payment intent: {e}")
             raise PaymentException(f"Failed to create payment intent: {str(e)}")
 
@@ -206,65 +365,109 @@ class PaymentService:
         Raises:
             PaymentException: If confirmation fails
         """
-        try:
-            # Find payment record
-            payment = (
-                self.db.query(Payment)
-                .filter(Payment.gateway_payment_id == request.payment_intent_id)
-                .first()
+        # A payment intent belongs to exactly one order, so the intent ID alone
+        # identifies the confirmation; retries get the stored response back
+        idempotency_key = f"confirm:{request.payment_intent_id}"
+        if self.cache_service and not await self.cache_service.claim_idempotency_key(
+            idempotency_key
+        ):
+            cached_response = await self.cache_service.get_idempotent_response(
+                idempotency_key
+            )
+            if cached_response:
+                logger.info(
+                    f"Returning stored confirmation for {request.payment_intent_id}"
+                )
+                return PaymentStatusResponse(**cached_response)
+            raise PaymentException(
+                f"Payment confirmation already in progress: {request.payment_intent_id}"
             )
 
-            if not payment:
+        try:
+            # Only confirm intents this service created; the check reads one
+            # column and ends its transaction before the gateway round trip
+            result = await self.db.execute(
+                select(Payment.id)
+                .where(Payment.gateway_payment_id == request.payment_intent_id)
+                .limit(1)
+            )
+            payment_id = result.scalar_one_or_none()
+            await self.db.commit()
+            if payment_id is None:
                 raise PaymentException(
                     f"Payment not found: {request.payment_intent_id}"
                 )
 
-            # Get gateway and confirm payment
             gateway = self._get_gateway(request.payment_method)
-            gateway_response = await gateway.confirm_payment(
-                request.payment_intent_id, request.confirmation_data
+            gateway_response = await self._call_gateway(
+                gateway.confirm_payment(
+                    request.payment_intent_id, request.confirmation_data
+                )
+            )
+
+            result = await self.db.execute(
+                update(Payment)
+                .where(Payment.gateway_payment_id == request.payment_intent_id)
+                .values(
+                    status=_STATUS_MAP.get(gateway_response["status"], "unknown"),
+                    gateway_status=gateway_response["status"],
+                    confirmed_at=func.now(),
+                )
+                .returning(Payment.id, *STATUS_COLUMNS)
             )
+            row = result.first()
 
-            # Update payment status
-            payment.status = self._map_gateway_status(gateway_response["status"])
-            payment.gateway_status = gateway_response["status"]
-            payment.confirmed_at = datetime.now()
-            payment.updated_at = datetime.now()
+            if not row:
+                raise PaymentException(
+                    f"Payment not found: {request.payment_intent_id}"
+                )
 
             # Create transaction record
             transaction = PaymentTransaction(
-                payment_id=payment.id,
+                payment_id=row.id,
                 transaction_type="confirm_payment",
                 gateway_response=gateway_response,
                 status="success",
-                created_at=datetime.now(),
             )
             self.db.add(transaction)
 
-            self.db.commit()
+            await self.db.commit()
+            _terminal_status_cache.pop(request.payment_intent_id, None)
 
-            logger.info(f"Payment confirmed successfully: {payment.id}")
+            logger.info(f"Payment confirmed successfully: {row.id}")
 
-            return PaymentStatusResponse(
-                payment_intent_id=request.payment_intent_id,
-                status=payment.status,
-                amount=float(payment.final_amount),
-                currency=payment.currency,
-                created_at=payment.created_at.isoformat(),
-                updated_at=payment.updated_at.isoformat(),
-            )
+            response = _status_response(row)
+
+            if self.cache_service:
+                await self.cache_service.set_idempotent_response(
+                    idempotency_key, response.model_dump()
+                )
+
+            return response
 
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
+            await self._release_idempotency_key(idempotency_key)
             logger.error(f"Database error confirming payment: {e}")
             raise PaymentException("Database error occurred")
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
+            await self._release_idempotency_key(idempotency_key)
             logger.error(f"Failed to confirm payment: {e}")
             raise PaymentException(f"Failed to confirm payment: {str(e)}")
 
+    async def _release_idempotency_key(self, idempotency_key: str) -> None:
+        """
+        Release a claimed idempotency key after a failed operation.
+
+        Args:
+            idempotency_key: Key claimed at the start of the operation
+        """
+        if self.cache_service:
+            await self.cache_service.release_idempotency_key(idempotency_key)
+
     async def get_payment_status(
-        self, payment_intent_id: str, payment_method: str
+        self, payment_intent_id: str, payment_method: PaymentMethodType
     ) -> PaymentStatusResponse:
         """
         Get current payment status.
@@ -276,44 +479,66 @@ class PaymentService:
         Returns:
             PaymentStatusResponse: Current payment status
         """
+        cached_response = _terminal_status_cache.get(payment_intent_id)
+        if cached_response is not None:
+            return cached_response
+
         try:
-            # Find payment record
-            payment = (
-                self.db.query(Payment)
-                .filter(Payment.gateway_payment_id == payment_intent_id)
-                .first()
+            # Get latest status from gateway
+            gateway = self._get_gateway(payment_method)
+            gateway_response = await self._call_gateway(
+                gateway.get_payment_status(payment_intent_id)
             )
 
-            if not payment:
-                raise PaymentException(f"Payment not found: {payment_intent_id}")
+            # The status predicate lets the database skip unchanged rows
+            new_status = _STATUS_MAP.get(gateway_response["status"], "unknown")
+            result = await self.db.execute(
+                update(Payment)
+                .where(
+                    Payment.gateway_payment_id == payment_intent_id,
+                    Payment.status != new_status,
+                )
+                .values(
+                    status=new_status,
+                    gateway_status=gateway_response["status"],
+                )
+                .returning(*STATUS_COLUMNS)
+            )
+            row = result.first()
+
+            if not row:
+                # Status unchanged (or unknown payment): read the stored row
+                result = await self.db.execute(
+                    select(*STATUS_COLUMNS)
+                    .where(Payment.gateway_payment_id == payment_intent_id)
+                    .limit(1)
+                )
+                row = result.first()
 
-            # Get latest status from gateway
-            gateway = self._get_gateway(payment_method)
-            gateway_response = await gateway.get_payment_status(payment_intent_id)
+            await self.db.commit()
 
-            # Update status if changed
-            new_status = self._map_gateway_status(gateway_response["status"])
-            if new_status != payment.status:
-                payment.status = new_status
-                payment.gateway_status = gateway_response["status"]
-                payment.updated_at = datetime.now()
-                self.db.commit()
+            if not row:
+                raise PaymentException(f"Payment not found: {payment_intent_id}")
 
-            return PaymentStatusResponse(
-                payment_intent_id=payment_intent_id,
-                status=payment.status,
-                amount=float(payment.final_amount),
-                currency=payment.currency,
-                created_at=payment.created_at.isoformat(),
-                updated_at=payment.updated_at.isoformat(),
-            )
+            response = _status_response(row)
+            if response.status in TERMINAL_STATUSES:
+                _terminal_status_cache[payment_intent_id] = response
+            return response
 
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Database error getting payment status: {e}")
+            raise PaymentException("Database error occurred")
         except Exception as e:
+            await self.db.rollback()
             logger.error(f"Failed to get payment status: {e}")
             raise PaymentException(f"Failed to get payment status: {str(e)}")
 
     async def refund_payment(
-        self, payment_intent_id: str, payment_method: str, refund_request: RefundRequest
+        self,
+        payment_intent_id: str,
+        payment_method: PaymentMethodType,
+        refund_request: RefundRequest,
     ) -> RefundResponse:
         """
         Process payment refund.
@@ -328,11 +553,7 @@ class PaymentService:
         """
         try:
             # Find payment record
-            payment = (
-                self.db.query(Payment)
-                .filter(Payment.gateway_payment_id == payment_intent_id)
-                .first()
-            )
+            payment = await self._get_payment(payment_intent_id)
 
             if not payment:
                 raise PaymentException(f"Payment not found: {payment_intent_id}")
@@ -342,33 +563,47 @@ class PaymentService:
 
             # Process refund via gateway
             gateway = self._get_gateway(payment_method)
-            refund_amount = refund_request.amount or float(payment.final_amount)
+            refund_amount = (
+                refund_request.amount.quantize(TWOPLACES)
+                if refund_request.amount
+                else payment.final_amount
+            )
 
-            gateway_response = await gateway.refund_payment(
-                payment_intent_id, refund_amount
+            gateway_response = await self._call_gateway(
+                gateway.refund_payment(payment_intent_id, float(refund_amount))
             )
 
-            # Update payment status
-            payment.status = (
-                "refunded"
-                if refund_amount >= float(payment.final_amount)
-                else "partially_refunded"
+            # Update payment status; the status guard keeps a concurrent
+            # refund from being recorded twice
+            result = await self.db.execute(
+                update(Payment)
+                .where(Payment.id == payment.id, Payment.status == "completed")
+                .values(
+                    status=(
+                        "refunded"
+                        if refund_amount >= payment.final_amount
+                        else "partially_refunded"
+                    ),
+                    refunded_amount=refund_amount,
+                )
+                .returning(Payment.updated_at)
             )
-            payment.refunded_amount = Decimal(str(refund_amount))
-            payment.updated_at = datetime.now()
+            refunded_at = result.scalar_one_or_none()
+            if refunded_at is None:
+                raise PaymentException("Can only refund completed payments")
 
             # Create transaction record
             transaction = PaymentTransaction(
                 payment_id=payment.id,
                 transaction_type="refund",
-                amount=Decimal(str(refund_amount)),
+                amount=refund_amount,
                 gateway_response=gateway_response,
                 status="success",
-                created_at=datetime.now(),
             )
             self.db.add(transaction)
 
-            self.db.commit()
+            await self.db.commit()
+            _terminal_status_cache.pop(payment_intent_id, None)
 
             logger.info(
                 f"Payment refunded successfully: {payment.id}, amount: {refund_amount}"
@@ -377,49 +612,65 @@ class PaymentService:
             return RefundResponse(
                 refund_id=gateway_response["id"],
                 payment_intent_id=payment_intent_id,
-                amount=refund_amount,
+                amount=float(refund_amount),
                 status=gateway_response["status"],
-                created_at=datetime.now().isoformat(),
+                created_at=refunded_at.isoformat(),
             )
 
         except SQLAlchemyError as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Database error processing refund: {e}")
             raise PaymentException("Database error occurred")
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Failed to process refund: {e}")
             raise PaymentException(f"Failed to process refund: {str(e)}")
 
-    def _map_gateway_status(self, gateway_status: str) -> str:
+    async def bulk_create_transactions(
+        self, transactions: List[Dict[str, Any]]
+    ) -> None:
         """
-        Map gateway-specific status to standardized payment status.
+        Record many payment transactions in one statement.
+
+        Meant for webhook replay and reconciliation, which would otherwise add
+        rows one by one through the unit of work.
 
         Args:
-            gateway_status: Status from payment gateway
+            transactions: Rows keyed by PaymentTransaction attribute names
 
-        Returns:
-            str: Standardized payment status
+        Raises:
+            PaymentException: If the insert fails
         """
-        status_mapping = {
-            # Stripe statuses
-            "requires_payment_method": "pending",
-            "requires_confirmation": "pending",
-            "requires_action": "pending",
-            "processing": "processing",
-            "succeeded": "completed",
-            "canceled": "cancelled",
-            # MoMo statuses
-            "pending": "pending",
-            "success": "completed",
-            "failed": "failed",
-            # VNPay statuses
-            "00": "completed",  # Success
-            "01": "pending",  # Pending
-            "02": "failed",  # Failed
-        }
-
-        return status_mapping.get(gateway_status, "unknown")
+        if not transactions:
+            return
+
+        try:
+            # Core executemany; PostgreSQL batches it into multi-row VALUES
+            await self.db.execute(insert(PaymentTransaction), transactions)
+            await self.db.commit()
+
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Database error recording transactions: {e}")
+            raise PaymentException("Database error occurred")
+
+    def _history_statement(
+        self,
+        columns: tuple,
+        order_id: Optional[str],
+        user_id: Optional[int],
+        skip: int,
+        limit: int,
+    ):
+        """Build the newest-first history select for the given filters."""
+        stmt = select(*columns)
+
+        if order_id:
+            stmt = stmt.where(Payment.order_id == order_id)
+        if user_id:
+            stmt = stmt.where(Payment.user_id == user_id)
+
+        return stmt.order_by(Payment.created_at.desc()).offset(skip).limit(limit)
 
     async def get_payment_history(
         self,
@@ -427,46 +678,85 @@ class PaymentService:
         user_id: Optional[int] = None,
         skip: int = 0,
         limit: int = 20,
-    ) -> List[PaymentStatusResponse]:
+        include_transactions: bool = False,
+    ) -> List[Dict[str, Any]]:
         """
         Get payment history with optional filters.
 
+        Rows are returned as plain dicts shaped like PaymentStatusResponse,
+        with datetimes and Decimals left for the JSON encoder.
+
         Args:
             order_id: Filter by order ID
             user_id: Filter by user ID
             skip: Number of records to skip
             limit: Maximum records to return
+            include_transactions: Include each payment's transactions
 
         Returns:
-            List[PaymentStatusResponse]: Payment history
+            List[Dict[str, Any]]: Payment history
         """
         try:
-            query = self.db.query(Payment)
-
-            if order_id:
-                query = query.filter(Payment.order_id == order_id)
-            if user_id:
-                query = query.filter(Payment.user_id == user_id)
-
-            payments = (
-                query.order_by(Payment.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
+            columns = HISTORY_COLUMNS
+            if include_transactions:
+                columns = (Payment.id, *HISTORY_COLUMNS)
 
-            return [
-                PaymentStatusResponse(
-                    payment_intent_id=payment.gateway_payment_id,
-                    status=payment.status,
-                    amount=float(payment.final_amount),
-                    currency=payment.currency,
-                    created_at=payment.created_at.isoformat(),
-                    updated_at=payment.updated_at.isoformat(),
+            result = await self.db.execute(
+                self._history_statement(columns, order_id, user_id, skip, limit)
+            )
+            history = [dict(row._mapping, transactions=None) for row in result]
+
+            if include_transactions and history:
+                payments = {}
+                for payment in history:
+                    payment["transactions"] = []
+                    payments[payment.pop("id")] = payment
+
+                # One IN query for all children instead of one per payment
+                result = await self.db.execute(
+                    select(PaymentTransaction.payment_id, *TRANSACTION_COLUMNS)
+                    .where(PaymentTransaction.payment_id.in_(payments))
+                    .order_by(PaymentTransaction.id)
                 )
-                for payment in payments
-            ]
+                for row in result:
+                    transaction = dict(row._mapping)
+                    payments[transaction.pop("payment_id")]["transactions"].append(
+                        transaction
+                    )
+
+            await self.db.commit()
+            return history
 
         except Exception as e:
             logger.error(f"Failed to get payment history: {e}")
             raise PaymentException(f"Failed to get payment history: {str(e)}")
+
+    async def stream_payment_history(
+        self,
+        order_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream payment history rows through a server-side cursor.
+
+        Rows are fetched HISTORY_YIELD_PER at a time, so memory stays flat
+        however large the page is.
+
+        Args:
+            order_id: Filter by order ID
+            user_id: Filter by user ID
+            skip: Number of records to skip
+            limit: Maximum records to return
+
+        Yields:
+            Dict[str, Any]: Payment shaped like PaymentStatusResponse
+        """
+        stmt = self._history_statement(
+            HISTORY_COLUMNS, order_id, user_id, skip, limit
+        ).execution_options(yield_per=HISTORY_YIELD_PER)
+
+        result = await self.db.stream(stmt)
+        async for row in result:
+            yield dict(row._mapping, transactions=None)
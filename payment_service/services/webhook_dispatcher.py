@@ -0,0 +1,115 @@
+"""
+Webhook Dispatcher - Bounded queue of verified webhook events drained by workers
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WEBHOOK_QUEUE_SIZE = 1024
+WEBHOOK_WORKERS = 4
+WEBHOOK_DRAIN_TIMEOUT = 10.0
+WEBHOOK_RETRY_ATTEMPTS = 3
+WEBHOOK_RETRY_BACKOFF = 0.5
+
+WebhookHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class WebhookDispatcher:
+    """
+    Decouples webhook acknowledgement from event processing.
+
+    Endpoints verify the signature, submit the parsed event and answer
+    immediately; a fixed number of worker tasks process queued events, so a
+    burst of deliveries cannot pile up unbounded work on the event loop.
+
+    The gateway does not redeliver an acknowledged event, so a failed event
+    is retried with exponential backoff before it is given up on. Events
+    still queued or retrying when the process dies are lost.
+    """
+
+    def __init__(
+        self,
+        handler: WebhookHandler,
+        workers: int = WEBHOOK_WORKERS,
+        maxsize: int = WEBHOOK_QUEUE_SIZE,
+        retry_attempts: int = WEBHOOK_RETRY_ATTEMPTS,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.retry_attempts = retry_attempts
+        self._queue: asyncio.Queue[Tuple[str, Dict[str, Any]]] = asyncio.Queue(
+            maxsize=maxsize
+        )
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the worker tasks."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def stop(self, timeout: Optional[float] = WEBHOOK_DRAIN_TIMEOUT) -> None:
+        """Let workers drain queued events, then stop them."""
+        if not self._tasks:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Dropping {self._queue.qsize()} queued webhook events on shutdown"
+            )
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, source: str, event: Dict[str, Any]) -> bool:
+        """
+        Queue a verified webhook event.
+
+        Args:
+            source: Gateway the event came from (stripe, vnpay)
+            event: Parsed webhook payload
+
+        Returns:
+            False when the queue is full and the event was not accepted
+        """
+        try:
+            self._queue.put_nowait((source, event))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _worker(self) -> None:
+        """Process queued events one at a time."""
+        while True:
+            source, event = await self._queue.get()
+            try:
+                await self._process(source, event)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, source: str, event: Dict[str, Any]) -> None:
+        """Run the handler for one event, retrying failures with backoff."""
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                await self.handler(source, event)
+                return
+            except Exception as e:
+                if attempt == self.retry_attempts:
+                    logger.error(
+                        f"Giving up on {source} webhook after {attempt} attempts: "
+                        f"{e}; event: {event}"
+                    )
+                    return
+                logger.warning(
+                    f"Error processing {source} webhook (attempt {attempt}): {e}"
+                )
+                await asyncio.sleep(WEBHOOK_RETRY_BACKOFF * 2 ** (attempt - 1))
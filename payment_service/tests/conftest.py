@@ -3,7 +3,8 @@ Payment Service Test Configuration
 """
 
 import pytest
-import asyncio
+import pytest_asyncio
+from unittest.mock import AsyncMock, Mock
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 import sys
@@ -16,26 +17,65 @@ from main import app
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
-
-
-@pytest.fixture
 def client():
-    """Create a test client for the payment service."""
-    return TestClient(app)
+    """Create a test client for the payment service, started once per session."""
+    with TestClient(app) as c:
+        yield c
 
 
-@pytest.fixture
+@pytest_asyncio.fixture(scope="session")
 async def async_client():
-    """Create an async test client for the payment service."""
+    """Create an async test client for the payment service, shared per session."""
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
 
 
+@pytest.fixture(scope="session")
+def _service_mocks():
+    """Mocked session, gateways and promotion service, created once."""
+    db = AsyncMock()
+    # Session.add is synchronous
+    db.add = Mock()
+    return {
+        "db": db,
+        "stripe_gateway": AsyncMock(),
+        "momo_gateway": AsyncMock(),
+        "vnpay_gateway": AsyncMock(),
+        "promotion_service": AsyncMock(),
+    }
+
+
+@pytest.fixture(scope="session")
+def _payment_service(_service_mocks):
+    """PaymentService wired to the shared mocks, built once per session."""
+    from services.payment_service import PaymentService
+
+    return PaymentService(**_service_mocks)
+
+
+@pytest.fixture
+def payment_service(_payment_service, _service_mocks):
+    """Session-wide PaymentService with its mocks and status cache reset."""
+    from services.payment_service import _terminal_status_cache
+
+    for mock in _service_mocks.values():
+        mock.reset_mock(return_value=True, side_effect=True)
+    _terminal_status_cache.clear()
+    return _payment_service
+
+
+@pytest.fixture
+def db_session(payment_service, _service_mocks):
+    """Mocked database session behind payment_service."""
+    return _service_mocks["db"]
+
+
+@pytest.fixture
+def stripe_gateway(payment_service, _service_mocks):
+    """Mocked Stripe gateway behind payment_service."""
+    return _service_mocks["stripe_gateway"]
+
+
 @pytest.fixture
 def sample_payment_data():
     """Sample payment data for testing."""
@@ -0,0 +1,171 @@
+"""
+Tests for Payment Gateway implementations
+"""
+
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from core.config import get_gateway_settings
+from gateways.stripe import StripeGateway
+from gateways.vnpay import VNPayGateway
+
+
+class TestStripeWebhookSignature:
+    """Test cases for Stripe webhook signature verification."""
+
+    @pytest.fixture
+    def gateway(self, monkeypatch):
+        monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test_123")
+        monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", "whsec_test_secret")
+        get_gateway_settings.cache_clear()
+        return StripeGateway()
+
+    @staticmethod
+    def _sign(payload: bytes, secret: str, timestamp: int) -> str:
+        digest = hmac.new(
+            secret.encode("utf-8"),
+            str(timestamp).encode("utf-8") + b"." + payload,
+            hashlib.sha256,
+        ).hexdigest()
+        return f"t={timestamp},v1={digest}"
+
+    def test_valid_signature(self, gateway):
+        """Test that a correctly signed payload is accepted."""
+        payload = b'{"id": "evt_test", "type": "payment_intent.succeeded"}'
+        header = self._sign(payload, "whsec_test_secret", int(time.time()))
+
+        assert gateway.verify_webhook_signature(payload, header) is True
+
+    def test_tampered_payload(self, gateway):
+        """Test that a modified payload is rejected."""
+        payload = b'{"id": "evt_test", "type": "payment_intent.succeeded"}'
+        header = self._sign(payload, "whsec_test_secret", int(time.time()))
+
+        assert gateway.verify_webhook_signature(payload + b" ", header) is False
+
+    def test_expired_timestamp(self, gateway):
+        """Test that an old signature is rejected."""
+        payload = b'{"id": "evt_test"}'
+        header = self._sign(payload, "whsec_test_secret", int(time.time()) - 3600)
+
+        assert gateway.verify_webhook_signature(payload, header) is False
+
+    def test_malformed_header(self, gateway):
+        """Test that a header without t/v1 parts is rejected."""
+        assert gateway.verify_webhook_signature(b"{}", "garbage") is False
+
+    def test_missing_secret_rejects(self, monkeypatch):
+        """Test that nothing verifies when the webhook secret is unset."""
+        monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_live_123")
+        monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", "")
+        get_gateway_settings.cache_clear()
+        gateway = StripeGateway()
+        payload = b'{"id": "evt_test"}'
+        header = self._sign(payload, "", int(time.time()))
+
+        assert gateway.verify_webhook_signature(payload, header) is False
+
+
+class TestStripeIdempotency:
+    """Test cases for Stripe idempotency keys."""
+
+    @pytest.mark.asyncio
+    async def test_create_payment_intent_sends_idempotency_key(self, monkeypatch):
+        """Test that the order ID is turned into an Idempotency-Key header."""
+        monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test_123")
+        get_gateway_settings.cache_clear()
+        gateway = StripeGateway()
+
+        response = MagicMock(
+            status_code=200,
+            content=b'{"id": "pi_123", "status": "requires_payment_method"}',
+        )
+
+        with patch("gateways.stripe._get_http_client") as mock_client:
+            client = mock_client.return_value
+            client.post = AsyncMock(return_value=response)
+
+            await gateway.create_payment_intent(10.0, "usd", order_id="order_1")
+
+            headers = client.post.call_args.kwargs["headers"]
+            assert headers["Idempotency-Key"] == "pi:order_1"
+
+    @pytest.mark.asyncio
+    async def test_confirm_key_depends_on_confirmation_data(self, monkeypatch):
+        """Test that confirming with other params uses a different key."""
+        monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test_123")
+        get_gateway_settings.cache_clear()
+        gateway = StripeGateway()
+        gateway.sdk_mock_mode = False
+        gateway._pi_confirm = MagicMock(
+            return_value=MagicMock(
+                id="pi_123", status="succeeded", amount=1000, currency="usd"
+            )
+        )
+
+        await gateway.confirm_payment("pi_123", {"payment_method": "pm_a"})
+        await gateway.confirm_payment("pi_123", {"payment_method": "pm_a"})
+        await gateway.confirm_payment("pi_123", {"payment_method": "pm_b"})
+        await gateway.confirm_payment("pi_123", idempotency_key="client-key")
+
+        keys = [
+            call.kwargs["idempotency_key"]
+            for call in gateway._pi_confirm.call_args_list
+        ]
+        assert keys[0] == keys[1]
+        assert keys[0] != keys[2]
+        assert keys[0].startswith("confirm:pi_123:")
+        assert keys[3] == "client-key"
+
+
+class TestVNPayWebhookSignature:
+    """Test cases for VNPay webhook signature verification."""
+
+    @pytest.fixture
+    def gateway(self, monkeypatch):
+        monkeypatch.setenv("VNPAY_TMN_CODE", "TESTTMN1")
+        monkeypatch.setenv("VNPAY_HASH_SECRET", "vnpay_test_secret")
+        get_gateway_settings.cache_clear()
+        return VNPayGateway()
+
+    def test_valid_signature(self, gateway):
+        """Test that a correctly signed payload is accepted."""
+        params = {"vnp_TxnRef": "pi_vnpay_1", "vnp_ResponseCode": "00"}
+        signature = hmac.new(
+            b"vnpay_test_secret",
+            VNPayGateway._canonical_query(params).encode("utf-8"),
+            hashlib.sha512,
+        ).hexdigest()
+        payload = json.dumps({**params, "vnp_SecureHash": signature}).encode()
+
+        assert gateway.verify_webhook_signature(payload, signature) is True
+
+    def test_invalid_signature(self, gateway):
+        """Test that a wrong signature is rejected."""
+        payload = json.dumps({"vnp_TxnRef": "pi_vnpay_1"}).encode()
+
+        assert gateway.verify_webhook_signature(payload, "deadbeef") is False
+
+    def test_missing_secret_rejects(self, monkeypatch):
+        """Test that nothing verifies when the hash secret is unset."""
+        monkeypatch.setenv("VNPAY_HASH_SECRET", "")
+        get_gateway_settings.cache_clear()
+        payload = json.dumps({"vnp_TxnRef": "pi_vnpay_1"}).encode()
+
+        assert VNPayGateway().verify_webhook_signature(payload, "") is False
+
+    def test_payment_url_signature_round_trip(self, gateway):
+        """Test that a generated payment URL carries a verifiable signature."""
+        url = gateway.create_payment_url("pi_vnpay_1", 150000)
+        params = dict(parse_qsl(urlsplit(url).query))
+
+        assert params["vnp_TxnRef"] == "pi_vnpay_1"
+        assert gateway.verify_webhook_signature(
+            json.dumps(params).encode(), params["vnp_SecureHash"]
+        )
@@ -3,230 +3,246 @@ Tests for Payment Service Business Logic
 """
 
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
-import asyncio
+from unittest.mock import Mock
+from datetime import datetime, timezone
 from decimal import Decimal
+from types import SimpleNamespace
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from schemas.payment import (
+    PaymentIntentRequest,
+    PaymentConfirmationRequest,
+    PaymentMethodType,
+    RefundRequest,
+)
+from services.payment_service import PaymentException
+
+
+def _status_row(status="completed", amount="99.99"):
+    """Row shaped like the STATUS_COLUMNS returned by status updates."""
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return SimpleNamespace(
+        id=1,
+        gateway_payment_id="pi_test_123",
+        status=status,
+        final_amount=Decimal(amount),
+        currency="USD",
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _result(**methods):
+    """Database result whose accessors return the given values."""
+    result = Mock()
+    for name, value in methods.items():
+        getattr(result, name).return_value = value
+    return result
 
 
 class TestPaymentService:
     """Test cases for payment service business logic."""
 
     @pytest.mark.asyncio
-    async def test_stripe_payment_processing(self):
-        """Test Stripe payment processing logic."""
-        from services.payment_service import PaymentService
-        
-        with patch("gateways.stripe_gateway.StripeGateway") as mock_stripe:
-            mock_stripe.return_value.create_payment_intent = AsyncMock(return_value={
-                "id": "pi_test_123",
-                "client_secret": "pi_test_123_secret",
-                "status": "requires_payment_method"
-            })
-            
-            service = PaymentService()
-            result = await service.create_payment_intent(
+    async def test_create_payment_intent(
+        self, payment_service, db_session, stripe_gateway
+    ):
+        """Test that a payment intent is created through the Stripe gateway."""
+        db_session.execute.return_value = _result(scalar_one=42)
+        stripe_gateway.create_payment_intent.return_value = {
+            "id": "pi_test_123",
+            "client_secret": "pi_test_123_secret",
+            "status": "requires_payment_method",
+        }
+
+        result = await payment_service.create_payment_intent(
+            PaymentIntentRequest(
                 amount=Decimal("99.99"),
                 currency="USD",
-                customer_id="cus_123"
+                payment_method=PaymentMethodType.STRIPE,
+                order_id="order_123",
             )
-            
-            assert result["id"] == "pi_test_123"
-            assert "client_secret" in result
+        )
+
+        assert result.payment_intent_id == "pi_test_123"
+        assert result.amount == 99.99
+        assert result.status == "requires_payment_method"
+        metadata = stripe_gateway.create_payment_intent.call_args.kwargs["metadata"]
+        assert metadata["payment_id"] == 42
 
     @pytest.mark.asyncio
-    async def test_paypal_payment_processing(self):
-        """Test PayPal payment processing logic."""
-        from services.payment_service import PaymentService
-        
-        with patch("gateways.paypal_gateway.PayPalGateway") as mock_paypal:
-            mock_paypal.return_value.create_payment = AsyncMock(return_value={
-                "id": "PAY-123",
-                "state": "created",
-                "approval_url": "https://paypal.com/approve"
-            })
-            
-            service = PaymentService()
-            result = await service.create_paypal_payment(
+    async def test_create_payment_intent_applies_promotion(
+        self, payment_service, db_session, stripe_gateway, _service_mocks
+    ):
+        """Test that a valid promotion code discounts the charged amount."""
+        db_session.execute.return_value = _result(scalar_one=42)
+        _service_mocks["promotion_service"].apply_promotion.return_value = {
+            "valid": True,
+            "discount_amount": 10,
+        }
+        stripe_gateway.create_payment_intent.return_value = {
+            "id": "pi_test_123",
+            "status": "requires_payment_method",
+        }
+
+        result = await payment_service.create_payment_intent(
+            PaymentIntentRequest(
                 amount=Decimal("99.99"),
-                currency="USD",
-                return_url="http://example.com/return"
+                payment_method=PaymentMethodType.STRIPE,
+                promotion_code="WELCOME10",
             )
-            
-            assert result["id"] == "PAY-123"
-            assert "approval_url" in result
+        )
+
+        assert result.amount == 89.99
+        assert stripe_gateway.create_payment_intent.call_args.kwargs["amount"] == 89.99
 
     @pytest.mark.asyncio
-    async def test_payment_validation(self):
-        """Test payment data validation."""
-        from services.payment_service import PaymentService
-        
-        service = PaymentService()
-        
-        # Valid payment data
-        valid_data = {
-            "amount": Decimal("100.00"),
-            "currency": "USD",
-            "payment_method": "credit_card",
-            "card_details": {
-                "number": "4111111111111111",
-                "exp_month": 12,
-                "exp_year": 2025,
-                "cvc": "123"
-            }
-        }
-        
-        assert service.validate_payment_data(valid_data) is True
-        
-        # Invalid payment data
-        invalid_data = {
-            "amount": Decimal("-10.00"),  # Negative amount
-            "currency": "INVALID",
-            "payment_method": ""
-        }
-        
-        assert service.validate_payment_data(invalid_data) is False
+    async def test_create_payment_intent_gateway_failure(
+        self, payment_service, db_session, stripe_gateway
+    ):
+        """Test that a gateway error surfaces as a PaymentException."""
+        db_session.execute.return_value = _result(scalar_one=42)
+        stripe_gateway.create_payment_intent.side_effect = Exception("Card declined")
+
+        with pytest.raises(PaymentException):
+            await payment_service.create_payment_intent(
+                PaymentIntentRequest(
+                    amount=Decimal("99.99"), payment_method=PaymentMethodType.STRIPE
+                )
+            )
+
+        db_session.rollback.assert_awaited()
+
+    def test_payment_intent_request_validation(self):
+        """Test that non-positive amounts and unknown methods are rejected."""
+        with pytest.raises(ValidationError):
+            PaymentIntentRequest(amount=Decimal("-10.00"), payment_method="stripe")
+
+        with pytest.raises(ValidationError):
+            PaymentIntentRequest(amount=Decimal("10.00"), payment_method="paypal")
 
     @pytest.mark.asyncio
-    async def test_refund_processing(self):
-        """Test refund processing logic."""
-        from services.payment_service import PaymentService
-        
-        with patch("gateways.stripe_gateway.StripeGateway") as mock_stripe:
-            mock_stripe.return_value.create_refund = AsyncMock(return_value={
-                "id": "re_test_123",
-                "status": "succeeded",
-                "amount": 5000
-            })
-            
-            service = PaymentService()
-            result = await service.process_refund(
-                payment_id="pi_123",
-                amount=Decimal("50.00"),
-                reason="Customer request"
+    async def test_confirm_payment(self, payment_service, db_session, stripe_gateway):
+        """Test that confirming maps the gateway status onto the payment."""
+        stripe_gateway.confirm_payment.return_value = {"status": "succeeded"}
+        db_session.execute.side_effect = [
+            _result(scalar_one_or_none=1),
+            _result(first=_status_row()),
+        ]
+
+        result = await payment_service.confirm_payment(
+            PaymentConfirmationRequest(
+                payment_intent_id="pi_test_123",
+                payment_method=PaymentMethodType.STRIPE,
             )
-            
-            assert result["id"] == "re_test_123"
-            assert result["status"] == "succeeded"
+        )
+
+        assert result.payment_intent_id == "pi_test_123"
+        assert result.status == "completed"
+        db_session.commit.assert_awaited()
 
     @pytest.mark.asyncio
-    async def test_payment_status_tracking(self):
-        """Test payment status tracking."""
-        from services.payment_service import PaymentService
-        
-        with patch("core.database.get_db") as mock_db:
-            mock_session = Mock()
-            mock_db.return_value = mock_session
-            
-            service = PaymentService()
-            
-            # Test status update
-            await service.update_payment_status("pay_123", "succeeded")
-            
-            # Verify database interaction
-            mock_session.execute.assert_called()
+    async def test_confirm_unknown_payment(
+        self, payment_service, db_session, stripe_gateway
+    ):
+        """Test that an unknown intent is never confirmed with the gateway."""
+        db_session.execute.return_value = _result(scalar_one_or_none=None)
+
+        with pytest.raises(PaymentException):
+            await payment_service.confirm_payment(
+                PaymentConfirmationRequest(
+                    payment_intent_id="pi_missing",
+                    payment_method=PaymentMethodType.STRIPE,
+                )
+            )
+
+        stripe_gateway.confirm_payment.assert_not_called()
+        db_session.rollback.assert_awaited()
 
     @pytest.mark.asyncio
-    async def test_webhook_signature_verification(self):
-        """Test webhook signature verification."""
-        from services.webhook_service import WebhookService
-        
-        service = WebhookService()
-        
-        # Mock webhook payload and signature
-        payload = '{"id": "evt_test", "type": "payment_intent.succeeded"}'
-        signature = "test_signature"
-        secret = "whsec_test_secret"
-        
-        with patch("stripe.Webhook.construct_event") as mock_construct:
-            mock_construct.return_value = {"id": "evt_test", "type": "payment_intent.succeeded"}
-            
-            result = service.verify_webhook_signature(payload, signature, secret)
-            
-            assert result is not None
-            mock_construct.assert_called_once_with(payload, signature, secret)
+    async def test_partial_refund(self, payment_service, db_session, stripe_gateway):
+        """Test that refunding part of a completed payment succeeds."""
+        payment = SimpleNamespace(
+            id=1, status="completed", final_amount=Decimal("99.99")
+        )
+        db_session.execute.side_effect = [
+            _result(scalar_one_or_none=payment),
+            _result(scalar_one_or_none=datetime(2024, 1, 1, tzinfo=timezone.utc)),
+        ]
+        stripe_gateway.refund_payment.return_value = {
+            "id": "re_test_123",
+            "status": "succeeded",
+        }
+
+        result = await payment_service.refund_payment(
+            "pi_test_123",
+            PaymentMethodType.STRIPE,
+            RefundRequest(amount=Decimal("50.00"), reason="Customer request"),
+        )
+
+        assert result.refund_id == "re_test_123"
+        assert result.amount == 50.0
+        stripe_gateway.refund_payment.assert_awaited_once_with("pi_test_123", 50.0)
 
     @pytest.mark.asyncio
-    async def test_payment_retry_mechanism(self):
-        """Test payment retry mechanism on temporary failures."""
-        from services.payment_service import PaymentService
-        
-        with patch("gateways.stripe_gateway.StripeGateway") as mock_stripe:
-            # First call fails with temporary error, second succeeds
-            mock_stripe.return_value.create_payment_intent = AsyncMock(
-                side_effect=[
-                    Exception("Rate limit exceeded"),
-                    {"id": "pi_123", "status": "succeeded"}
-                ]
-            )
-            
-            service = PaymentService()
-            result = await service.create_payment_intent_with_retry(
-                amount=Decimal("100.00"),
-                currency="USD",
-                max_retries=2
+    async def test_refund_requires_completed_payment(
+        self, payment_service, db_session, stripe_gateway
+    ):
+        """Test that pending payments cannot be refunded."""
+        payment = SimpleNamespace(id=1, status="pending", final_amount=Decimal("10"))
+        db_session.execute.return_value = _result(scalar_one_or_none=payment)
+
+        with pytest.raises(PaymentException):
+            await payment_service.refund_payment(
+                "pi_test_123", PaymentMethodType.STRIPE, RefundRequest()
             )
-            
-            assert result["id"] == "pi_123"
-            assert mock_stripe.return_value.create_payment_intent.call_count == 2
+
+        stripe_gateway.refund_payment.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_terminal_status_served_from_cache(
+        self, payment_service, db_session, stripe_gateway
+    ):
+        """Test that a completed status is not fetched from the gateway again."""
+        stripe_gateway.get_payment_status.return_value = {"status": "succeeded"}
+        db_session.execute.return_value = _result(first=_status_row())
+
+        first = await payment_service.get_payment_status(
+            "pi_test_123", PaymentMethodType.STRIPE
+        )
+        second = await payment_service.get_payment_status(
+            "pi_test_123", PaymentMethodType.STRIPE
+        )
+
+        assert first.status == second.status == "completed"
+        stripe_gateway.get_payment_status.assert_awaited_once()
 
     @pytest.mark.asyncio
-    async def test_subscription_payment_handling(self):
-        """Test subscription payment handling."""
-        from services.payment_service import PaymentService
-        
-        with patch("gateways.stripe_gateway.StripeGateway") as mock_stripe:
-            mock_stripe.return_value.create_subscription = AsyncMock(return_value={
-                "id": "sub_123",
-                "status": "active",
-                "current_period_end": 1693526400
-            })
-            
-            service = PaymentService()
-            result = await service.create_subscription(
-                customer_id="cus_123",
-                price_id="price_123",
-                payment_method="pm_123"
+    async def test_status_of_unknown_payment(
+        self, payment_service, db_session, stripe_gateway
+    ):
+        """Test that polling an unknown payment raises a PaymentException."""
+        stripe_gateway.get_payment_status.return_value = {"status": "processing"}
+        db_session.execute.return_value = _result(first=None)
+
+        with pytest.raises(PaymentException):
+            await payment_service.get_payment_status(
+                "pi_missing", PaymentMethodType.STRIPE
             )
-            
-            assert result["id"] == "sub_123"
-            assert result["status"] == "active"
 
     @pytest.mark.asyncio
-    async def test_fraud_detection(self):
-        """Test fraud detection logic."""
-        from services.payment_service import PaymentService
-        
-        service = PaymentService()
-        
-        # Suspicious payment (high amount from new customer)
-        suspicious_payment = {
-            "amount": Decimal("10000.00"),
-            "customer_id": "new_customer_123",
-            "payment_method": "credit_card",
-            "ip_address": "suspicious.ip.com"
-        }
-        
-        with patch("services.fraud_detection.FraudDetectionService") as mock_fraud:
-            mock_fraud.return_value.analyze_payment = AsyncMock(return_value={
-                "risk_score": 85,
-                "recommendation": "review"
-            })
-            
-            result = await service.analyze_payment_risk(suspicious_payment)
-            
-            assert result["risk_score"] == 85
-            assert result["recommendation"] == "review"
-
-    def test_payment_amount_formatting(self):
-        """Test payment amount formatting for different gateways."""
-        from services.payment_service import PaymentService
-        
-        service = PaymentService()
-        
-        # Stripe expects amounts in cents
-        stripe_amount = service.format_amount_for_stripe(Decimal("99.99"))
-        assert stripe_amount == 9999
-        
-        # PayPal expects amounts as decimal strings
-        paypal_amount = service.format_amount_for_paypal(Decimal("99.99"))
-        assert paypal_amount == "99.99"
+    async def test_status_update_failure_rolls_back(
+        self, payment_service, db_session, stripe_gateway
+    ):
+        """Test that a failed status write does not leave the session aborted."""
+        stripe_gateway.get_payment_status.return_value = {"status": "succeeded"}
+        db_session.execute.side_effect = SQLAlchemyError("deadlock detected")
+
+        with pytest.raises(PaymentException):
+            await payment_service.get_payment_status(
+                "pi_test_123", PaymentMethodType.STRIPE
+            )
+
+        db_session.rollback.assert_awaited_once()
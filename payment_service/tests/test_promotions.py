@@ -0,0 +1,117 @@
+"""
+Tests for Promotion Service
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from promotions.promotion_service import PromotionService
+
+
+class TestPromotionService:
+    """Test cases for PromotionService."""
+
+    @pytest.fixture
+    def promotion_service(self):
+        return PromotionService()
+
+    @pytest.mark.asyncio
+    async def test_available_promotions_respect_min_amount(self, promotion_service):
+        """Test that only promotions the amount qualifies for are listed."""
+        codes = [
+            promotion["code"]
+            for promotion in await promotion_service.get_available_promotions(60)
+        ]
+
+        assert codes == ["WELCOME10"]
+
+    @pytest.mark.asyncio
+    async def test_created_promotion_is_listed(self, promotion_service):
+        """Test that creating a promotion refreshes the active snapshot."""
+        await promotion_service.get_available_promotions(0)
+        await promotion_service.create_promotion("free5", discount_amount=5)
+
+        codes = [
+            promotion["code"]
+            for promotion in await promotion_service.get_available_promotions(0)
+        ]
+
+        assert "FREE5" in codes
+
+    @pytest.mark.asyncio
+    async def test_deactivated_promotion_is_not_listed(self, promotion_service):
+        """Test that deactivation removes the promotion from listings."""
+        await promotion_service.get_available_promotions(200)
+        assert await promotion_service.deactivate_promotion("save20") is True
+
+        codes = [
+            promotion["code"]
+            for promotion in await promotion_service.get_available_promotions(200)
+        ]
+
+        assert codes == ["WELCOME10"]
+
+    @pytest.mark.asyncio
+    async def test_apply_promotion_counts_usage(self, promotion_service):
+        """Test that applying a promotion increments its usage."""
+        result = await promotion_service.apply_promotion("welcome10", 100)
+
+        assert result["valid"] is True
+        assert result["discount_amount"] == 10
+
+        await promotion_service.flush_usage()
+        assert promotion_service.promotions["WELCOME10"].used_count == 151
+
+    @pytest.mark.asyncio
+    async def test_pending_usage_counts_towards_limit(self, promotion_service):
+        """Test that unflushed usage is enforced against the usage limit."""
+        await promotion_service.create_promotion(
+            "once", discount_amount=5, usage_limit=1
+        )
+
+        first = await promotion_service.apply_promotion("once", 10)
+        second = await promotion_service.apply_promotion("once", 10)
+
+        assert first["valid"] is True
+        assert second["valid"] is False
+
+    @pytest.mark.asyncio
+    async def test_validation_cache_cleared_on_deactivate(self, promotion_service):
+        """Test that deactivating a code invalidates cached validations."""
+        first = await promotion_service.validate_promotion_code("save20", 150)
+        await promotion_service.deactivate_promotion("save20")
+        second = await promotion_service.validate_promotion_code("save20", 150)
+
+        assert first["valid"] is True
+        assert second == {"valid": False, "error": "Promotion code is inactive"}
+
+    @pytest.mark.asyncio
+    async def test_unknown_code_not_cached(self, promotion_service):
+        """Test that unknown codes are rejected without filling the cache."""
+        result = await promotion_service.validate_promotion_code("nope", 100)
+
+        assert result == {"valid": False, "error": "Invalid promotion code"}
+        assert len(promotion_service._validation_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_validation_uses_supplied_now(self, promotion_service):
+        """Test that a caller-supplied timestamp drives the validity window."""
+        later = datetime.now() + timedelta(days=60)
+
+        result = await promotion_service.validate_promotion_code(
+            "save20", 150, now=later
+        )
+
+        assert result["error"] == "Promotion code has expired or not yet active"
+
+    @pytest.mark.asyncio
+    async def test_supplied_now_bypasses_validation_cache(self, promotion_service):
+        """Test that a cached current-time result is not reused for another now."""
+        current = await promotion_service.validate_promotion_code("save20", 150)
+        later = await promotion_service.validate_promotion_code(
+            "save20", 150, now=datetime.now() + timedelta(days=60)
+        )
+
+        assert current["valid"] is True
+        assert later["error"] == "Promotion code has expired or not yet active"
@@ -2,12 +2,94 @@
 Validation Utilities - Enhanced data validation and sanitization functions for payments.
 """
 
+import hashlib
+import hmac
 import re
-from typing import Optional, Tuple, Dict
-from decimal import Decimal
-
-
-def validate_amount(amount: float, currency: str = "USD") -> Tuple[bool, str]:
+import string
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from decimal import ROUND_HALF_EVEN, Decimal
+
+__all__ = [
+    "validate_amount",
+    "validate_currency",
+    "validate_payment_method",
+    "validate_payment_method_currency_combination",
+    "validate_payment_intent_id",
+    "validate_promotion_code",
+    "validate_order_id",
+    "sanitize_string",
+    "format_amount",
+    "to_minor_units",
+    "validate_webhook_signature",
+    "validate_phone_number",
+    "validate_email",
+    "validate_payment_request",
+    "calculate_discount_amount",
+    "calculate_final_amount",
+    "calculate_discounts_bulk",
+]
+
+# Money math stays in Decimal; limits are parsed once at import
+_CENT = Decimal("0.01")
+_HUNDRED = Decimal("100")
+_ZERO_AMOUNT = Decimal("0.00")
+
+_DEFAULT_MIN_AMOUNT = Decimal("0.50")
+_MIN_AMOUNTS = {
+    "USD": Decimal("0.50"),
+    "EUR": Decimal("0.50"),
+    "GBP": Decimal("0.30"),
+    "VND": Decimal("1000"),
+    "JPY": Decimal("50"),
+}
+
+_DEFAULT_MAX_AMOUNT = Decimal("999999.99")
+_MAX_AMOUNTS = {
+    "USD": Decimal("999999.99"),
+    "EUR": Decimal("999999.99"),
+    "GBP": Decimal("999999.99"),
+    "VND": Decimal("999999999"),
+    "JPY": Decimal("9999999"),
+}
+
+_SUPPORTED_CURRENCIES = frozenset(
+    {"USD", "EUR", "GBP", "VND", "JPY", "AUD", "CAD", "CHF", "CNY", "SGD"}
+)
+_SUPPORTED_METHODS = frozenset(
+    {"stripe", "momo", "vnpay", "paypal", "apple_pay", "google_pay"}
+)
+
+# Currencies each payment method accepts
+_CARD_CURRENCIES = frozenset({"USD", "EUR", "GBP", "AUD", "CAD", "CHF", "JPY", "SGD"})
+_METHOD_CCY: Dict[str, frozenset] = {
+    "stripe": _CARD_CURRENCIES,
+    "momo": frozenset({"VND"}),
+    "vnpay": frozenset({"VND"}),
+    "paypal": frozenset({"USD", "EUR", "GBP", "AUD", "CAD", "JPY"}),
+    "apple_pay": _CARD_CURRENCIES,
+    "google_pay": _CARD_CURRENCIES,
+}
+
+# Character sets for the ID-style validators; subset checks run in C
+_ID_ALLOWED = frozenset(string.ascii_letters + string.digits + "_-")
+_PROMO_ALLOWED = frozenset(string.ascii_letters + string.digits + "-")
+
+# Patterns compiled once at import instead of looked up on every call
+_EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", re.ASCII)
+
+# Characters stripped by sanitize_string
+_SANITIZE_TABLE = str.maketrans("", "", "<>\"'")
+
+
+def _to_decimal(value: Union[Decimal, int, float]) -> Decimal:
+    """Coerce a number to Decimal, skipping the parse for Decimal inputs."""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def validate_amount(
+    amount: Union[Decimal, int, float], currency: str = "USD"
+) -> Tuple[bool, str]:
     """
     Validate payment amount with currency-specific rules.
 
@@ -21,32 +103,19 @@ def validate_amount(amount: float, currency: str = "USD") -> Tuple[bool, str]:
     if not isinstance(amount, (int, float, Decimal)):
         return False, "Amount must be a number"
 
+    amount = _to_decimal(amount)
     if amount <= 0:
         return False, "Amount must be greater than 0"
 
+    currency_code = currency.upper()
+
     # Currency-specific minimum amounts
-    min_amounts = {
-        "USD": 0.50,
-        "EUR": 0.50,
-        "GBP": 0.30,
-        "VND": 1000,
-        "JPY": 50,
-    }
-
-    min_amount = min_amounts.get(currency.upper(), 0.50)
+    min_amount = _MIN_AMOUNTS.get(currency_code, _DEFAULT_MIN_AMOUNT)
     if amount < min_amount:
         return False, f"Amount must be at least {min_amount} {currency}"
 
     # Maximum amount check
-    max_amounts = {
-        "USD": 999999.99,
-        "EUR": 999999.99,
-        "GBP": 999999.99,
-        "VND": 999999999,
-        "JPY": 9999999,
-    }
-
-    max_amount = max_amounts.get(currency.upper(), 999999.99)
+    max_amount = _MAX_AMOUNTS.get(currency_code, _DEFAULT_MAX_AMOUNT)
     if amount > max_amount:
         return False, f"Amount exceeds maximum limit of {max_amount} {currency}"
 
@@ -66,26 +135,16 @@ def validate_currency(currency: str) -> Tuple[bool, str]:
     if not currency:
         return False, "Currency code is required"
 
+    return _check_currency(currency, currency.upper())
+
+
+def _check_currency(currency: str, currency_code: str) -> Tuple[bool, str]:
+    """Check a non-empty currency whose upper-cased code the caller already has."""
     # Check if it's a valid 3-letter currency code
-    pattern = r"^[A-Z]{3}$"
-    if not re.match(pattern, currency.upper()):
+    if not (len(currency) == 3 and currency.isascii() and currency.isalpha()):
         return False, "Currency code must be 3 uppercase letters"
 
-    # List of supported currencies
-    supported_currencies = {
-        "USD",
-        "EUR",
-        "GBP",
-        "VND",
-        "JPY",
-        "AUD",
-        "CAD",
-        "CHF",
-        "CNY",
-        "SGD",
-    }
-
-    if currency.upper() not in supported_currencies:
+    if currency_code not in _SUPPORTED_CURRENCIES:
         return False, f"Currency {currency} is not supported"
 
     return True, ""
@@ -104,9 +163,7 @@ def validate_payment_method(payment_method: str) -> Tuple[bool, str]:
     if not payment_method:
         return False, "Payment method is required"
 
-    supported_methods = {"stripe", "momo", "vnpay", "paypal", "apple_pay", "google_pay"}
-
-    if payment_method.lower() not in supported_methods:
+    if payment_method.lower() not in _SUPPORTED_METHODS:
         return False, f"Payment method '{payment_method}' is not supported"
 
     return True, ""
@@ -125,17 +182,7 @@ def validate_payment_method_currency_combination(
     Returns:
         Tuple of (is_valid, error_message)
     """
-    # Payment method specific currency support
-    method_currency_support = {
-        "stripe": {"USD", "EUR", "GBP", "AUD", "CAD", "CHF", "JPY", "SGD"},
-        "momo": {"VND"},
-        "vnpay": {"VND"},
-        "paypal": {"USD", "EUR", "GBP", "AUD", "CAD", "JPY"},
-        "apple_pay": {"USD", "EUR", "GBP", "AUD", "CAD", "CHF", "JPY", "SGD"},
-        "google_pay": {"USD", "EUR", "GBP", "AUD", "CAD", "CHF", "JPY", "SGD"},
-    }
-
-    supported_currencies = method_currency_support.get(payment_method.lower())
+    supported_currencies = _METHOD_CCY.get(payment_method.lower())
     if not supported_currencies:
         return False, f"Unknown payment method: {payment_method}"
 
@@ -146,17 +193,6 @@ def validate_payment_method_currency_combination(
         )
 
     return True, ""
-    """
-    Validate payment method.
-
-    Args:
-        payment_method: Payment method to validate
-
-    Returns:
-        True if valid, False otherwise
-    """
-    valid_methods = ["stripe", "momo", "vnpay"]
-    return payment_method.lower() in valid_methods
 
 
 def validate_payment_intent_id(payment_intent_id: str) -> bool:
@@ -173,8 +209,7 @@ def validate_payment_intent_id(payment_intent_id: str) -> bool:
         return False
 
     # Check if it's a valid format (alphanumeric with possible hyphens/underscores)
-    pattern = r"^[a-zA-Z0-9_-]+$"
-    return re.match(pattern, payment_intent_id) is not None
+    return _ID_ALLOWED.issuperset(payment_intent_id)
 
 
 def validate_promotion_code(promotion_code: str) -> bool:
@@ -191,8 +226,7 @@ def validate_promotion_code(promotion_code: str) -> bool:
         return False
 
     # Promotion codes should be alphanumeric with possible hyphens
-    pattern = r"^[a-zA-Z0-9-]+$"
-    return re.match(pattern, promotion_code) is not None
+    return _PROMO_ALLOWED.issuperset(promotion_code)
 
 
 def validate_order_id(order_id: str) -> bool:
@@ -209,8 +243,7 @@ def validate_order_id(order_id: str) -> bool:
         return False
 
     # Order IDs should be alphanumeric with possible hyphens/underscores
-    pattern = r"^[a-zA-Z0-9_-]+$"
-    return re.match(pattern, order_id) is not None
+    return _ID_ALLOWED.issuperset(order_id)
 
 
 def sanitize_string(input_str: str) -> str:
@@ -227,11 +260,11 @@ def sanitize_string(input_str: str) -> str:
         return ""
 
     # Remove potentially dangerous characters
-    sanitized = re.sub(r'[<>"\']', "", input_str)
+    sanitized = input_str.translate(_SANITIZE_TABLE)
     return sanitized.strip()
 
 
-def format_amount(amount: float, currency: str = "USD") -> str:
+def format_amount(amount: Union[Decimal, float], currency: str = "USD") -> str:
     """
     Format amount with currency.
 
@@ -243,43 +276,50 @@ def format_amount(amount: float, currency: str = "USD") -> str:
         Formatted amount string
     """
     try:
-        decimal_amount = Decimal(str(amount))
-        return f"{decimal_amount:.2f} {currency}"
+        return f"{_to_decimal(amount):.2f} {currency}"
     except (ValueError, TypeError):
         return f"{amount} {currency}"
 
 
-def validate_webhook_signature(signature: str, payload: str, secret: str) -> bool:
+def to_minor_units(amount: Union[Decimal, int, float]) -> int:
+    """
+    Convert an amount to the gateway's smallest currency unit (e.g. cents).
+
+    Args:
+        amount: Amount in major units
+
+    Returns:
+        Amount in minor units, rounded half to even
+    """
+    return int((_to_decimal(amount) * _HUNDRED).to_integral_value(ROUND_HALF_EVEN))
+
+
+@lru_cache(maxsize=16)
+def _webhook_hmac(secret: str) -> "hmac.HMAC":
+    """Keyed HMAC-SHA256 state for a secret; copies skip re-hashing the key."""
+    return hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+def validate_webhook_signature(
+    signature: str, payload: Union[str, bytes], secret: str
+) -> bool:
     """
-    Validate webhook signature.
+    Validate an HMAC-SHA256 webhook signature.
 
     Args:
-        signature: Webhook signature
-        payload: Webhook payload
+        signature: Hex-encoded webhook signature
+        payload: Raw webhook payload; pass bytes to skip re-encoding
         secret: Webhook secret
 
     Returns:
         True if valid, False otherwise
     """
-    # This is a placeholder implementation
-    # In a real application, you would implement proper signature validation
-    # based on the specific payment gateway's requirements
-
     if not signature or not payload or not secret:
         return False
 
-    # Add your signature validation logic here
-    # Example for Stripe:
-    # import hmac
-    # import hashlib
-    # expected_signature = hmac.new(
-    #     secret.encode('utf-8'),
-    #     payload.encode('utf-8'),
-    #     hashlib.sha256
-    # ).hexdigest()
-    # return hmac.compare_digest(signature, expected_signature)
-
-    return True
+    mac = _webhook_hmac(secret).copy()
+    mac.update(payload if isinstance(payload, bytes) else payload.encode("utf-8"))
+    return hmac.compare_digest(mac.hexdigest(), signature)
 
 
 def validate_phone_number(phone: str) -> bool:
@@ -295,11 +335,11 @@ def validate_phone_number(phone: str) -> bool:
     if not phone:
         return False
 
-    # Remove all non-digit characters
-    digits_only = re.sub(r"\D", "", phone)
+    # Count digits, ignoring any formatting characters
+    digit_count = sum(map(str.isdecimal, phone))
 
     # Check if it's a valid length (10-15 digits)
-    if len(digits_only) < 10 or len(digits_only) > 15:
+    if digit_count < 10 or digit_count > 15:
         return False
 
     return True
@@ -318,13 +358,62 @@ def validate_email(email: str) -> bool:
     if not email:
         return False
 
-    pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-    return re.match(pattern, email) is not None
+    return _EMAIL_RE.fullmatch(email) is not None
+
+
+def validate_payment_request(fields: Dict[str, str]) -> Tuple[bool, str]:
+    """
+    Validate the identifier fields of a payment request in one pass.
+
+    Only the fields present in ``fields`` are checked; the first failing
+    field is reported.
+
+    Args:
+        fields: Mapping with any of currency, payment_method, payment_intent_id,
+            order_id, promotion_code and email
+
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    currency = fields.get("currency")
+    if currency is not None:
+        if not currency:
+            return False, "Currency code is required"
+        currency_code = currency.upper()
+        valid, error = _check_currency(currency, currency_code)
+        if not valid:
+            return False, error
+
+    payment_method = fields.get("payment_method")
+    if payment_method is not None:
+        method = payment_method.lower()
+        if method not in _SUPPORTED_METHODS:
+            return False, f"Payment method '{payment_method}' is not supported"
+        if currency is not None and currency_code not in _METHOD_CCY[method]:
+            return (
+                False,
+                f"Payment method '{payment_method}' does not support currency '{currency}'",
+            )
+
+    for name in ("payment_intent_id", "order_id"):
+        value = fields.get(name)
+        if value is not None and not (value and _ID_ALLOWED.issuperset(value)):
+            return False, f"Invalid {name}"
+
+    promotion_code = fields.get("promotion_code")
+    if promotion_code is not None and not validate_promotion_code(promotion_code):
+        return False, "Invalid promotion_code"
+
+    email = fields.get("email")
+    if email is not None and not validate_email(email):
+        return False, "Invalid email"
+
+    return True, ""
 
 
 def calculate_discount_amount(
-    original_amount: float, discount_percentage: float
-) -> float:
+    original_amount: Union[Decimal, float], discount_percentage: Union[Decimal, float]
+) -> Decimal:
     """
     Calculate discount amount.
 
@@ -333,15 +422,18 @@ def calculate_discount_amount(
         discount_percentage: Discount percentage (0-100)
 
     Returns:
-        Discount amount
+        Discount amount, rounded to cents
     """
     if discount_percentage < 0 or discount_percentage > 100:
-        return 0.0
+        return _ZERO_AMOUNT
 
-    return original_amount * (discount_percentage / 100)
+    discount = _to_decimal(original_amount) * _to_decimal(discount_percentage)
+    return (discount / _HUNDRED).quantize(_CENT)
 
 
-def calculate_final_amount(original_amount: float, discount_amount: float) -> float:
+def calculate_final_amount(
+    original_amount: Union[Decimal, float], discount_amount: Union[Decimal, float]
+) -> Decimal:
     """
     Calculate final amount after discount.
 
@@ -352,5 +444,31 @@ def calculate_final_amount(original_amount: float, discount_amount: float) -> fl
     Returns:
         Final amount
     """
-    final_amount = original_amount - discount_amount
-    return max(0.0, final_amount)
+    final_amount = _to_decimal(original_amount) - _to_decimal(discount_amount)
+    return max(_ZERO_AMOUNT, final_amount)
+
+
+def calculate_discounts_bulk(
+    amounts: Iterable[Union[Decimal, float]],
+    discount_percentages: Iterable[Union[Decimal, float]],
+) -> List[Decimal]:
+    """
+    Calculate discount amounts for many line items at once.
+
+    Args:
+        amounts: Line item amounts
+        discount_percentages: Discount percentage (0-100) for each line item
+
+    Returns:
+        Discount amounts in line item order, rounded to cents
+    """
+    discounts = []
+    for amount, percentage in zip(amounts, discount_percentages):
+        percentage = _to_decimal(percentage)
+        if percentage < 0 or percentage > _HUNDRED:
+            discounts.append(_ZERO_AMOUNT)
+            continue
+        discounts.append(
+            (_to_decimal(amount) * percentage / _HUNDRED).quantize(_CENT)
+        )
+    return discounts
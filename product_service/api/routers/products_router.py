@@ -2,7 +2,9 @@
 Products Router - Consolidated router for products, categories, and inventory management.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
@@ -12,6 +14,7 @@ from schemas.product import (
     ProductUpdate,
     ProductRead,
     ProductListResponse,
+    ProductCursorResponse,
 )
 from schemas.category import (
     CategoryCreate,
@@ -23,22 +26,58 @@ from schemas.inventory import (
     InventoryUpdate,
     InventoryRead,
     StockAlert,
+    InventoryReservation,
+    InventoryBulkUpdate,
 )
 from schemas.common import MessageResponse
+from shared_code.cache import get_cache_service
 from modules.catalog.catalog_service import CatalogService
 from modules.inventory.inventory_service import InventoryService
+from modules.inventory.stock_reservations import StockReservationService
+from utils.http_cache import cached_json_response
 
 router = APIRouter(prefix="/api/v1", tags=["products"])
 
+# Category reads are cache-aside; every category write drops the cached copies
+CATEGORY_CACHE_TTL = 300
+
+# Service ValueErrors become 400s in the app-wide exception handler.
+# Fixed 404 responses are built once; raise them with .with_traceback(None) so
+# a reused instance does not keep growing the traceback of earlier raises
+_PRODUCT_NOT_FOUND = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
+)
+_CATEGORY_NOT_FOUND = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND, detail="Category not found"
+)
+_INVENTORY_NOT_FOUND = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND, detail="Inventory not found"
+)
+
+
+async def get_catalog_service(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> CatalogService:
+    """Get the request's CatalogService instance, creating it on first use"""
+    catalog_service = getattr(request.state, "catalog_service", None)
+    if catalog_service is None:
+        catalog_service = request.state.catalog_service = CatalogService(db)
+    return catalog_service
 
-async def get_catalog_service(db: AsyncSession = Depends(get_db)) -> CatalogService:
-    """Get CatalogService instance"""
-    return CatalogService(db)
 
+async def get_inventory_service(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> InventoryService:
+    """Get the request's InventoryService instance, creating it on first use"""
+    inventory_service = getattr(request.state, "inventory_service", None)
+    if inventory_service is None:
+        inventory_service = request.state.inventory_service = InventoryService(db)
+    return inventory_service
 
-async def get_inventory_service(db: AsyncSession = Depends(get_db)) -> InventoryService:
-    """Get InventoryService instance"""
-    return InventoryService(db)
+
+def get_stock_reservations(request: Request) -> StockReservationService:
+    """Get the app-wide StockReservationService"""
+    return request.app.state.stock_reservations
 
 
 # =============================================================================
@@ -51,17 +90,13 @@ async def create_product(
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Create a new product"""
-    try:
-        product = await catalog_service.create_product(product_data)
-        return product
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create product")
+    product = await catalog_service.create_product(product_data)
+    return product
 
 
 @router.get("/products", response_model=ProductListResponse)
 async def get_products(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Page size"),
     category_id: Optional[int] = Query(None, description="Filter by category"),
@@ -69,13 +104,55 @@ async def get_products(
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Get products with filtering and pagination"""
-    try:
-        products = await catalog_service.get_products(
-            page=page, size=size, category_id=category_id, search=search
-        )
-        return products
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve products")
+    # Answer revalidations without loading or serializing the page
+    etag = await catalog_service.get_products_etag(
+        page=page, size=size, category_id=category_id, search=search
+    )
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    products = await catalog_service.get_products(
+        page=page, size=size, category_id=category_id, search=search
+    )
+    # The service already built a validated ProductListResponse; serialize it
+    # directly instead of letting FastAPI validate it against response_model
+    return Response(
+        content=products.model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": etag},
+    )
+
+
+@router.get("/products/scroll", response_model=ProductCursorResponse)
+async def scroll_products(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    size: int = Query(10, ge=1, le=100, description="Page size"),
+    category_id: Optional[int] = Query(None, description="Filter by category"),
+    search: Optional[str] = Query(None, description="Search in name and description"),
+    catalog_service: CatalogService = Depends(get_catalog_service),
+):
+    """Get products newest first using keyset pagination"""
+    return await catalog_service.scroll_products(
+        cursor=cursor, size=size, category_id=category_id, search=search
+    )
+
+
+@router.get("/products/export")
+async def export_products(
+    category_id: Optional[int] = Query(None, description="Filter by category"),
+    search: Optional[str] = Query(None, description="Search in name and description"),
+    catalog_service: CatalogService = Depends(get_catalog_service),
+):
+    """Stream all matching products as newline-delimited JSON"""
+
+    async def ndjson_lines():
+        async for product in catalog_service.stream_products(
+            category_id=category_id, search=search
+        ):
+            yield product.model_dump_json() + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
 
 
 @router.get("/products/{product_id}", response_model=ProductRead)
@@ -84,15 +161,10 @@ async def get_product(
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Get a specific product by ID"""
-    try:
-        product = await catalog_service.get_product_by_id(product_id)
-        if not product:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-        return product
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve product")
+    product = await catalog_service.get_product(product_id)
+    if not product:
+        raise _PRODUCT_NOT_FOUND.with_traceback(None)
+    return product
 
 
 @router.put("/products/{product_id}", response_model=ProductRead)
@@ -102,17 +174,10 @@ async def update_product(
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Update a product"""
-    try:
-        product = await catalog_service.update_product(product_id, product_data)
-        if not product:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-        return product
-    except HTTPException:
-        raise
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update product")
+    product = await catalog_service.update_product(product_id, product_data)
+    if not product:
+        raise _PRODUCT_NOT_FOUND.with_traceback(None)
+    return product
 
 
 @router.delete("/products/{product_id}", response_model=MessageResponse)
@@ -121,15 +186,10 @@ async def delete_product(
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Delete a product"""
-    try:
-        success = await catalog_service.delete_product(product_id)
-        if not success:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-        return MessageResponse(message="Product deleted successfully")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete product")
+    success = await catalog_service.delete_product(product_id)
+    if not success:
+        raise _PRODUCT_NOT_FOUND.with_traceback(None)
+    return MessageResponse(message="Product deleted successfully")
 
 
 # =============================================================================
@@ -142,13 +202,9 @@ async def create_category(
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Create a new category"""
-    try:
-        category = await catalog_service.create_category(category_data)
-        return category
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create category")
+    category = await catalog_service.create_category(category_data)
+    await get_cache_service("product").invalidate_category()
+    return category
 
 
 @router.get("/categories", response_model=CategoryListResponse)
@@ -158,28 +214,36 @@ async def get_categories(
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Get categories with pagination"""
-    try:
-        categories = await catalog_service.get_categories(page=page, size=size)
-        return categories
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve categories")
+    cache = get_cache_service("product")
+    cached = await cache.get_category_list(page, size)
+    if cached is not None:
+        return cached
+
+    categories = await catalog_service.get_categories(page=page, size=size)
+    await cache.set_category_list(
+        page, size, jsonable_encoder(categories), CATEGORY_CACHE_TTL
+    )
+    return categories
 
 
 @router.get("/categories/{category_id}", response_model=CategoryRead)
 async def get_category(
+    request: Request,
     category_id: int,
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Get a specific category by ID"""
-    try:
-        category = await catalog_service.get_category_by_id(category_id)
-        if not category:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-        return category
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve category")
+    cache = get_cache_service("product")
+    cached = await cache.get_category(category_id)
+    if cached is not None:
+        return cached_json_response(request, cached)
+
+    category = await catalog_service.get_category(category_id)
+    if not category:
+        raise _CATEGORY_NOT_FOUND.with_traceback(None)
+    category = jsonable_encoder(category)
+    await cache.set_category(category_id, category, CATEGORY_CACHE_TTL)
+    return cached_json_response(request, category)
 
 
 @router.put("/categories/{category_id}", response_model=CategoryRead)
@@ -189,17 +253,11 @@ async def update_category(
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Update a category"""
-    try:
-        category = await catalog_service.update_category(category_id, category_data)
-        if not category:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-        return category
-    except HTTPException:
-        raise
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update category")
+    category = await catalog_service.update_category(category_id, category_data)
+    if not category:
+        raise _CATEGORY_NOT_FOUND.with_traceback(None)
+    await get_cache_service("product").invalidate_category(category_id)
+    return category
 
 
 @router.delete("/categories/{category_id}", response_model=MessageResponse)
@@ -208,15 +266,11 @@ async def delete_category(
     catalog_service: CatalogService = Depends(get_catalog_service),
 ):
     """Delete a category"""
-    try:
-        success = await catalog_service.delete_category(category_id)
-        if not success:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-        return MessageResponse(message="Category deleted successfully")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete category")
+    success = await catalog_service.delete_category(category_id)
+    if not success:
+        raise _CATEGORY_NOT_FOUND.with_traceback(None)
+    await get_cache_service("product").invalidate_category(category_id)
+    return MessageResponse(message="Category deleted successfully")
 
 
 # =============================================================================
@@ -225,19 +279,15 @@ async def delete_category(
 
 @router.get("/products/{product_id}/inventory", response_model=InventoryRead)
 async def get_product_inventory(
+    request: Request,
     product_id: int,
     inventory_service: InventoryService = Depends(get_inventory_service),
 ):
     """Get inventory for a specific product"""
-    try:
-        inventory = await inventory_service.get_inventory(product_id)
-        if not inventory:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory not found")
-        return inventory
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve inventory")
+    inventory = await inventory_service.get_inventory(product_id)
+    if not inventory:
+        raise _INVENTORY_NOT_FOUND.with_traceback(None)
+    return cached_json_response(request, inventory)
 
 
 @router.put("/products/{product_id}/inventory", response_model=InventoryRead)
@@ -247,17 +297,41 @@ async def update_product_inventory(
     inventory_service: InventoryService = Depends(get_inventory_service),
 ):
     """Update inventory for a specific product"""
+    inventory = await inventory_service.update_inventory(product_id, inventory_data)
+    if not inventory:
+        raise _PRODUCT_NOT_FOUND.with_traceback(None)
+    # Reseed the reservation counter from the new quantities
+    await get_cache_service("product").invalidate_stock(product_id)
+    return inventory
+
+
+@router.post("/products/{product_id}/inventory/reserve")
+async def reserve_product_inventory(
+    product_id: int,
+    reservation: InventoryReservation,
+    stock_reservations: StockReservationService = Depends(get_stock_reservations),
+):
+    """Reserve stock for a product"""
     try:
-        inventory = await inventory_service.update_inventory(product_id, inventory_data)
-        if not inventory:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-        return inventory
-    except HTTPException:
-        raise
+        available = await stock_reservations.reserve(product_id, reservation.quantity)
     except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update inventory")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if available is None:
+        raise _INVENTORY_NOT_FOUND.with_traceback(None)
+    return {"product_id": product_id, "available_quantity": available}
+
+
+@router.post("/products/{product_id}/inventory/release")
+async def release_product_inventory(
+    product_id: int,
+    reservation: InventoryReservation,
+    stock_reservations: StockReservationService = Depends(get_stock_reservations),
+):
+    """Release previously reserved stock for a product"""
+    available = await stock_reservations.release(product_id, reservation.quantity)
+    if available is None:
+        raise _INVENTORY_NOT_FOUND.with_traceback(None)
+    return {"product_id": product_id, "available_quantity": available}
 
 
 @router.get("/inventory/alerts")
@@ -265,26 +339,22 @@ async def get_stock_alerts(
     inventory_service: InventoryService = Depends(get_inventory_service),
 ):
     """Get low stock alerts"""
-    try:
-        alerts = await inventory_service.get_low_stock_alerts()
-        return {"alerts": alerts}
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve stock alerts")
+    alerts = await inventory_service.get_low_stock_alerts()
+    return {"alerts": alerts}
 
 
 @router.post("/inventory/bulk-update")
 async def bulk_update_inventory(
-    updates: list[dict],
+    updates: InventoryBulkUpdate,
     inventory_service: InventoryService = Depends(get_inventory_service),
 ):
     """Bulk update inventory for multiple products"""
-    try:
-        results = await inventory_service.bulk_update_inventory(updates)
-        return {"results": results}
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update inventory")
+    results = await inventory_service.bulk_update_inventory(updates.root)
+    cache = get_cache_service("product")
+    for result in results:
+        if result["success"]:
+            await cache.invalidate_stock(result["product_id"])
+    return {"results": results}
 
 
 @router.get("/health")
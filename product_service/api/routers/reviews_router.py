@@ -2,7 +2,8 @@
 Reviews Router - Handles product reviews and ratings.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
@@ -15,9 +16,20 @@ from schemas.review import (
 )
 from schemas.common import MessageResponse
 from services.review_service import ReviewService
+from shared_code.cache import get_cache_service
+from utils.http_cache import cached_json_response
 
 router = APIRouter(prefix="/api/v1/reviews", tags=["reviews"])
 
+# Review reads are cache-aside; every review write drops the product's entries
+REVIEW_CACHE_TTL = 300
+
+# ValueError and unexpected exceptions are mapped to 400/500 by the app-wide
+# exception handlers, so endpoints only raise for their own 404s
+_REVIEW_NOT_FOUND = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND, detail="Review not found"
+)
+
 
 async def get_review_service(db: AsyncSession = Depends(get_db)) -> ReviewService:
     """Get ReviewService instance"""
@@ -30,13 +42,9 @@ async def create_review(
     review_service: ReviewService = Depends(get_review_service),
 ):
     """Create a new product review"""
-    try:
-        review = await review_service.create_review(review_data)
-        return review
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create review")
+    review = await review_service.create_review(review_data)
+    await get_cache_service("product").invalidate_product_reviews(review.product_id)
+    return review
 
 
 @router.get("/product/{product_id}", response_model=ReviewListResponse)
@@ -48,13 +56,18 @@ async def get_product_reviews(
     review_service: ReviewService = Depends(get_review_service),
 ):
     """Get reviews for a specific product"""
-    try:
-        reviews = await review_service.get_product_reviews(
-            product_id=product_id, page=page, size=size, rating=rating
-        )
-        return reviews
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve reviews")
+    cache = get_cache_service("product")
+    cached = await cache.get_product_reviews(product_id, page, size, rating)
+    if cached is not None:
+        return cached
+
+    reviews = await review_service.get_product_reviews(
+        product_id=product_id, page=page, size=size, rating=rating
+    )
+    await cache.set_product_reviews(
+        product_id, page, size, rating, jsonable_encoder(reviews), REVIEW_CACHE_TTL
+    )
+    return reviews
 
 
 @router.get("/{review_id}", response_model=ReviewRead)
@@ -63,15 +76,10 @@ async def get_review(
     review_service: ReviewService = Depends(get_review_service),
 ):
     """Get a specific review by ID"""
-    try:
-        review = await review_service.get_review_by_id(review_id)
-        if not review:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
-        return review
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve review")
+    review = await review_service.get_review_by_id(review_id)
+    if not review:
+        raise _REVIEW_NOT_FOUND.with_traceback(None)
+    return review
 
 
 @router.put("/{review_id}", response_model=ReviewRead)
@@ -81,17 +89,11 @@ async def update_review(
     review_service: ReviewService = Depends(get_review_service),
 ):
     """Update a review"""
-    try:
-        review = await review_service.update_review(review_id, review_data)
-        if not review:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
-        return review
-    except HTTPException:
-        raise
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update review")
+    review = await review_service.update_review(review_id, review_data)
+    if not review:
+        raise _REVIEW_NOT_FOUND.with_traceback(None)
+    await get_cache_service("product").invalidate_product_reviews(review.product_id)
+    return review
 
 
 @router.delete("/{review_id}", response_model=MessageResponse)
@@ -100,28 +102,23 @@ async def delete_review(
     review_service: ReviewService = Depends(get_review_service),
 ):
     """Delete a review"""
-    try:
-        success = await review_service.delete_review(review_id)
-        if not success:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
-        return MessageResponse(message="Review deleted successfully")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete review")
+    # The product id is needed afterwards to drop its cached reviews
+    review = await review_service.get_review_by_id(review_id)
+    if not review or not await review_service.delete_review(review_id):
+        raise _REVIEW_NOT_FOUND.with_traceback(None)
+    await get_cache_service("product").invalidate_product_reviews(review.product_id)
+    return MessageResponse(message="Review deleted successfully")
 
 
 @router.get("/product/{product_id}/stats")
 async def get_product_review_stats(
+    request: Request,
     product_id: int,
     review_service: ReviewService = Depends(get_review_service),
 ):
     """Get review statistics for a product"""
-    try:
-        stats = await review_service.get_product_review_stats(product_id)
-        return stats
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve review stats")
+    stats = await review_service.get_product_review_stats(product_id)
+    return cached_json_response(request, stats)
 
 
 @router.get("/health")
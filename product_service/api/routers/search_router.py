@@ -2,20 +2,23 @@
 Search Router - Handles product search functionality.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Request, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 
-from core.database import get_db
+from core.database import get_read_db
 from schemas.product import ProductRead
 from schemas.search import SearchResponse, SearchFilters
 from services.search_service import SearchService
+from utils.http_cache import cached_json_response
 
 router = APIRouter(prefix="/api/v1/search", tags=["search"])
 
 
-async def get_search_service(db: AsyncSession = Depends(get_db)) -> SearchService:
-    """Get SearchService instance"""
+async def get_search_service(
+    db: AsyncSession = Depends(get_read_db),
+) -> SearchService:
+    """Get SearchService instance on a read-only session"""
     return SearchService(db)
 
 
@@ -33,27 +36,23 @@ async def search_products(
     search_service: SearchService = Depends(get_search_service),
 ):
     """Search products with advanced filtering"""
-    try:
-        filters = SearchFilters(
-            category_id=category_id,
-            min_price=min_price,
-            max_price=max_price,
-            min_rating=min_rating,
-            in_stock=in_stock,
-        )
-        
-        results = await search_service.search_products(
-            query=q,
-            page=page,
-            size=size,
-            filters=filters,
-            sort_by=sort_by,
-        )
-        return results
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to search products")
+    filters = SearchFilters(
+        category_id=category_id,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        in_stock=in_stock,
+    )
+    results = await search_service.search_products(
+        query=q,
+        page=page,
+        size=size,
+        filters=filters,
+        sort_by=sort_by,
+    )
+    # The service already built a validated SearchResponse; serialize it
+    # directly instead of letting FastAPI validate it against response_model
+    return Response(content=results.model_dump_json(), media_type="application/json")
 
 
 @router.get("/suggestions")
@@ -63,24 +62,19 @@ async def get_search_suggestions(
     search_service: SearchService = Depends(get_search_service),
 ):
     """Get search suggestions based on partial query"""
-    try:
-        suggestions = await search_service.get_suggestions(query=q, limit=limit)
-        return {"suggestions": suggestions}
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to get suggestions")
+    suggestions = await search_service.get_suggestions(query=q, limit=limit)
+    return {"suggestions": suggestions}
 
 
 @router.get("/popular")
 async def get_popular_searches(
+    request: Request,
     limit: int = Query(10, ge=1, le=20, description="Number of popular searches"),
     search_service: SearchService = Depends(get_search_service),
 ):
     """Get popular search terms"""
-    try:
-        popular = await search_service.get_popular_searches(limit=limit)
-        return {"popular_searches": popular}
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to get popular searches")
+    popular = await search_service.get_popular_searches(limit=limit)
+    return cached_json_response(request, {"popular_searches": popular})
 
 
 @router.get("/categories")
@@ -89,38 +83,35 @@ async def search_categories(
     search_service: SearchService = Depends(get_search_service),
 ):
     """Search categories"""
-    try:
-        categories = await search_service.search_categories(query=q)
-        return {"categories": categories}
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to search categories")
+    categories = await search_service.search_categories(query=q)
+    return {"categories": categories}
 
 
 @router.get("/filters")
 async def get_search_filters(
+    request: Request,
     category_id: Optional[int] = Query(None, description="Category ID for context"),
     search_service: SearchService = Depends(get_search_service),
 ):
     """Get available search filters"""
-    try:
-        filters = await search_service.get_available_filters(category_id=category_id)
-        return {"filters": filters}
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to get search filters")
+    filters = await search_service.get_available_filters(category_id=category_id)
+    return cached_json_response(request, {"filters": filters})
 
 
-@router.post("/track")
+@router.post("/track", status_code=status.HTTP_202_ACCEPTED)
 async def track_search(
     query: str,
+    background_tasks: BackgroundTasks,
     results_count: int = 0,
     search_service: SearchService = Depends(get_search_service),
 ):
     """Track search query for analytics"""
-    try:
-        await search_service.track_search(query=query, results_count=results_count)
-        return {"message": "Search tracked successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to track search")
+    # Analytics never hold up the caller; the count is recorded after the
+    # response is sent
+    background_tasks.add_task(
+        search_service.track_search, query=query, results_count=results_count
+    )
+    return {"message": "Search tracking accepted"}
 
 
 @router.get("/health")
@@ -23,6 +23,8 @@ class Settings(BaseSettings):
         env="DATABASE_URL",
     )
     DATABASE_ECHO: bool = Field(default=False, env="DATABASE_ECHO")
+    DATABASE_POOL_SIZE: int = Field(default=20, env="DATABASE_POOL_SIZE")
+    DATABASE_MAX_OVERFLOW: int = Field(default=20, env="DATABASE_MAX_OVERFLOW")
 
     # Redis settings
     REDIS_URL: str = Field(default="redis://localhost:6379/1", env="REDIS_URL")
@@ -1,12 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, text
 from .config import settings
 
-# Create async engine
+# Create async engine (asyncpg with SQLAlchemy's default AsyncAdaptedQueuePool)
 engine = create_async_engine(
     settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
     echo=settings.DATABASE_ECHO,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_pre_ping=True,
     pool_recycle=300,
 )
@@ -16,6 +18,15 @@ AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Sessions for read-only requests: asyncpg opens each transaction READ ONLY,
+# and the flag is reset when the connection goes back to the pool
+ReadOnlySessionLocal = async_sessionmaker(
+    engine.execution_options(postgresql_readonly=True),
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
 # Create declarative base
 Base = declarative_base()
 
@@ -32,9 +43,22 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_read_db() -> AsyncSession:
+    """
+    Dependency to get a read-only database session.
+
+    All of a request's queries share the one connection and transaction the
+    session checks out on first use; it is rolled back, never committed.
+    """
+    async with ReadOnlySessionLocal() as session:
+        yield session
+
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
+        # Trigram indexes on product and category names depend on pg_trgm
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
 
 
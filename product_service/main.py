@@ -12,6 +12,11 @@ parent_dir = os.path.abspath(os.path.join(current_dir, ".."))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
+
+from shared_code.cache import get_cache_service
 from shared_code.core.app import create_app
 from shared_code.core.config import get_service_settings
 from shared_code.utils.logging import get_logger
@@ -20,6 +25,7 @@ from api.routers.products_router import router as products_router
 from api.routers.reviews_router import router as reviews_router  
 from api.routers.search_router import router as search_router
 from core.database import init_db, close_db
+from modules.inventory.stock_reservations import StockReservationService
 
 logger = get_logger(__name__)
 settings = get_service_settings("product_service")
@@ -29,14 +35,60 @@ async def startup_task():
     """Product service startup tasks"""
     logger.info("Product Service starting up...")
     await init_db()
+    await get_cache_service("product").connect()
+
+    # Reservations are gated in Redis and written back in batches
+    app.state.stock_reservations = StockReservationService(
+        cache_service=get_cache_service("product")
+    )
+    app.state.stock_reservations.start_flusher()
 
 
 async def shutdown_task():
     """Product service shutdown tasks"""
     logger.info("Product Service shutting down...")
+    stock_reservations = getattr(app.state, "stock_reservations", None)
+    if stock_reservations:
+        await stock_reservations.stop_flusher()
+    await get_cache_service("product").disconnect()
     await close_db()
 
 
+async def value_error_handler(request: Request, exc: ValueError) -> ORJSONResponse:
+    """Answer service-level validation errors with 400, like HTTPException"""
+    return ORJSONResponse(
+        status_code=400,
+        content={
+            "message": str(exc),
+            "error_code": "HTTP_400",
+            "request_id": getattr(request.state, "request_id", None),
+        },
+    )
+
+
+async def server_validation_error_handler(
+    request: Request, exc: ValidationError
+) -> ORJSONResponse:
+    """Answer models failing to validate server-side data with 500
+
+    pydantic's ValidationError subclasses ValueError, so without this it would
+    be reported to the client as a 400.
+    """
+    logger.error(
+        f"Unhandled validation error: {str(exc)}",
+        extra={"request_id": getattr(request.state, "request_id", None)},
+        exc_info=True,
+    )
+    return ORJSONResponse(
+        status_code=500,
+        content={
+            "message": "Internal server error",
+            "error_code": "INTERNAL_ERROR",
+            "request_id": getattr(request.state, "request_id", None),
+        },
+    )
+
+
 # Create the FastAPI app with standardized configuration
 app = create_app(
     service_name="Product Service",
@@ -49,6 +101,9 @@ app = create_app(
     startup_tasks=[startup_task],
     shutdown_tasks=[shutdown_task],
 )
+# Routers let ValueError propagate instead of wrapping each call
+app.add_exception_handler(ValueError, value_error_handler)
+app.add_exception_handler(ValidationError, server_validation_error_handler)
 
 if __name__ == "__main__":
     import uvicorn
@@ -57,5 +112,9 @@ if __name__ == "__main__":
         host=getattr(settings, 'SERVICE_HOST', '0.0.0.0'),
         port=getattr(settings, 'SERVICE_PORT', 8003),
         reload=getattr(settings, 'DEBUG', False),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WORKERS", "1")),
+        backlog=int(os.getenv("BACKLOG", "4096")),
         log_level=getattr(settings, 'LOG_LEVEL', 'info').lower(),
     )
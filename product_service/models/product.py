@@ -1,12 +1,30 @@
-from sqlalchemy import Column, String, Text, Integer, Float, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, Integer, Float, Boolean, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 
+def discount_percentage(price, compare_price):
+    """Calculate the discount percentage of price against compare_price"""
+    if compare_price and price < compare_price:
+        return round(((compare_price - price) / compare_price) * 100, 2)
+    return 0
+
+
 class Product(BaseModel):
     """Product model for e-commerce products"""
 
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset seek for the newest-first product scroll
+        Index("ix_products_created_id", "created_at", "id"),
+        # Trigram index for similarity and ILIKE search (needs pg_trgm)
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     # Basic info
     name = Column(String(200), nullable=False, index=True)
@@ -60,11 +78,7 @@ class Product(BaseModel):
     @property
     def discount_percentage(self):
         """Calculate discount percentage"""
-        if self.compare_price and self.price < self.compare_price:
-            return round(
-                ((self.compare_price - self.price) / self.compare_price) * 100, 2
-            )
-        return 0
+        return discount_percentage(self.price, self.compare_price)
 
     def __repr__(self):
         return f"<Product(id={self.id}, name='{self.name}', sku='{self.sku}')>"
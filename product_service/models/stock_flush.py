@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Index, String
+from .base import BaseModel
+
+
+class StockFlush(BaseModel):
+    """A batch of reserved-quantity deltas already applied to inventory"""
+
+    __tablename__ = "stock_flushes"
+    __table_args__ = (Index("ix_stock_flushes_created_at", "created_at"),)
+
+    batch_id = Column(String(32), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<StockFlush(batch_id={self.batch_id})>"
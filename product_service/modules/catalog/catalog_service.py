@@ -2,26 +2,66 @@
 Catalog Service for Product Management
 """
 
-from typing import List, Optional, Dict, Any
+import asyncio
+import base64
+import hashlib
+from datetime import datetime
+from math import ceil
+from collections import defaultdict
+from typing import AsyncIterator, List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, or_, func, tuple_
 from sqlalchemy.orm import selectinload
 
-from models.product import Product
+from core.database import AsyncSessionLocal
+from models.product import Product, discount_percentage
 from models.category import Category
+from models.inventory import Inventory
+from models.product_image import ProductImage
 from schemas.product import (
     ProductCreate,
     ProductUpdate,
     ProductRead,
     ProductListResponse,
+    ProductCursorResponse,
 )
-from schemas.category import CategoryCreate, CategoryUpdate, CategoryRead
+from schemas.category import (
+    CategoryCreate,
+    CategoryUpdate,
+    CategoryRead,
+    CategoryListResponse,
+)
+
+
+def _encode_cursor(created_at: datetime, product_id: int) -> str:
+    """Encode the last row's sort key as an opaque cursor"""
+    key = f"{created_at.isoformat()}|{product_id}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor back into its (created_at, id) sort key"""
+    try:
+        created_at, product_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at), int(product_id)
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+
+
+# Rows fetched per round trip when streaming product exports
+EXPORT_CHUNK_SIZE = 500
 
 
 class CatalogService:
     """Service for managing products and categories"""
 
+    __slots__ = ("db",)
+
     def __init__(self, db: AsyncSession):
+        # The session only checks out a pooled connection on its first
+        # query, so endpoints answered from cache never touch the pool
         self.db = db
 
     # Product methods
@@ -35,9 +75,31 @@ class CatalogService:
 
     async def get_product(self, product_id: int) -> Optional[ProductRead]:
         """Get product by ID"""
-        result = await self.db.execute(select(Product).where(Product.id == product_id))
-        product = result.scalar_one_or_none()
-        return ProductRead.from_orm(product) if product else None
+        # Point read straight from columns; no ORM identity map or lazy loads
+        query = (
+            select(
+                *Product.__table__.c,
+                (func.coalesce(Inventory.quantity, 0) > 0).label("is_in_stock"),
+            )
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+            .where(Product.id == product_id)
+        )
+        row = (await self.db.execute(query)).mappings().one_or_none()
+        if row is None:
+            return None
+
+        images = await self.db.execute(
+            select(*ProductImage.__table__.c)
+            .where(ProductImage.product_id == product_id)
+            .order_by(ProductImage.sort_order)
+        )
+
+        product = dict(row)
+        product["discount_percentage"] = discount_percentage(
+            row["price"], row["compare_price"]
+        )
+        product["images"] = [dict(image) for image in images.mappings()]
+        return ProductRead.model_validate(product)
 
     async def get_product_by_slug(self, slug: str) -> Optional[ProductRead]:
         """Get product by slug"""
@@ -84,7 +146,9 @@ class CatalogService:
         is_active: Optional[bool] = None,
     ) -> ProductListResponse:
         """List products with filters"""
-        query = select(Product).options(selectinload(Product.category))
+        query = select(Product).options(
+            selectinload(Product.inventory), selectinload(Product.images)
+        )
 
         # Apply filters
         conditions = []
@@ -127,6 +191,186 @@ class CatalogService:
             limit=limit,
         )
 
+    async def get_products(
+        self,
+        page: int = 1,
+        size: int = 10,
+        category_id: Optional[int] = None,
+        search: Optional[str] = None,
+    ) -> ProductListResponse:
+        """Get a page of products, counting matches alongside the page query"""
+        conditions = self._product_filters(category_id, search)
+
+        count_query = select(func.count(Product.id))
+        query = select(Product).options(
+            selectinload(Product.inventory), selectinload(Product.images)
+        )
+        if conditions:
+            count_query = count_query.where(and_(*conditions))
+            query = query.where(and_(*conditions))
+        query = query.offset((page - 1) * size).limit(size)
+
+        async def count_products() -> int:
+            # A session runs one statement at a time, so count on its own
+            async with AsyncSessionLocal() as session:
+                return (await session.execute(count_query)).scalar()
+
+        # A failure in either query cancels the other
+        async with asyncio.TaskGroup() as group:
+            total_task = group.create_task(count_products())
+            page_task = group.create_task(self.db.execute(query))
+
+        total = total_task.result()
+        products = page_task.result().scalars().all()
+
+        return ProductListResponse(
+            products=[ProductRead.from_orm(product) for product in products],
+            total=total,
+            page=page,
+            size=size,
+            pages=ceil(total / size) if total else 0,
+        )
+
+    async def scroll_products(
+        self,
+        cursor: Optional[str] = None,
+        size: int = 10,
+        category_id: Optional[int] = None,
+        search: Optional[str] = None,
+    ) -> ProductCursorResponse:
+        """
+        Get products newest first, continuing after ``cursor``.
+
+        Seeks on (created_at, id) instead of skipping rows with OFFSET and
+        skips the COUNT, so deep pages cost the same as the first one.
+        """
+        conditions = self._product_filters(category_id, search)
+        if cursor:
+            conditions.append(
+                tuple_(Product.created_at, Product.id) < _decode_cursor(cursor)
+            )
+
+        query = (
+            select(Product)
+            .options(selectinload(Product.inventory), selectinload(Product.images))
+            .order_by(Product.created_at.desc(), Product.id.desc())
+            .limit(size + 1)
+        )
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        products = (await self.db.execute(query)).scalars().all()
+
+        # The extra row only tells whether another page exists
+        next_cursor = None
+        if len(products) > size:
+            products = products[:size]
+            last = products[-1]
+            next_cursor = _encode_cursor(last.created_at, last.id)
+
+        return ProductCursorResponse(
+            products=[ProductRead.model_validate(product) for product in products],
+            next_cursor=next_cursor,
+        )
+
+    async def stream_products(
+        self,
+        category_id: Optional[int] = None,
+        search: Optional[str] = None,
+    ) -> AsyncIterator[ProductRead]:
+        """
+        Yield every matching product, newest first.
+
+        Rows come from a server-side cursor in chunks of EXPORT_CHUNK_SIZE,
+        each chunk's images in one query, so memory stays bounded by the
+        chunk rather than the result. Runs on its own session because it is
+        consumed after the request's session has been released.
+        """
+        conditions = self._product_filters(category_id, search)
+        query = (
+            select(
+                *Product.__table__.c,
+                (func.coalesce(Inventory.quantity, 0) > 0).label("is_in_stock"),
+            )
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+            .order_by(Product.created_at.desc(), Product.id.desc())
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(query)
+            async for rows in result.mappings().partitions():
+                images = defaultdict(list)
+                image_rows = await session.execute(
+                    select(*ProductImage.__table__.c)
+                    .where(ProductImage.product_id.in_([row["id"] for row in rows]))
+                    .order_by(ProductImage.sort_order)
+                )
+                for image in image_rows.mappings():
+                    images[image["product_id"]].append(dict(image))
+
+                for row in rows:
+                    product = dict(row)
+                    product["discount_percentage"] = discount_percentage(
+                        row["price"], row["compare_price"]
+                    )
+                    product["images"] = images[row["id"]]
+                    yield ProductRead.model_validate(product)
+
+    async def get_products_etag(
+        self,
+        page: int = 1,
+        size: int = 10,
+        category_id: Optional[int] = None,
+        search: Optional[str] = None,
+    ) -> str:
+        """
+        Get an ETag for a product listing page.
+
+        Built from the request parameters plus the newest update time and
+        row count of the matching products and of the inventory and image
+        rows their responses embed, so edits, inserts and deletes of any of
+        them change it without loading the page itself.
+        """
+        query = (
+            select(
+                func.max(Product.updated_at),
+                func.count(Product.id.distinct()),
+                func.max(Inventory.updated_at),
+                func.max(ProductImage.updated_at),
+                func.count(ProductImage.id.distinct()),
+            )
+            .outerjoin(Inventory, Inventory.product_id == Product.id)
+            .outerjoin(ProductImage, ProductImage.product_id == Product.id)
+        )
+        conditions = self._product_filters(category_id, search)
+        if conditions:
+            query = query.where(and_(*conditions))
+
+        versions = ":".join(map(str, (await self.db.execute(query)).one()))
+        fingerprint = f"{page}:{size}:{category_id}:{search}:{versions}"
+        digest = hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest()
+        return f'"{digest}"'
+
+    @staticmethod
+    def _product_filters(
+        category_id: Optional[int], search: Optional[str]
+    ) -> List[Any]:
+        """Build the WHERE conditions shared by the product listing queries"""
+        conditions = []
+        if category_id:
+            conditions.append(Product.category_id == category_id)
+        if search:
+            conditions.append(
+                or_(
+                    Product.name.ilike(f"%{search}%"),
+                    Product.description.ilike(f"%{search}%"),
+                )
+            )
+        return conditions
+
     # Category methods
     async def create_category(self, category_data: CategoryCreate) -> CategoryRead:
         """Create a new category"""
@@ -139,10 +383,10 @@ class CatalogService:
     async def get_category(self, category_id: int) -> Optional[CategoryRead]:
         """Get category by ID"""
         result = await self.db.execute(
-            select(Category).where(Category.id == category_id)
+            select(*Category.__table__.c).where(Category.id == category_id)
         )
-        category = result.scalar_one_or_none()
-        return CategoryRead.from_orm(category) if category else None
+        category = result.mappings().one_or_none()
+        return CategoryRead.model_validate(dict(category)) if category else None
 
     async def get_category_by_slug(self, slug: str) -> Optional[CategoryRead]:
         """Get category by slug"""
@@ -182,6 +426,50 @@ class CatalogService:
         await self.db.commit()
         return True
 
+    async def get_categories(
+        self, page: int = 1, size: int = 10
+    ) -> CategoryListResponse:
+        """Get a page of categories with the total count"""
+        query = select(*Category.__table__.c).order_by(
+            Category.sort_order, Category.id
+        )
+
+        # Only the requested page is fetched; the total is counted in SQL
+        total = (
+            await self.db.execute(
+                select(func.count()).select_from(query.order_by(None).subquery())
+            )
+        ).scalar_one()
+        rows = (
+            await self.db.execute(query.offset((page - 1) * size).limit(size))
+        ).mappings().all()
+        product_counts = await self._count_products_by_category(
+            [row["id"] for row in rows]
+        )
+
+        return CategoryListResponse(
+            total=total,
+            categories=[
+                CategoryRead.model_validate(
+                    {**row, "product_count": product_counts.get(row["id"], 0)}
+                )
+                for row in rows
+            ],
+        )
+
+    async def _count_products_by_category(
+        self, category_ids: List[int]
+    ) -> Dict[int, int]:
+        """Count products for a batch of categories in one grouped query"""
+        if not category_ids:
+            return {}
+        result = await self.db.execute(
+            select(Product.category_id, func.count(Product.id))
+            .where(Product.category_id.in_(category_ids))
+            .group_by(Product.category_id)
+        )
+        return dict(result.all())
+
     async def list_categories(
         self, parent_id: Optional[int] = None
     ) -> List[CategoryRead]:
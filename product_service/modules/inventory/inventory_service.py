@@ -0,0 +1,158 @@
+"""
+Inventory Service for Product Stock Management
+"""
+
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, values, column, cast, func, Integer
+
+from models.inventory import Inventory
+from models.product import Product
+from schemas.inventory import (
+    InventoryUpdate,
+    InventoryRead,
+    InventoryBulkItem,
+    StockAlert,
+)
+
+# Rows per UPDATE ... FROM (VALUES ...) statement; keeps each statement well
+# under the 32767 bind parameter limit of the PostgreSQL protocol
+BULK_UPDATE_CHUNK_SIZE = 1000
+
+
+class InventoryService:
+    """Service for managing product inventory"""
+
+    __slots__ = ("db",)
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_inventory(self, product_id: int) -> Optional[InventoryRead]:
+        """Get inventory for a product"""
+        result = await self.db.execute(
+            select(Inventory).where(Inventory.product_id == product_id)
+        )
+        inventory = result.scalar_one_or_none()
+        return InventoryRead.from_orm(inventory) if inventory else None
+
+    async def update_inventory(
+        self, product_id: int, inventory_data: InventoryUpdate
+    ) -> Optional[InventoryRead]:
+        """Update inventory for a product"""
+        result = await self.db.execute(
+            select(Inventory).where(Inventory.product_id == product_id)
+        )
+        inventory = result.scalar_one_or_none()
+        if not inventory:
+            return None
+
+        for field, value in inventory_data.dict(exclude_unset=True).items():
+            setattr(inventory, field, value)
+        if inventory.reserved_quantity > inventory.quantity:
+            raise ValueError("Reserved quantity cannot exceed quantity")
+
+        await self.db.commit()
+        await self.db.refresh(inventory)
+        return InventoryRead.from_orm(inventory)
+
+    async def get_low_stock_alerts(self) -> List[StockAlert]:
+        """Get products whose available stock is at or below their threshold"""
+        available = Inventory.quantity - Inventory.reserved_quantity
+        result = await self.db.execute(
+            select(
+                Inventory.product_id,
+                Product.name,
+                available.label("available"),
+                Inventory.low_stock_threshold,
+            )
+            .join(Product, Product.id == Inventory.product_id)
+            .where(available <= Inventory.low_stock_threshold)
+            .order_by(available)
+        )
+        return [
+            StockAlert(
+                product_id=product_id,
+                product_name=name,
+                available_quantity=max(0, quantity),
+                low_stock_threshold=threshold,
+                is_out_of_stock=quantity <= 0,
+            )
+            for product_id, name, quantity, threshold in result
+        ]
+
+    async def bulk_update_inventory(
+        self, updates: List[InventoryBulkItem]
+    ) -> List[Dict[str, Any]]:
+        """
+        Set or adjust the stock quantity of many products.
+
+        Each chunk of rows is applied with one UPDATE ... FROM (VALUES ...)
+        statement instead of a statement per product.
+
+        Args:
+            updates: Validated items carrying either ``quantity`` or ``delta``,
+                at most one per product; a delta never takes the quantity
+                below zero
+
+        Returns:
+            One result per item with the new quantity, and ``success`` False
+            with an ``error`` for products that have no inventory record or
+            whose new quantity would fall below their reserved quantity
+        """
+        rows = [(item.product_id, item.quantity, item.delta) for item in updates]
+
+        quantities = {}
+        for start in range(0, len(rows), BULK_UPDATE_CHUNK_SIZE):
+            batch = values(
+                column("product_id", Integer),
+                column("quantity", Integer),
+                column("delta", Integer),
+                name="v",
+            ).data(rows[start : start + BULK_UPDATE_CHUNK_SIZE])
+            # A column holding only NULLs would be typed as text
+            new_quantity = func.coalesce(
+                cast(batch.c.quantity, Integer),
+                func.greatest(Inventory.quantity + cast(batch.c.delta, Integer), 0),
+            )
+            result = await self.db.execute(
+                update(Inventory)
+                .where(
+                    Inventory.product_id == batch.c.product_id,
+                    new_quantity >= Inventory.reserved_quantity,
+                )
+                .values(quantity=new_quantity)
+                .returning(Inventory.product_id, Inventory.quantity)
+            )
+            quantities.update(result.tuples())
+        await self.db.commit()
+
+        # Tell rows held back by reservations apart from missing inventory
+        skipped = [
+            item.product_id for item in updates if item.product_id not in quantities
+        ]
+        stocked = set()
+        if skipped:
+            stocked = set(
+                (
+                    await self.db.execute(
+                        select(Inventory.product_id).where(
+                            Inventory.product_id.in_(skipped)
+                        )
+                    )
+                ).scalars()
+            )
+
+        results = []
+        for item in updates:
+            result = {
+                "product_id": item.product_id,
+                "quantity": quantities.get(item.product_id),
+                "success": item.product_id in quantities,
+            }
+            if item.product_id in stocked:
+                result["error"] = "Quantity cannot be below reserved quantity"
+            elif not result["success"]:
+                result["error"] = "Inventory not found"
+            results.append(result)
+        return results
@@ -0,0 +1,248 @@
+"""
+Stock Reservations - Redis-gated inventory reservations persisted in batches
+"""
+
+import asyncio
+import uuid
+from datetime import timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select, update, delete, values, column, func, Integer
+from sqlalchemy.dialects.postgresql import insert
+
+from core.database import AsyncSessionLocal
+from models.inventory import Inventory
+from models.stock_flush import StockFlush
+from shared_code.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+STOCK_FLUSH_INTERVAL = 1.0
+# Seconds a worker may hold the flush claim; must outlast one flush
+STOCK_FLUSH_CLAIM_TTL = 30
+# How long applied batch ids are remembered; far longer than any retry
+STOCK_FLUSH_RETENTION = timedelta(days=1)
+
+
+class StockReservationService:
+    """
+    Reserves and releases stock without locking inventory rows per request.
+
+    Available stock per product lives in a Redis counter that a Lua script
+    decrements atomically, so concurrent checkouts of the same product never
+    wait on each other in Postgres. The same script records the change in a
+    Redis hash of reserved_quantity deltas shared by all workers, which a
+    background flusher writes back in one statement per interval. Each
+    flush moves the deltas into an in-flight batch with its own id and
+    records that id in the same transaction as the UPDATE, so a batch that
+    is retried after a commit is never applied twice. A counter
+    is seeded from the row minus its unwritten delta, so reseeding after an
+    inventory update sees every worker's reservations. A second counter
+    tracks the units reservations hold, and a release never gives back
+    more than that.
+
+    Reservations are acknowledged once they are in Redis: deltas not yet
+    flushed are lost if Redis loses its data. When Redis is unavailable,
+    each call falls back to a single conditional UPDATE in Postgres.
+    """
+
+    def __init__(self, cache_service, session_factory=AsyncSessionLocal):
+        self.cache = cache_service
+        self.session_factory = session_factory
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def start_flusher(self) -> None:
+        """Start the background task that persists reservations."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop_flusher(self) -> None:
+        """Stop the background flusher and persist any remaining reservations."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        """Flush pending reservations every interval."""
+        while True:
+            await asyncio.sleep(STOCK_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Apply pending reserved-quantity changes in a single UPDATE."""
+        # One worker flushes at a time; the token keeps a worker whose claim
+        # expired from releasing the claim another worker now holds
+        token = uuid.uuid4().hex
+        if not await self.cache.claim_stock_flush(token, STOCK_FLUSH_CLAIM_TTL):
+            return
+        try:
+            batch = await self.cache.take_pending_reservations(uuid.uuid4().hex)
+            if batch is None:
+                return
+            batch_id, deltas = batch
+
+            try:
+                await self._apply_batch(batch_id, deltas)
+            except Exception as e:
+                # The batch stays in flight and is retried on the next flush
+                logger.error(f"Failed to flush stock reservations: {e}")
+                return
+
+            await self.cache.finish_pending_reservations(batch_id)
+        finally:
+            await self.cache.release_stock_flush(token)
+
+    async def _apply_batch(self, batch_id: str, deltas: Dict[int, int]) -> None:
+        """Write one batch of deltas unless its id shows it was already written."""
+        # Products whose reservations were all released net out to zero
+        deltas = {pid: delta for pid, delta in deltas.items() if delta}
+        async with self.session_factory.begin() as session:
+            first_apply = (
+                await session.execute(
+                    insert(StockFlush)
+                    .values(batch_id=batch_id)
+                    .on_conflict_do_nothing(index_elements=[StockFlush.batch_id])
+                    .returning(StockFlush.id)
+                )
+            ).scalar_one_or_none()
+            if first_apply is None or not deltas:
+                return
+
+            batch = values(
+                column("product_id", Integer), column("delta", Integer), name="v"
+            ).data(list(deltas.items()))
+            await session.execute(
+                update(Inventory)
+                .where(Inventory.product_id == batch.c.product_id)
+                .values(
+                    reserved_quantity=func.greatest(
+                        Inventory.reserved_quantity + batch.c.delta, 0
+                    )
+                )
+            )
+            await session.execute(
+                delete(StockFlush).where(
+                    StockFlush.created_at < func.now() - STOCK_FLUSH_RETENTION
+                )
+            )
+
+    async def reserve(self, product_id: int, quantity: int) -> Optional[int]:
+        """
+        Reserve stock for a product.
+
+        Args:
+            product_id: Product to reserve
+            quantity: Units to reserve
+
+        Returns:
+            Remaining available stock, or None when the product has no inventory
+
+        Raises:
+            ValueError: Not enough stock is available
+        """
+        remaining = await self.cache.reserve_stock(product_id, quantity)
+        if remaining == -2:
+            if not await self._seed(product_id):
+                return None
+            remaining = await self.cache.reserve_stock(product_id, quantity)
+        if remaining is None or remaining == -2:
+            return await self._reserve_in_db(product_id, quantity)
+        if remaining == -1:
+            raise ValueError("Insufficient stock")
+        return remaining
+
+    async def release(self, product_id: int, quantity: int) -> Optional[int]:
+        """
+        Return previously reserved stock.
+
+        Args:
+            product_id: Product to release
+            quantity: Units to release
+
+        Returns:
+            Available stock after the release, or None when the product has
+            no inventory
+        """
+        available = await self.cache.release_stock(product_id, quantity)
+        if available == -2:
+            if not await self._seed(product_id):
+                return None
+            available = await self.cache.release_stock(product_id, quantity)
+        if available is None or available == -2:
+            return await self._release_in_db(product_id, quantity)
+        return available
+
+    async def _seed(self, product_id: int) -> bool:
+        """
+        Seed the Redis stock counter from the database.
+
+        Returns False when the product has no inventory. The counter is left
+        unseeded when the unwritten delta cannot be read, so the caller
+        falls back to Postgres.
+        """
+        # Read the unwritten delta before the row: a flush committing in
+        # between is then counted twice, which understates stock, never
+        # overstates it
+        pending = await self.cache.get_pending_reservation(product_id)
+        async with self.session_factory() as session:
+            row = (
+                await session.execute(
+                    select(Inventory.quantity, Inventory.reserved_quantity).where(
+                        Inventory.product_id == product_id
+                    )
+                )
+            ).one_or_none()
+        if row is None:
+            return False
+
+        if pending is not None:
+            quantity, reserved = row
+            held = max(0, reserved + pending)
+            await self.cache.seed_stock(product_id, max(0, quantity - held), held)
+        return True
+
+    async def _reserve_in_db(self, product_id: int, quantity: int) -> Optional[int]:
+        """Reserve with one conditional UPDATE when Redis is unavailable."""
+        available = Inventory.quantity - Inventory.reserved_quantity
+        async with self.session_factory.begin() as session:
+            remaining = (
+                await session.execute(
+                    update(Inventory)
+                    .where(
+                        Inventory.product_id == product_id, available >= quantity
+                    )
+                    .values(reserved_quantity=Inventory.reserved_quantity + quantity)
+                    .returning(available)
+                )
+            ).scalar_one_or_none()
+            if remaining is None:
+                exists = (
+                    await session.execute(
+                        select(Inventory.id).where(Inventory.product_id == product_id)
+                    )
+                ).scalar_one_or_none()
+                if exists is None:
+                    return None
+                raise ValueError("Insufficient stock")
+        return remaining
+
+    async def _release_in_db(self, product_id: int, quantity: int) -> Optional[int]:
+        """Release with one UPDATE when Redis is unavailable."""
+        async with self.session_factory.begin() as session:
+            return (
+                await session.execute(
+                    update(Inventory)
+                    .where(Inventory.product_id == product_id)
+                    .values(
+                        reserved_quantity=func.greatest(
+                            Inventory.reserved_quantity - quantity, 0
+                        )
+                    )
+                    .returning(Inventory.quantity - Inventory.reserved_quantity)
+                )
+            ).scalar_one_or_none()
@@ -1,5 +1,5 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, RootModel, model_validator
 from datetime import datetime
 
 
@@ -42,8 +42,7 @@ class InventoryRead(InventoryBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class InventoryAdjustment(BaseModel):
@@ -55,3 +54,47 @@ class InventoryAdjustment(BaseModel):
     )
     reason: str = Field(..., description="Reason for adjustment")
     notes: Optional[str] = Field(None, description="Additional notes")
+
+
+class StockAlert(BaseModel):
+    """Low stock alert schema"""
+
+    product_id: int
+    product_name: str
+    available_quantity: int
+    low_stock_threshold: int
+    is_out_of_stock: bool
+
+
+class InventoryReservation(BaseModel):
+    """Stock reservation schema"""
+
+    quantity: int = Field(..., gt=0, description="Units to reserve or release")
+
+
+class InventoryBulkItem(BaseModel):
+    """Bulk inventory update item; sets quantity or applies delta"""
+
+    product_id: int = Field(..., description="Product ID")
+    quantity: Optional[int] = Field(None, ge=0, description="New quantity")
+    delta: Optional[int] = Field(
+        None, description="Quantity change (negative for reduction)"
+    )
+
+    @model_validator(mode="after")
+    def check_quantity_or_delta(self):
+        if (self.quantity is None) == (self.delta is None):
+            raise ValueError("Provide exactly one of quantity or delta")
+        return self
+
+
+class InventoryBulkUpdate(RootModel[List[InventoryBulkItem]]):
+    """Bulk inventory update request; each product may appear only once"""
+
+    @model_validator(mode="after")
+    def check_unique_products(self):
+        # One UPDATE ... FROM (VALUES ...) applies only one row per product
+        product_ids = [item.product_id for item in self.root]
+        if len(set(product_ids)) != len(product_ids):
+            raise ValueError("Each product_id may appear only once")
+        return self
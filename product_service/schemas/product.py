@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 from datetime import datetime
 
 
@@ -35,8 +35,7 @@ class ProductImageRead(ProductImageBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ProductBase(BaseModel):
@@ -109,8 +108,7 @@ class ProductRead(ProductBase):
     updated_at: datetime
     images: List[ProductImageRead] = []
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ProductListResponse(BaseModel):
@@ -121,3 +119,12 @@ class ProductListResponse(BaseModel):
     size: int
     pages: int
     products: List[ProductRead]
+
+
+class ProductCursorResponse(BaseModel):
+    """Keyset-paginated product list response schema"""
+
+    products: List[ProductRead]
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor for the next page; null on the last page"
+    )
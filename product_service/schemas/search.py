@@ -0,0 +1,24 @@
+from typing import Optional, List
+from pydantic import BaseModel, Field
+
+from schemas.common import PaginatedResponse
+from schemas.product import ProductRead
+
+
+class SearchFilters(BaseModel):
+    """Product search filters"""
+
+    category_id: Optional[int] = Field(None, description="Filter by category")
+    min_price: Optional[float] = Field(None, ge=0, description="Minimum price")
+    max_price: Optional[float] = Field(None, ge=0, description="Maximum price")
+    min_rating: Optional[float] = Field(
+        None, ge=0, le=5, description="Minimum average rating"
+    )
+    in_stock: Optional[bool] = Field(None, description="Filter by stock availability")
+
+
+class SearchResponse(PaginatedResponse):
+    """Product search response schema"""
+
+    query: str = Field(..., description="Search query")
+    products: List[ProductRead]
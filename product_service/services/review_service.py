@@ -0,0 +1,191 @@
+"""
+Review Service for Product Reviews
+"""
+
+from collections import Counter
+from math import floor
+from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, func
+
+from models.review import Review
+from schemas.review import (
+    ReviewCreate,
+    ReviewUpdate,
+    ReviewRead,
+    ReviewListResponse,
+    ReviewStats,
+)
+from shared_code.cache import get_cache_service
+
+
+def _stats_contribution(review: Review) -> Counter:
+    """Counter fields a review adds to its product's review statistics"""
+    if not review.is_approved or review.is_deleted:
+        return Counter()
+    contribution = Counter(
+        {"count": 1, "sum": review.rating, f"r{floor(review.rating)}": 1}
+    )
+    if review.is_verified_purchase:
+        contribution["verified"] = 1
+    return contribution
+
+
+class ReviewService:
+    """Service for managing product reviews"""
+
+    __slots__ = ("db",)
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_review(self, review_data: ReviewCreate) -> ReviewRead:
+        """Create a new review"""
+        review = Review(**review_data.dict())
+        self.db.add(review)
+        await self._begin_stats_write(review.product_id)
+        await self.db.commit()
+        await self.db.refresh(review)
+        await self._update_stats(review.product_id, _stats_contribution(review))
+        return ReviewRead.from_orm(review)
+
+    async def get_review_by_id(self, review_id: int) -> Optional[ReviewRead]:
+        """Get review by ID"""
+        result = await self.db.execute(select(Review).where(Review.id == review_id))
+        review = result.scalar_one_or_none()
+        return ReviewRead.from_orm(review) if review else None
+
+    async def update_review(
+        self, review_id: int, review_data: ReviewUpdate
+    ) -> Optional[ReviewRead]:
+        """Update review"""
+        result = await self.db.execute(select(Review).where(Review.id == review_id))
+        review = result.scalar_one_or_none()
+        if not review:
+            return None
+
+        old_contribution = _stats_contribution(review)
+        for field, value in review_data.dict(exclude_unset=True).items():
+            setattr(review, field, value)
+
+        await self._begin_stats_write(review.product_id)
+        await self.db.commit()
+        await self.db.refresh(review)
+        delta = _stats_contribution(review)
+        delta.subtract(old_contribution)
+        await self._update_stats(review.product_id, delta)
+        return ReviewRead.from_orm(review)
+
+    async def delete_review(self, review_id: int) -> bool:
+        """Delete review"""
+        result = await self.db.execute(select(Review).where(Review.id == review_id))
+        review = result.scalar_one_or_none()
+        if not review:
+            return False
+
+        await self.db.delete(review)
+        await self._begin_stats_write(review.product_id)
+        await self.db.commit()
+        delta = Counter()
+        delta.subtract(_stats_contribution(review))
+        await self._update_stats(review.product_id, delta)
+        return True
+
+    async def get_product_reviews(
+        self,
+        product_id: int,
+        page: int = 1,
+        size: int = 10,
+        rating: Optional[int] = None,
+    ) -> ReviewListResponse:
+        """Get a page of approved reviews for a product, newest first"""
+        conditions = self._review_filters(product_id)
+        if rating is not None:
+            conditions += [Review.rating >= rating, Review.rating < rating + 1]
+
+        # Count and average come from one aggregate; only the page is loaded
+        summary = (
+            await self.db.execute(
+                select(func.count(Review.id), func.avg(Review.rating)).where(
+                    and_(*conditions)
+                )
+            )
+        ).one()
+        result = await self.db.execute(
+            select(Review)
+            .where(and_(*conditions))
+            .order_by(Review.created_at.desc(), Review.id.desc())
+            .offset((page - 1) * size)
+            .limit(size)
+        )
+
+        return ReviewListResponse(
+            total=summary[0],
+            average_rating=round(float(summary[1] or 0), 2),
+            reviews=[ReviewRead.from_orm(review) for review in result.scalars()],
+        )
+
+    async def get_product_review_stats(self, product_id: int) -> ReviewStats:
+        """
+        Get rating distribution and totals for a product's approved reviews.
+
+        Served from running counters in Redis that every review write
+        adjusts; the counters are rebuilt from the database when missing,
+        and the rebuild is only stored if no review write raced the count.
+        """
+        cache = get_cache_service("product")
+        counters = await cache.get_review_counters(product_id)
+        if counters is None:
+            version = await cache.get_review_write_version(product_id)
+            counters = await self._count_reviews(product_id)
+            if version is not None:
+                await cache.seed_review_counters(product_id, counters, version)
+
+        total = int(counters.get("count", 0))
+        return ReviewStats(
+            total_reviews=total,
+            average_rating=round(counters.get("sum", 0) / total, 2) if total else 0.0,
+            rating_distribution={
+                str(stars): int(counters.get(f"r{stars}", 0)) for stars in range(1, 6)
+            },
+            verified_purchases=int(counters.get("verified", 0)),
+        )
+
+    async def _count_reviews(self, product_id: int) -> Dict[str, float]:
+        """Aggregate a product's review counters in the database"""
+        result = await self.db.execute(
+            select(
+                func.floor(Review.rating).label("stars"),
+                func.count(Review.id),
+                func.sum(Review.rating),
+                func.count(Review.id).filter(Review.is_verified_purchase),
+            )
+            .where(and_(*self._review_filters(product_id)))
+            .group_by("stars")
+        )
+
+        counters = {"count": 0, "sum": 0.0, "verified": 0}
+        for stars, count, stars_sum, verified_count in result:
+            counters[f"r{int(stars)}"] = count
+            counters["count"] += count
+            counters["sum"] += stars_sum
+            counters["verified"] += verified_count
+        return counters
+
+    async def _begin_stats_write(self, product_id: int) -> None:
+        """Keep counters from being rebuilt until this write is applied"""
+        await get_cache_service("product").begin_review_write(product_id)
+
+    async def _update_stats(self, product_id: int, delta: Counter) -> None:
+        """Apply a review write to the product's running counters"""
+        delta = {field: value for field, value in delta.items() if value}
+        await get_cache_service("product").increment_review_counters(product_id, delta)
+
+    @staticmethod
+    def _review_filters(product_id: int) -> List:
+        """Conditions selecting a product's visible reviews"""
+        return [
+            Review.product_id == product_id,
+            Review.is_approved.is_(True),
+            Review.is_deleted.is_(False),
+        ]
@@ -0,0 +1,179 @@
+"""
+Search Service for Product and Category Search
+"""
+
+from math import ceil
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, or_, func
+from sqlalchemy.orm import selectinload
+
+from models.product import Product
+from models.category import Category
+from models.inventory import Inventory
+from models.review import Review
+from schemas.product import ProductRead
+from schemas.category import CategoryRead
+from schemas.search import SearchFilters, SearchResponse
+from shared_code.cache import get_cache_service
+
+CATEGORY_SEARCH_LIMIT = 20
+
+
+def _name_matches(column, query: str):
+    """
+    Trigram match on a name column.
+
+    ``%>`` (word similarity) and ILIKE are both answered from the column's
+    gin_trgm_ops index, so neither falls back to a sequential scan.
+    """
+    return or_(column.op("%>")(query), column.ilike(f"%{query}%"))
+
+
+class SearchService:
+    """Service for searching products and categories"""
+
+    __slots__ = ("db",)
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search_products(
+        self,
+        query: str,
+        page: int = 1,
+        size: int = 10,
+        filters: Optional[SearchFilters] = None,
+        sort_by: Optional[str] = "relevance",
+    ) -> SearchResponse:
+        """Search products by name, most similar first by default"""
+        filters = filters or SearchFilters()
+        conditions = [_name_matches(Product.name, query)]
+        if filters.category_id:
+            conditions.append(Product.category_id == filters.category_id)
+        if filters.min_price is not None:
+            conditions.append(Product.price >= filters.min_price)
+        if filters.max_price is not None:
+            conditions.append(Product.price <= filters.max_price)
+        if filters.in_stock is not None:
+            in_stock = Product.id.in_(
+                select(Inventory.product_id).where(Inventory.quantity > 0)
+            )
+            conditions.append(in_stock if filters.in_stock else ~in_stock)
+
+        average_rating = None
+        if filters.min_rating is not None or sort_by == "rating":
+            ratings = (
+                select(
+                    Review.product_id,
+                    func.avg(Review.rating).label("average_rating"),
+                )
+                .where(Review.is_approved.is_(True))
+                .group_by(Review.product_id)
+                .subquery()
+            )
+            average_rating = func.coalesce(ratings.c.average_rating, 0)
+            if filters.min_rating is not None:
+                conditions.append(average_rating >= filters.min_rating)
+
+        sort_orders = {
+            "relevance": func.word_similarity(query, Product.name).desc(),
+            "price_asc": Product.price.asc(),
+            "price_desc": Product.price.desc(),
+            "rating": average_rating.desc() if average_rating is not None else None,
+            "newest": Product.created_at.desc(),
+        }
+        if sort_by not in sort_orders:
+            raise ValueError(f"Unsupported sort_by: {sort_by}")
+
+        query_stmt = select(Product)
+        count_stmt = select(func.count(Product.id))
+        if average_rating is not None:
+            query_stmt = query_stmt.outerjoin(
+                ratings, ratings.c.product_id == Product.id
+            )
+            count_stmt = count_stmt.outerjoin(
+                ratings, ratings.c.product_id == Product.id
+            )
+
+        total = (await self.db.execute(count_stmt.where(and_(*conditions)))).scalar()
+        result = await self.db.execute(
+            query_stmt.options(
+                selectinload(Product.inventory), selectinload(Product.images)
+            )
+            .where(and_(*conditions))
+            .order_by(sort_orders[sort_by], Product.id)
+            .offset((page - 1) * size)
+            .limit(size)
+        )
+
+        return SearchResponse(
+            query=query,
+            products=[
+                ProductRead.model_validate(product) for product in result.scalars()
+            ],
+            total=total,
+            page=page,
+            size=size,
+            pages=ceil(total / size) if total else 0,
+        )
+
+    async def get_suggestions(self, query: str, limit: int = 5) -> List[str]:
+        """Get product names similar to a partial query"""
+        result = await self.db.execute(
+            select(Product.name)
+            .where(_name_matches(Product.name, query))
+            .order_by(func.word_similarity(query, Product.name).desc())
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+    async def get_popular_searches(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the most searched terms"""
+        return await get_cache_service("product").get_popular_search_terms(limit)
+
+    async def search_categories(self, query: str) -> List[CategoryRead]:
+        """Search categories by name, most similar first"""
+        result = await self.db.execute(
+            select(*Category.__table__.c)
+            .where(_name_matches(Category.name, query))
+            .order_by(func.word_similarity(query, Category.name).desc())
+            .limit(CATEGORY_SEARCH_LIMIT)
+        )
+        return [CategoryRead.model_validate(dict(row)) for row in result.mappings()]
+
+    async def get_available_filters(
+        self, category_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Get the price range and categories available for filtering"""
+        price_query = select(func.min(Product.price), func.max(Product.price))
+        if category_id:
+            price_query = price_query.where(Product.category_id == category_id)
+        min_price, max_price = (await self.db.execute(price_query)).one()
+
+        category_counts = await self.db.execute(
+            select(Category.id, Category.name, func.count(Product.id))
+            .join(Product, Product.category_id == Category.id)
+            .group_by(Category.id, Category.name)
+            .order_by(Category.name)
+        )
+
+        return {
+            "price_range": {"min": min_price or 0, "max": max_price or 0},
+            "categories": [
+                {"id": id_, "name": name, "product_count": count}
+                for id_, name, count in category_counts
+            ],
+            "sort_by": ["relevance", "price_asc", "price_desc", "rating", "newest"],
+        }
+
+    async def track_search(self, query: str, results_count: int = 0) -> None:
+        """
+        Count a search towards the popular search terms.
+
+        Runs as a background task after the response, so it never raises;
+        the cache service logs and swallows Redis errors.
+        """
+        term = query.strip().lower()
+        if term:
+            await get_cache_service("product").increment_search_term(term)
@@ -0,0 +1,63 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from shared_code.cache.base_cache import ProductCacheService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+async def cache():
+    """Product cache backed by an in-process Redis that runs Lua scripts."""
+    cache = ProductCacheService()
+    cache.redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield cache
+    await cache.redis_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_seed_and_increment(cache):
+    """Test that writes after a seed are added to the counters."""
+    version = await cache.get_review_write_version(1)
+    assert await cache.seed_review_counters(1, {"count": 1, "sum": 4}, version)
+
+    await cache.begin_review_write(1)
+    await cache.increment_review_counters(1, {"count": 1, "sum": 5})
+
+    assert await cache.get_review_counters(1) == {"count": 2.0, "sum": 9.0}
+
+
+@pytest.mark.asyncio
+async def test_seed_skipped_while_write_in_flight(cache):
+    """Test that a count taken before a write commits is not stored."""
+    version = await cache.get_review_write_version(1)
+    await cache.begin_review_write(1)
+
+    assert not await cache.seed_review_counters(1, {"count": 1}, version)
+    assert await cache.get_review_counters(1) is None
+
+
+@pytest.mark.asyncio
+async def test_seed_skipped_after_racing_write(cache):
+    """Test that a write finishing during the count invalidates the count."""
+    version = await cache.get_review_write_version(1)
+    await cache.begin_review_write(1)
+    await cache.increment_review_counters(1, {"count": 1})
+
+    assert not await cache.seed_review_counters(1, {"count": 1}, version)
+
+    version = await cache.get_review_write_version(1)
+    assert await cache.seed_review_counters(1, {"count": 2}, version)
+
+
+@pytest.mark.asyncio
+async def test_failed_increment_drops_counters(cache):
+    """Test that counters which missed a write are rebuilt instead of drifting."""
+    version = await cache.get_review_write_version(1)
+    await cache.seed_review_counters(1, {"count": 1}, version)
+    cache._increment_review_counters_script = AsyncMock(
+        side_effect=RuntimeError("connection reset")
+    )
+
+    assert not await cache.increment_review_counters(1, {"count": 1})
+    assert await cache.get_review_counters(1) is None
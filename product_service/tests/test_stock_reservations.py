@@ -0,0 +1,139 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.sql.dml import Insert, Update
+
+from modules.inventory.stock_reservations import StockReservationService
+from shared_code.cache.base_cache import ProductCacheService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+async def cache():
+    """Product cache backed by an in-process Redis that runs Lua scripts."""
+    cache = ProductCacheService()
+    cache.redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield cache
+    await cache.redis_client.aclose()
+
+
+def _session_factory(inventory_row=None, already_flushed=False):
+    """Session factory whose sessions return one inventory row."""
+    result = MagicMock()
+    result.one_or_none.return_value = inventory_row
+    # Id of the stock_flushes row, or None when the batch id already exists
+    result.scalar_one_or_none.return_value = None if already_flushed else 1
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=result)
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=session)
+    context.__aexit__ = AsyncMock(return_value=False)
+
+    factory = MagicMock(return_value=context)
+    factory.begin = MagicMock(return_value=context)
+    factory.session = session
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_reserve_seeds_from_row_and_pending(cache):
+    """Test that seeding subtracts both the row and unwritten reservations."""
+    await cache.redis_client.hset(cache._get_key("stock:pending"), 1, 2)
+    service = StockReservationService(cache, _session_factory((10, 3)))
+
+    assert await service.reserve(1, 4) == 1
+    with pytest.raises(ValueError):
+        await service.reserve(1, 2)
+
+
+@pytest.mark.asyncio
+async def test_release_is_capped_at_held_stock(cache):
+    """Test that releasing more than is reserved cannot create stock."""
+    service = StockReservationService(cache, _session_factory((10, 0)))
+
+    assert await service.reserve(1, 3) == 7
+    assert await service.release(1, 5) == 10
+    assert await service.release(1, 1) == 10
+    assert await cache.get_pending_reservation(1) == 0
+
+
+@pytest.mark.asyncio
+async def test_release_after_invalidation_reseeds(cache):
+    """Test that a release on a dropped counter is capped by the reseed."""
+    service = StockReservationService(cache, _session_factory((10, 2)))
+
+    assert await service.release(1, 5) == 10
+    assert await cache.get_pending_reservation(1) == -2
+
+
+def _statements(factory, kind):
+    """Statements of one kind the factory's session executed."""
+    return [
+        call.args[0]
+        for call in factory.session.execute.call_args_list
+        if isinstance(call.args[0], kind)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_batch_and_clears_it(cache):
+    """Test that a flush applies the deltas once and releases its claim."""
+    factory = _session_factory((10, 0))
+    service = StockReservationService(cache, factory)
+    await service.reserve(1, 3)
+
+    await service.flush()
+
+    assert len(_statements(factory, Update)) == 1
+    assert await cache.get_pending_reservation(1) == 0
+    assert not await cache.redis_client.exists(cache._get_key("stock:flush"))
+
+
+@pytest.mark.asyncio
+async def test_unfinished_batch_is_not_applied_twice(cache):
+    """Test that a batch committed but not cleared is retried under its id."""
+    factory = _session_factory((10, 0))
+    service = StockReservationService(cache, factory)
+    await service.reserve(1, 3)
+
+    finish = cache.finish_pending_reservations
+    cache.finish_pending_reservations = AsyncMock(return_value=False)
+    await service.flush()
+    cache.finish_pending_reservations = finish
+
+    retry = _session_factory(already_flushed=True)
+    service.session_factory = retry
+    await service.flush()
+
+    [first_insert] = _statements(factory, Insert)
+    [retry_insert] = _statements(retry, Insert)
+    assert (
+        first_insert.compile().params["batch_id"]
+        == retry_insert.compile().params["batch_id"]
+    )
+    assert _statements(retry, Update) == []
+    assert await cache.get_pending_reservation(1) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_batch(cache):
+    """Test that deltas survive a failed database write."""
+    factory = _session_factory((10, 0))
+    service = StockReservationService(cache, factory)
+    await service.reserve(1, 3)
+
+    factory.session.execute.side_effect = RuntimeError("connection lost")
+    await service.flush()
+
+    assert await cache.get_pending_reservation(1) == 3
+    assert not await cache.redis_client.exists(cache._get_key("stock:flush"))
+
+
+@pytest.mark.asyncio
+async def test_flush_claim_release_checks_token(cache):
+    """Test that an expired claim cannot release another worker's claim."""
+    assert await cache.claim_stock_flush("worker-a")
+    await cache.redis_client.set(cache._get_key("stock:flush"), "worker-b")
+
+    assert await cache.release_stock_flush("worker-a") is False
+    assert await cache.redis_client.get(cache._get_key("stock:flush")) == "worker-b"
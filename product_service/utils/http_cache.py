@@ -0,0 +1,32 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# Clients and shared caches may reuse these responses for a minute, then
+# revalidate with If-None-Match
+CACHE_CONTROL = "public, max-age=60"
+
+
+def cached_json_response(request: Request, payload: Any) -> Response:
+    """
+    Serialize a GET payload with a weak ETag and Cache-Control header.
+
+    Answers 304 without a body when the client already holds the same
+    representation.
+    """
+    if isinstance(payload, BaseModel):
+        body = payload.model_dump_json().encode()
+    else:
+        body = ORJSONResponse(jsonable_encoder(payload)).body
+
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
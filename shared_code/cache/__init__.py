@@ -27,6 +27,7 @@ from .base_cache import (
     AuthCacheService,
     UserCacheService,
     OrderCacheService,
+    PaymentCacheService,
     get_cache_service
 )
 
@@ -36,5 +37,6 @@ __all__ = [
     'AuthCacheService',
     'UserCacheService',
     'OrderCacheService',
+    'PaymentCacheService',
     'get_cache_service'
 ]
@@ -3,10 +3,11 @@ Shared Cache Service - Base Redis cache implementation for all microservices
 """
 import json
 import asyncio
-from typing import Any, Optional, Dict, List, Union
+from typing import Any, Optional, Dict, List, Tuple, Union
 from datetime import datetime, timedelta
 import logging
 import os
+import time
 
 try:
     import redis.asyncio as redis
@@ -16,6 +17,159 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Encode cached values with orjson when it is installed
+try:
+    import orjson
+
+    def _dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    _loads = orjson.loads
+except ImportError:
+
+    def _dumps(value: Any) -> str:
+        return json.dumps(value, default=str)
+
+    _loads = json.loads
+
+# Sweep entries older than the window, then admit the request if the
+# sorted set is still under the limit. Runs atomically inside Redis.
+ACQUIRE_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# Stock scripts share KEYS: the product's available stock counter, its
+# counter of units currently held by reservations, and the hash of
+# reserved-quantity deltas not yet written to the database.
+
+# Set both counters of an unseeded product; a no-op when already seeded
+SEED_STOCK_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('SET', KEYS[2], ARGV[2])
+return 1
+"""
+
+# Take ARGV[1] units of product ARGV[2] only if enough are left.
+# Returns the remaining stock, -1 when short, -2 when the counter is unseeded.
+RESERVE_STOCK_SCRIPT = """
+local available = redis.call('GET', KEYS[1])
+if not available then
+    return -2
+end
+if tonumber(available) < tonumber(ARGV[1]) then
+    return -1
+end
+redis.call('INCRBY', KEYS[2], ARGV[1])
+redis.call('HINCRBY', KEYS[3], ARGV[2], ARGV[1])
+return redis.call('DECRBY', KEYS[1], ARGV[1])
+"""
+
+# Give back up to ARGV[1] units of product ARGV[2], never more than its
+# reservations hold, so releases cannot raise stock above what exists.
+# Returns the new stock, or -2 when the counter is unseeded so the caller
+# can seed it from the database first.
+RELEASE_STOCK_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -2
+end
+local held = tonumber(redis.call('GET', KEYS[2]) or '0')
+local quantity = math.min(tonumber(ARGV[1]), held)
+if quantity <= 0 then
+    return tonumber(redis.call('GET', KEYS[1]))
+end
+redis.call('DECRBY', KEYS[2], quantity)
+redis.call('HINCRBY', KEYS[3], ARGV[2], -quantity)
+return redis.call('INCRBY', KEYS[1], quantity)
+"""
+
+# Move the pending deltas (KEYS[1]) into the in-flight batch (KEYS[2]),
+# tagged with batch id ARGV[1]. A batch left in flight by an earlier flush
+# is returned unchanged instead, so it is retried under its original id.
+TAKE_RESERVATIONS_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return {}
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+    redis.call('HSET', KEYS[2], 'batch', ARGV[1])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# Sum of a product's pending and in-flight deltas
+PENDING_RESERVATION_SCRIPT = """
+local pending = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+return pending + tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+"""
+
+# Delete KEYS[1] only if field/value ARGV[1] (or the string value, when no
+# field is given) still matches ARGV[2]
+DELETE_IF_MATCHES_SCRIPT = """
+local current
+if ARGV[1] == '' then
+    current = redis.call('GET', KEYS[1])
+else
+    current = redis.call('HGET', KEYS[1], ARGV[1])
+end
+if current == ARGV[2] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Create review counters from ARGV field/value pairs (after the TTL and the
+# write version read before counting) unless they exist, a review write is
+# in flight or one finished since; a count racing a write must not be stored
+SEED_REVIEW_COUNTERS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+if tonumber(redis.call('GET', KEYS[2]) or '0') > 0 then
+    return 0
+end
+if (redis.call('GET', KEYS[3]) or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Count a review write as in flight until its counters are applied; the
+# TTL frees seeding if the writer dies before finishing
+BEGIN_REVIEW_WRITE_SCRIPT = """
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Finish a review write: bump the write version and add ARGV field/increment
+# pairs (after the version TTL) to existing counters; missing counters are
+# left alone so they are rebuilt from the database on the next read
+INCREMENT_REVIEW_COUNTERS_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') > 0 then
+    redis.call('DECR', KEYS[2])
+end
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[1])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call('HINCRBYFLOAT', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
 class BaseCacheService:
     """Base Redis cache service for all microservices."""
     
@@ -71,7 +225,7 @@ class BaseCacheService:
             cache_key = self._get_key(key)
             data = await self.redis_client.get(cache_key)
             if data:
-                return json.loads(data)
+                return _loads(data)
             return None
         except Exception as e:
             logger.error(f"[{self.service_name}] Cache get error: {e}")
@@ -84,7 +238,7 @@ class BaseCacheService:
         
         try:
             cache_key = self._get_key(key)
-            serialized_value = json.dumps(value, default=str)
+            serialized_value = _dumps(value)
             
             ttl = ttl or self.default_ttl
             await self.redis_client.setex(cache_key, ttl, serialized_value)
@@ -113,7 +267,13 @@ class BaseCacheService:
         
         try:
             cache_pattern = self._get_key(pattern)
-            keys = await self.redis_client.keys(cache_pattern)
+            # SCAN walks the keyspace incrementally instead of blocking Redis
+            keys = [
+                key
+                async for key in self.redis_client.scan_iter(
+                    match=cache_pattern, count=500
+                )
+            ]
             if keys:
                 return await self.redis_client.delete(*keys)
             return 0
@@ -178,6 +338,15 @@ class ProductCacheService(BaseCacheService):
     
     def __init__(self):
         super().__init__("product", db_number=1)
+        self._seed_stock_script = None
+        self._reserve_stock_script = None
+        self._release_stock_script = None
+        self._take_reservations_script = None
+        self._pending_reservation_script = None
+        self._delete_if_matches_script = None
+        self._seed_review_counters_script = None
+        self._begin_review_write_script = None
+        self._increment_review_counters_script = None
     
     async def get_product(self, product_id: int) -> Optional[Dict]:
         """Get cached product."""
@@ -195,6 +364,279 @@ class ProductCacheService(BaseCacheService):
         """Cache category data."""
         return await self.set(f"category:{category_id}", category_data, ttl)
     
+    async def get_category_list(self, page: int, size: int) -> Optional[Dict]:
+        """Get a cached category list page."""
+        return await self.get(f"categories:p{page}:s{size}")
+
+    async def set_category_list(self, page: int, size: int, categories: Dict, ttl: int = 300) -> bool:
+        """Cache a category list page."""
+        return await self.set(f"categories:p{page}:s{size}", categories, ttl)
+
+    async def invalidate_category(self, category_id: Optional[int] = None) -> None:
+        """Drop a cached category and every cached category list page."""
+        if category_id is not None:
+            await self.delete(f"category:{category_id}")
+        await self.delete_pattern("categories:*")
+
+    async def get_product_reviews(self, product_id: int, page: int, size: int, rating: Optional[int]) -> Optional[Dict]:
+        """Get a cached page of product reviews."""
+        return await self.get(f"reviews:{product_id}:p{page}:s{size}:r{rating}")
+
+    async def set_product_reviews(self, product_id: int, page: int, size: int, rating: Optional[int], reviews: Dict, ttl: int = 300) -> bool:
+        """Cache a page of product reviews."""
+        return await self.set(f"reviews:{product_id}:p{page}:s{size}:r{rating}", reviews, ttl)
+
+    async def get_review_counters(self, product_id: int) -> Optional[Dict[str, float]]:
+        """Get the running review counters for a product, or None when not built."""
+        if not self.redis_client:
+            return None
+        try:
+            counters = await self.redis_client.hgetall(self._get_key(f"revstats:{product_id}"))
+            return {field: float(value) for field, value in counters.items()} or None
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Review counters get error: {e}")
+            return None
+
+    def _review_counter_keys(self, product_id: int) -> List[str]:
+        """KEYS shared by the review counter scripts for one product."""
+        return [
+            self._get_key(f"revstats:{product_id}"),
+            self._get_key(f"revstats:writes:{product_id}"),
+            self._get_key(f"revstats:version:{product_id}"),
+        ]
+
+    async def get_review_write_version(self, product_id: int) -> Optional[str]:
+        """Get the version review writes bump, to read before rebuilding counters."""
+        if not self.redis_client:
+            return None
+        try:
+            version = await self.redis_client.get(self._get_key(f"revstats:version:{product_id}"))
+            return version or "0"
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Review write version get error: {e}")
+            return None
+
+    async def seed_review_counters(self, product_id: int, counters: Dict[str, float], version: str, ttl: int = 3600) -> bool:
+        """Store counters rebuilt from the database unless a review write raced the count."""
+        if not self.redis_client:
+            return False
+        try:
+            if self._seed_review_counters_script is None:
+                self._seed_review_counters_script = self.redis_client.register_script(SEED_REVIEW_COUNTERS_SCRIPT)
+            args = [ttl, version]
+            for field, value in counters.items():
+                args += [field, value]
+            return bool(
+                await self._seed_review_counters_script(keys=self._review_counter_keys(product_id), args=args)
+            )
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Review counters seed error: {e}")
+            return False
+
+    async def begin_review_write(self, product_id: int, ttl: int = 60) -> bool:
+        """Hold off seeding a product's counters until a review write is applied."""
+        if not self.redis_client:
+            return False
+        try:
+            if self._begin_review_write_script is None:
+                self._begin_review_write_script = self.redis_client.register_script(BEGIN_REVIEW_WRITE_SCRIPT)
+            await self._begin_review_write_script(
+                keys=[self._get_key(f"revstats:writes:{product_id}")], args=[ttl]
+            )
+            return True
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Review write begin error: {e}")
+            return False
+
+    async def increment_review_counters(self, product_id: int, deltas: Dict[str, float], ttl: int = 3600) -> bool:
+        """Finish a review write, applying it to the product's counters if they are built."""
+        if not self.redis_client:
+            return False
+        try:
+            if self._increment_review_counters_script is None:
+                self._increment_review_counters_script = self.redis_client.register_script(
+                    INCREMENT_REVIEW_COUNTERS_SCRIPT
+                )
+            args = [ttl]
+            for field, delta in deltas.items():
+                args += [field, delta]
+            await self._increment_review_counters_script(keys=self._review_counter_keys(product_id), args=args)
+            return True
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Review counters increment error: {e}")
+            # Counters that missed a write would stay wrong until they expire
+            await self.delete(f"revstats:{product_id}")
+            return False
+
+    async def invalidate_product_reviews(self, product_id: int) -> None:
+        """Drop cached review pages for a product."""
+        await self.delete_pattern(f"reviews:{product_id}:*")
+
+    def _stock_keys(self, product_id: int) -> List[str]:
+        """KEYS shared by the stock scripts for one product."""
+        return [
+            self._get_key(f"stock:{product_id}"),
+            self._get_key(f"stock:held:{product_id}"),
+            self._get_key("stock:pending"),
+        ]
+
+    async def seed_stock(self, product_id: int, available: int, held: int) -> bool:
+        """Initialise a product's stock counters unless another worker already did."""
+        if not self.redis_client:
+            return False
+        try:
+            if self._seed_stock_script is None:
+                self._seed_stock_script = self.redis_client.register_script(SEED_STOCK_SCRIPT)
+            await self._seed_stock_script(
+                keys=self._stock_keys(product_id)[:2], args=[available, held]
+            )
+            return True
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Stock seed error: {e}")
+            return False
+
+    async def reserve_stock(self, product_id: int, quantity: int) -> Optional[int]:
+        """Atomically take stock. Returns the remaining stock, -1 when short, -2 when unseeded."""
+        if not self.redis_client:
+            return None
+        try:
+            if self._reserve_stock_script is None:
+                self._reserve_stock_script = self.redis_client.register_script(RESERVE_STOCK_SCRIPT)
+            return int(await self._reserve_stock_script(
+                keys=self._stock_keys(product_id), args=[quantity, product_id]
+            ))
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Stock reserve error: {e}")
+            return None
+
+    async def release_stock(self, product_id: int, quantity: int) -> Optional[int]:
+        """Give held stock back. Returns the new stock or -2 when the counter is unseeded."""
+        if not self.redis_client:
+            return None
+        try:
+            if self._release_stock_script is None:
+                self._release_stock_script = self.redis_client.register_script(RELEASE_STOCK_SCRIPT)
+            return int(await self._release_stock_script(
+                keys=self._stock_keys(product_id), args=[quantity, product_id]
+            ))
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Stock release error: {e}")
+            return None
+
+    async def invalidate_stock(self, product_id: int) -> bool:
+        """Drop a product's stock counters so they are reseeded from the database."""
+        if not self.redis_client:
+            return False
+        try:
+            await self.redis_client.delete(*self._stock_keys(product_id)[:2])
+            return True
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Stock invalidate error: {e}")
+            return False
+
+    async def take_pending_reservations(self, batch_id: str) -> Optional[Tuple[str, Dict[int, int]]]:
+        """
+        Move unwritten reserved-quantity deltas into an in-flight batch.
+
+        Returns the (batch id, deltas per product) to write, which is an
+        earlier batch still in flight when there is one, or None when there
+        is nothing to write or Redis is unavailable.
+        """
+        if not self.redis_client:
+            return None
+        try:
+            if self._take_reservations_script is None:
+                self._take_reservations_script = self.redis_client.register_script(
+                    TAKE_RESERVATIONS_SCRIPT
+                )
+            flat = await self._take_reservations_script(
+                keys=[self._get_key("stock:pending"), self._get_key("stock:inflight")],
+                args=[batch_id],
+            )
+            batch = dict(zip(flat[::2], flat[1::2]))
+            if not batch:
+                return None
+            taken_id = batch.pop("batch")
+            return taken_id, {int(product_id): int(delta) for product_id, delta in batch.items()}
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Pending reservations take error: {e}")
+            return None
+
+    async def finish_pending_reservations(self, batch_id: str) -> bool:
+        """Drop the in-flight batch once it is written; a no-op for any other batch."""
+        return await self._delete_if_matches("stock:inflight", "batch", batch_id)
+
+    async def get_pending_reservation(self, product_id: int) -> Optional[int]:
+        """Get one product's unwritten reserved-quantity change, or None on error."""
+        if not self.redis_client:
+            return None
+        try:
+            if self._pending_reservation_script is None:
+                self._pending_reservation_script = self.redis_client.register_script(
+                    PENDING_RESERVATION_SCRIPT
+                )
+            return int(await self._pending_reservation_script(
+                keys=[self._get_key("stock:pending"), self._get_key("stock:inflight")],
+                args=[product_id],
+            ))
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Pending reservation get error: {e}")
+            return None
+
+    async def claim_stock_flush(self, token: str, ttl: int = 30) -> bool:
+        """Claim the right to flush pending reservations; one worker at a time."""
+        if not self.redis_client:
+            return False
+        try:
+            return bool(await self.redis_client.set(self._get_key("stock:flush"), token, nx=True, ex=ttl))
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Stock flush claim error: {e}")
+            return False
+
+    async def release_stock_flush(self, token: str) -> bool:
+        """Release a flush claim, unless it expired and another worker holds it."""
+        return await self._delete_if_matches("stock:flush", "", token)
+
+    async def _delete_if_matches(self, key: str, field: str, value: str) -> bool:
+        """Delete a key only while it (or one of its hash fields) holds the value."""
+        if not self.redis_client:
+            return False
+        try:
+            if self._delete_if_matches_script is None:
+                self._delete_if_matches_script = self.redis_client.register_script(
+                    DELETE_IF_MATCHES_SCRIPT
+                )
+            return bool(await self._delete_if_matches_script(
+                keys=[self._get_key(key)], args=[field, value]
+            ))
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Conditional delete error: {e}")
+            return False
+
+    async def increment_search_term(self, term: str) -> bool:
+        """Count one search for a term in the popularity sorted set."""
+        if not self.redis_client:
+            return False
+        try:
+            await self.redis_client.zincrby(self._get_key("search_terms"), 1, term)
+            return True
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Search term increment error: {e}")
+            return False
+
+    async def get_popular_search_terms(self, limit: int) -> List[Dict]:
+        """Get the most searched terms with their counts."""
+        if not self.redis_client:
+            return []
+        try:
+            terms = await self.redis_client.zrevrange(
+                self._get_key("search_terms"), 0, limit - 1, withscores=True
+            )
+            return [{"query": term, "count": int(score)} for term, score in terms]
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Popular search terms error: {e}")
+            return []
+
     async def get_search_results(self, query_hash: str) -> Optional[List]:
         """Get cached search results."""
         return await self.get(f"search:{query_hash}")
@@ -298,6 +740,136 @@ class OrderCacheService(BaseCacheService):
         return await self.set(f"order_status:{order_id}", status_data, ttl)
 
 
+
+class PaymentCacheService(BaseCacheService):
+    """Payment service cache implementation."""
+    
+    def __init__(self):
+        super().__init__("payment", db_number=6)
+        self._acquire_slot_script = None
+    
+    async def claim_idempotency_key(self, key: str, ttl: int = 3600) -> bool:
+        """Atomically claim an idempotency key. Returns False if already claimed."""
+        if not self.redis_client:
+            return True
+        try:
+            cache_key = self._get_key(f"idem:{key}")
+            return bool(await self.redis_client.set(cache_key, "1", nx=True, ex=ttl))
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Idempotency claim error: {e}")
+            return True
+    
+    async def release_idempotency_key(self, key: str) -> bool:
+        """Release an idempotency key so the operation can be retried."""
+        return await self.delete(f"idem:{key}")
+    
+    async def get_idempotent_response(self, key: str) -> Optional[Dict]:
+        """Get the response stored for a claimed idempotency key."""
+        return await self.get(f"idem:{key}:resp")
+    
+    async def set_idempotent_response(self, key: str, response: Dict, ttl: int = 3600) -> bool:
+        """Store the response for a claimed idempotency key."""
+        return await self.set(f"idem:{key}:resp", response, ttl)
+    
+    async def get_payment_status(self, payment_intent_id: str) -> Optional[Dict]:
+        """Get cached gateway payment status."""
+        return await self.get(f"status:{payment_intent_id}")
+    
+    async def set_payment_status(self, payment_intent_id: str, status_data: Dict, ttl: int = 3) -> bool:
+        """Cache gateway payment status."""
+        return await self.set(f"status:{payment_intent_id}", status_data, ttl)
+    
+    async def set_promotion(self, code: str, promotion_data: Dict, expires_at: float) -> bool:
+        """Cache a promotion and index it in the active set by expiry timestamp."""
+        if not self.redis_client:
+            return False
+        try:
+            ttl = max(int(expires_at - time.time()), 1)
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.setex(self._get_key(f"promo:{code}"), ttl, _dumps(promotion_data))
+                pipe.zadd(self._get_key("promo:active"), {code: expires_at})
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Promotion cache set error: {e}")
+            return False
+
+    async def remove_promotion(self, code: str) -> bool:
+        """Drop a promotion from the cache and the active set."""
+        if not self.redis_client:
+            return False
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(self._get_key(f"promo:{code}"))
+                pipe.zrem(self._get_key("promo:active"), code)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Promotion cache remove error: {e}")
+            return False
+
+    async def get_active_promotions(self) -> Optional[List[Dict]]:
+        """Get all cached promotions that have not expired yet."""
+        if not self.redis_client:
+            return None
+        try:
+            codes = await self.redis_client.zrangebyscore(
+                self._get_key("promo:active"), time.time(), "+inf"
+            )
+            if not codes:
+                return []
+            values = await self.redis_client.mget(
+                [self._get_key(f"promo:{code}") for code in codes]
+            )
+            return [_loads(value) for value in values if value]
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Promotion cache get error: {e}")
+            return None
+
+    async def increment_promotion_usage(self, code: str, initial_count: int) -> Optional[int]:
+        """Increment the shared usage counter, seeding it from the database count."""
+        if not self.redis_client:
+            return None
+        try:
+            cache_key = self._get_key(f"promo:used:{code}")
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.set(cache_key, initial_count, nx=True)
+                pipe.incr(cache_key)
+                _, used_count = await pipe.execute()
+            return used_count
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Promotion usage increment error: {e}")
+            return None
+
+    async def acquire_concurrency_slot(
+        self, key: str, request_id: str, limit: int, window: int = 60
+    ) -> bool:
+        """Claim one of `limit` in-flight slots. Slots older than `window` seconds are reclaimed."""
+        if not self.redis_client:
+            return True
+        try:
+            if self._acquire_slot_script is None:
+                self._acquire_slot_script = self.redis_client.register_script(ACQUIRE_SLOT_SCRIPT)
+            acquired = await self._acquire_slot_script(
+                keys=[self._get_key(key)],
+                args=[time.time(), window, limit, request_id],
+            )
+            return bool(acquired)
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Concurrency slot acquire error: {e}")
+            return True
+    
+    async def release_concurrency_slot(self, key: str, request_id: str) -> bool:
+        """Release an in-flight slot claimed with acquire_concurrency_slot."""
+        if not self.redis_client:
+            return False
+        try:
+            await self.redis_client.zrem(self._get_key(key), request_id)
+            return True
+        except Exception as e:
+            logger.error(f"[{self.service_name}] Concurrency slot release error: {e}")
+            return False
+
 # Cache service instances
 _cache_services = {}
 
@@ -312,12 +884,13 @@ def get_cache_service(service_name: str) -> BaseCacheService:
             _cache_services[service_name] = UserCacheService()
         elif service_name == "order":
             _cache_services[service_name] = OrderCacheService()
+        elif service_name == "payment":
+            _cache_services[service_name] = PaymentCacheService()
         else:
             # Default cache service for other services
             db_mapping = {
                 "api_gateway": 0,
                 "analytics": 5,
-                "payment": 6,
                 "notification": 7
             }
             db_number = db_mapping.get(service_name, 0)
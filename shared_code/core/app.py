@@ -7,18 +7,19 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.openapi.utils import get_openapi
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
+import asyncio
 import time
 import uuid
 import logging
 from datetime import datetime
 
 from .config import BaseServiceSettings
-from .database import init_database, get_database_manager
+from .database import get_database_manager
 from .exceptions import BaseServiceException, create_http_exception
 
 try:
@@ -33,6 +34,17 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Serialize responses with orjson when it is installed
+try:
+    import orjson  # noqa: F401
+
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
+# Upper bound for each dependency probe in the health check (seconds)
+HEALTH_CHECK_TIMEOUT = 2.0
+
 
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
     """Middleware for request logging and metrics"""
@@ -150,7 +162,7 @@ def create_app(
         service_name: Name of the service
         settings: Service settings
         routers: List of router objects to include
-        startup_tasks: List of startup tasks
+        startup_tasks: List of independent startup tasks, run concurrently
         shutdown_tasks: List of shutdown tasks
         custom_openapi: Custom OpenAPI schema generator
 
@@ -166,13 +178,16 @@ def create_app(
         # Startup tasks
         logger.info(f"Starting {service_name}...")
 
-        try:
-            # Initialize database with settings
-            init_database()
-            db_manager = get_database_manager(settings=settings)
-            logger.info("Database initialized")
+        # Database manager bound to this service's settings
+        db_manager = get_database_manager(settings=settings)
+
+        async def connect_database():
+            if await db_manager.ping():
+                logger.info("Database connected")
+            else:
+                logger.warning("Database connection failed")
 
-            # Initialize Redis
+        async def connect_redis():
             init_redis(settings)
             redis_manager = get_redis_manager()
             if await redis_manager.ping():
@@ -180,10 +195,13 @@ def create_app(
             else:
                 logger.warning("Redis connection failed")
 
-            # Run custom startup tasks
+        try:
+            # Database and Redis are independent; initialize them concurrently
+            await asyncio.gather(connect_database(), connect_redis())
+
+            # Run custom startup tasks concurrently
             if startup_tasks:
-                for task in startup_tasks:
-                    await task()
+                await asyncio.gather(*(task() for task in startup_tasks))
 
             logger.info(f"{service_name} startup completed")
 
@@ -203,7 +221,6 @@ def create_app(
                     await task()
 
             # Close database connections
-            db_manager = get_database_manager(settings=settings)
             await db_manager.close()
 
             # Close Redis connections
@@ -224,6 +241,7 @@ def create_app(
         redoc_url=settings.REDOC_URL if not settings.is_production else None,
         openapi_url=settings.OPENAPI_URL if not settings.is_production else None,
         lifespan=lifespan,
+        default_response_class=DefaultResponse,
     )
 
     # Add middleware
@@ -310,24 +328,31 @@ def create_app(
     @app.get(settings.HEALTH_CHECK_PATH, response_model=HealthResponse, tags=["Health"])
     async def health_check():
         """Health check endpoint"""
-        # Check database
-        db_healthy = True
-        try:
+
+        async def check_database() -> bool:
             db_manager = get_database_manager(settings=settings)
             async with db_manager.get_db() as session:
                 await session.execute("SELECT 1")
-        except Exception as e:
-            logger.error(f"Database health check failed: {e}")
-            db_healthy = False
+            return True
 
-        # Check Redis
-        redis_healthy = True
-        try:
+        async def check_redis() -> bool:
             redis_manager = get_redis_manager()
-            redis_healthy = await redis_manager.ping()
-        except Exception as e:
-            logger.error(f"Redis health check failed: {e}")
-            redis_healthy = False
+            return await redis_manager.ping()
+
+        # Probe dependencies concurrently, each bounded by a timeout
+        db_result, redis_result = await asyncio.gather(
+            asyncio.wait_for(check_database(), timeout=HEALTH_CHECK_TIMEOUT),
+            asyncio.wait_for(check_redis(), timeout=HEALTH_CHECK_TIMEOUT),
+            return_exceptions=True,
+        )
+
+        db_healthy = db_result is True
+        if isinstance(db_result, BaseException):
+            logger.error(f"Database health check failed: {db_result!r}")
+
+        redis_healthy = redis_result is True
+        if isinstance(redis_result, BaseException):
+            logger.error(f"Redis health check failed: {redis_result!r}")
 
         # Determine overall health
         is_healthy = db_healthy and redis_healthy
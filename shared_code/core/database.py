@@ -1,3 +1,4 @@
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
@@ -5,6 +6,17 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Encode JSON/JSONB columns with orjson when it is installed
+try:
+    import orjson
+
+    def _json_serializer(value) -> str:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    JSON_CODEC = {"json_serializer": _json_serializer, "json_deserializer": orjson.loads}
+except ImportError:
+    JSON_CODEC = {}
+
 # Default database URL if no settings available
 DEFAULT_DATABASE_URL = os.getenv(
     "DATABASE_URL", "postgresql+asyncpg://localhost:5432/food_fast_db"
@@ -29,6 +41,7 @@ def create_database_engine(
         pool_pre_ping=True,
         pool_recycle=3600,  # Recycle connections after 1 hour
         pool_timeout=30,  # Wait up to 30 seconds for a connection
+        **JSON_CODEC,
     )
 
 
@@ -55,6 +68,16 @@ class DatabaseManager:
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
 
+    async def ping(self) -> bool:
+        """Test database connection"""
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"Database ping failed: {e}")
+            return False
+
     async def close(self):
         """Close database connections"""
         try: